@@ -2,20 +2,40 @@
 Authentication module for SSL Monitor
 Handles JWT tokens, password hashing, and user authentication
 """
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
+import asyncio
+import hashlib
 import os
 import logging
+import time
 import jwt
 from passlib.context import CryptContext
-from fastapi import HTTPException, status
+from fastapi import HTTPException, status, Depends, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth_state import create_login_limiter, create_session_store
+from backend.cache import TTLCache
+from backend.database import AsyncSessionLocal, get_db
+from backend.models import AuthRevocationState, RevokedToken
 
 logger = logging.getLogger(__name__)
 
 # ============================================
 # Password Hashing Configuration
 # ============================================
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Re-hash a user's password at login when it was hashed with other settings
+PASSWORD_REHASH = os.getenv("PASSWORD_REHASH", "false").lower() == "true"
+# Threads doing bcrypt work per worker, and jobs allowed to wait for one
+PASSWORD_HASH_THREADS = int(os.getenv("PASSWORD_HASH_THREADS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "16"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # ============================================
 # JWT Configuration - From Environment
@@ -23,6 +43,13 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 JWT_SECRET = os.getenv("JWT_SECRET")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
+JWT_ISSUER = "ssl-monitor"
+JWT_AUDIENCE = "ssl-monitor-api"
+
+# Verified claims kept per worker, and how often each worker checks for
+# revocations made by other workers (seconds)
+AUTH_CLAIMS_CACHE_SIZE = int(os.getenv("AUTH_CLAIMS_CACHE_SIZE", "10000"))
+AUTH_REVOCATION_POLL_SECONDS = float(os.getenv("AUTH_REVOCATION_POLL_SECONDS", "5"))
 
 if not JWT_SECRET:
     raise ValueError("❌ JWT_SECRET not set in .env! This is CRITICAL for security.")
@@ -57,6 +84,73 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     return pwd_context.verify(plain_password, hashed_password)
 
+# ============================================
+# Password Hashing Executor
+# ============================================
+class PasswordHasher:
+    """
+    Runs bcrypt off the event loop on a bounded thread pool
+
+    A bcrypt check costs hundreds of milliseconds of CPU; on the event loop
+    it would stall every other request of the worker. bcrypt releases the
+    GIL, so the threads also hash in parallel. Jobs beyond the threads plus
+    max_queue are rejected with 503 instead of queueing without bound.
+    """
+
+    def __init__(self, threads: int, max_queue: int):
+        """
+        Initialize hasher
+
+        Args:
+            threads: Concurrent bcrypt computations
+            max_queue: Jobs allowed to wait for a free thread
+        """
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="bcrypt")
+        self.capacity = threads + max_queue
+        self.pending = 0
+
+    async def run(self, fn, *args):
+        """Run fn(*args) on the pool, or raise 503 when the queue is full"""
+        if self.pending >= self.capacity:
+            logger.warning(f"⚠️ Password hashing queue full ({self.pending} jobs), shedding request")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent logins. Please retry shortly.",
+                headers={"Retry-After": "1"}
+            )
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+password_hasher = PasswordHasher(PASSWORD_HASH_THREADS, PASSWORD_HASH_MAX_QUEUE)
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the password hashing pool"""
+    return await password_hasher.run(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password on the password hashing pool
+
+    Args:
+        plain_password: Plain text password to verify
+        hashed_password: Stored hash
+
+    Returns:
+        (matches, new hash) where the new hash is set only if PASSWORD_REHASH
+        is enabled and the stored hash uses outdated settings (e.g. fewer
+        BCRYPT_ROUNDS)
+
+    Raises:
+        HTTPException: 503 if the pool's queue is full
+    """
+    if PASSWORD_REHASH:
+        return await password_hasher.run(pwd_context.verify_and_update, plain_password, hashed_password)
+    return await password_hasher.run(verify_password, plain_password, hashed_password), None
+
 # ============================================
 # JWT Token Functions
 # ============================================
@@ -98,8 +192,8 @@ def create_access_token(
         "role": role,                   # User role
         "iat": datetime.utcnow(),       # Issued at
         "exp": expire,                  # Expiration
-        "iss": "ssl-monitor",           # Issuer
-        "aud": "ssl-monitor-api"        # Audience
+        "iss": JWT_ISSUER,              # Issuer
+        "aud": JWT_AUDIENCE             # Audience
     }
     
     # Encode token
@@ -144,7 +238,9 @@ def verify_token(token: str) -> Dict:
         payload = jwt.decode(
             token,
             JWT_SECRET,
-            algorithms=[JWT_ALGORITHM]
+            algorithms=[JWT_ALGORITHM],
+            audience=JWT_AUDIENCE,
+            issuer=JWT_ISSUER
         )
         
         # Extract user info
@@ -164,7 +260,8 @@ def verify_token(token: str) -> Dict:
         return {
             "user_id": int(user_id),
             "username": username,
-            "role": role
+            "role": role,
+            "exp": payload["exp"]
         }
         
     except jwt.ExpiredSignatureError:
@@ -188,6 +285,141 @@ def verify_token(token: str) -> Dict:
             detail="Token verification failed"
         )
 
+# ============================================
+# Request Authentication
+# ============================================
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# sha256(token) -> claims, each entry expiring with its token
+claims_cache = TTLCache(ttl=JWT_EXPIRATION_HOURS * 3600, maxsize=AUTH_CLAIMS_CACHE_SIZE)
+
+class RevocationVersion:
+    """Last seen auth_revocation_state.version of this worker"""
+
+    def __init__(self):
+        self.version: Optional[int] = None
+        self.checked_at = 0.0
+
+revocations = RevocationVersion()
+
+def token_hash(token: str) -> str:
+    """SHA-256 hex digest identifying a token (never store the token itself)"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+async def _sync_revocations(db: AsyncSession):
+    """
+    Drop cached claims after a revocation on any worker
+
+    Reads the shared revocation version at most every
+    AUTH_REVOCATION_POLL_SECONDS; when it moved, the cache is cleared so
+    every token is re-checked against revoked_tokens once.
+    """
+    now = time.monotonic()
+    if now - revocations.checked_at < AUTH_REVOCATION_POLL_SECONDS:
+        return
+    revocations.checked_at = now
+
+    version = (await db.execute(
+        select(AuthRevocationState.version).where(AuthRevocationState.id == 1)
+    )).scalar()
+    if version != revocations.version:
+        if revocations.version is not None:
+            claims_cache.clear()
+            logger.info("🔄 Token revocations changed, claims cache cleared")
+        revocations.version = version
+
+async def authenticate(token: str, db: AsyncSession) -> Dict:
+    """
+    Claims of a token, from the cache or by full verification
+
+    A cache hit costs one hash and a dict lookup. On a miss the token is
+    decoded and checked against revoked_tokens, then cached until its exp.
+
+    Raises:
+        HTTPException: If the token is invalid, expired or revoked
+    """
+    await _sync_revocations(db)
+
+    key = token_hash(token)
+    claims = claims_cache.get(key)
+    if claims is not None:
+        session_manager.touch(key)
+        return claims
+
+    claims = verify_token(token)
+    if await is_revoked(token, db):
+        logger.warning(f"❌ Revoked token used by: {claims['username']}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked"
+        )
+
+    claims_cache.set(key, claims, ttl=claims["exp"] - time.time())
+    session_manager.touch(key)
+    return claims
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_db)
+) -> Dict:
+    """
+    FastAPI dependency: user of the request's `Authorization: Bearer` token
+
+    Returns:
+        Dictionary with user_id, username, role and exp
+    """
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return await authenticate(credentials.credentials, db)
+
+async def get_stream_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    token: Optional[str] = Query(None)
+) -> Dict:
+    """
+    Like get_current_user, also accepting ?token= for EventSource clients
+    (browsers cannot set headers on SSE requests)
+
+    Uses its own short session: a get_db session would stay open, holding
+    a pooled connection, for the whole life of the stream.
+    """
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Missing token",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    async with AsyncSessionLocal() as db:
+        return await authenticate(token, db)
+
+async def revoke_token(token: str, claims: Dict, db: AsyncSession):
+    """
+    Revoke a token on all workers until it expires
+
+    Args:
+        token: Access token
+        claims: Its verified claims
+        db: Database session (committed by the caller)
+    """
+    key = token_hash(token)
+    await db.execute(
+        insert(RevokedToken)
+        .values(
+            token_hash=key,
+            user_id=claims["user_id"],
+            expires_at=datetime.utcfromtimestamp(claims["exp"])
+        )
+        .on_conflict_do_nothing(index_elements=[RevokedToken.token_hash])
+    )
+    claims_cache.invalidate(key)
+    await session_manager.invalidate_token(key)
+
 # ============================================
 # Refresh Token
 # ============================================
@@ -226,72 +458,67 @@ def create_refresh_token(user_id: int, username: str) -> str:
         logger.error(f"❌ Refresh token creation failed: {str(e)}")
         raise
 
+def verify_refresh_token(token: str) -> Dict:
+    """
+    Verify and decode a refresh token
+
+    Refresh tokens carry type=refresh and no audience, so access tokens
+    (which have one) are rejected here, as refresh tokens are by
+    verify_token. Revocation is checked by the caller.
+
+    Args:
+        token: Refresh token
+
+    Returns:
+        Dictionary with user_id, username and exp
+
+    Raises:
+        HTTPException: If the token is invalid, expired or not a refresh token
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            JWT_SECRET,
+            algorithms=[JWT_ALGORITHM],
+            options={"require": ["sub", "exp"]}
+        )
+    except jwt.ExpiredSignatureError:
+        logger.warning("❌ Refresh token has expired")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has expired"
+        )
+    except jwt.InvalidTokenError as e:
+        logger.warning(f"❌ Invalid refresh token: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    if payload.get("type") != "refresh" or not payload.get("username"):
+        logger.warning("❌ Token used for refresh is not a refresh token")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token"
+        )
+
+    return {
+        "user_id": int(payload["sub"]),
+        "username": payload["username"],
+        "exp": payload["exp"]
+    }
+
+async def is_revoked(token: str, db: AsyncSession) -> bool:
+    """Whether a token's hash is in revoked_tokens"""
+    return (await db.execute(
+        select(RevokedToken.token_hash).where(RevokedToken.token_hash == token_hash(token))
+    )).scalar() is not None
+
 # ============================================
 # Session Management
 # ============================================
-class SessionManager:
-    """Manage user sessions with expiry"""
-    
-    def __init__(self):
-        """Initialize session manager"""
-        self.sessions: Dict[str, Dict] = {}
-    
-    def create_session(self, user_id: int, username: str, token: str) -> str:
-        """
-        Create user session
-        
-        Args:
-            user_id: User ID
-            username: Username
-            token: Access token
-            
-        Returns:
-            Session ID
-        """
-        import uuid
-        session_id = str(uuid.uuid4())
-        
-        self.sessions[session_id] = {
-            "user_id": user_id,
-            "username": username,
-            "token": token,
-            "created_at": datetime.utcnow(),
-            "last_activity": datetime.utcnow(),
-            "expires_at": datetime.utcnow() + timedelta(hours=JWT_EXPIRATION_HOURS)
-        }
-        
-        logger.info(f"✅ Session created for user: {username}")
-        return session_id
-    
-    def get_session(self, session_id: str) -> Optional[Dict]:
-        """Get session info"""
-        if session_id not in self.sessions:
-            return None
-        
-        session = self.sessions[session_id]
-        
-        # Check if session expired
-        if session["expires_at"] < datetime.utcnow():
-            del self.sessions[session_id]
-            logger.warning(f"❌ Session expired: {session_id}")
-            return None
-        
-        # Update last activity
-        session["last_activity"] = datetime.utcnow()
-        
-        return session
-    
-    def invalidate_session(self, session_id: str) -> bool:
-        """Invalidate (logout) session"""
-        if session_id in self.sessions:
-            del self.sessions[session_id]
-            logger.info(f"✅ Session invalidated: {session_id}")
-            return True
-        
-        return False
-
-# Global session manager
-session_manager = SessionManager()
+# Sessions expire with their access token (see backend/auth_state.py)
+session_manager = create_session_store(JWT_EXPIRATION_HOURS)
 
 # ============================================
 # Password Validation
@@ -329,49 +556,5 @@ def validate_password_strength(password: str) -> tuple[bool, str]:
 # ============================================
 # Rate Limiting for Failed Logins
 # ============================================
-class LoginAttemptTracker:
-    """Track failed login attempts per IP/username"""
-    
-    def __init__(self, max_attempts: int = 5, lockout_minutes: int = 15):
-        """
-        Initialize tracker
-        
-        Args:
-            max_attempts: Max failed attempts before lockout
-            lockout_minutes: Lockout duration in minutes
-        """
-        self.max_attempts = max_attempts
-        self.lockout_minutes = lockout_minutes
-        self.attempts: Dict[str, list] = {}
-    
-    def record_attempt(self, identifier: str, success: bool = False):
-        """Record a login attempt"""
-        if identifier not in self.attempts:
-            self.attempts[identifier] = []
-        
-        now = datetime.utcnow()
-        
-        # Remove old attempts (older than lockout window)
-        self.attempts[identifier] = [
-            attempt for attempt in self.attempts[identifier]
-            if (now - attempt).total_seconds() < self.lockout_minutes * 60
-        ]
-        
-        if not success:
-            self.attempts[identifier].append(now)
-    
-    def is_locked_out(self, identifier: str) -> bool:
-        """Check if account is locked out"""
-        if identifier not in self.attempts:
-            return False
-        
-        now = datetime.utcnow()
-        recent_attempts = [
-            attempt for attempt in self.attempts[identifier]
-            if (now - attempt).total_seconds() < self.lockout_minutes * 60
-        ]
-        
-        return len(recent_attempts) >= self.max_attempts
-
-# Global login attempt tracker
-login_tracker = LoginAttemptTracker(max_attempts=5, lockout_minutes=15)
\ No newline at end of file
+# Failed logins per username:IP within a sliding 15 minute window
+login_tracker = create_login_limiter(max_attempts=5, window_seconds=15 * 60)
@@ -0,0 +1,478 @@
+"""
+Authentication state
+Failed-login limiter and session store in fixed memory per worker, or
+shared by all workers through Postgres (AUTH_STATE_STORE=postgres)
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from backend.database import raw_connection
+
+logger = logging.getLogger(__name__)
+
+# memory: per-worker state; postgres: login_attempts and user_sessions tables
+AUTH_STATE_STORE = os.getenv("AUTH_STATE_STORE", "memory").lower()
+# Keys (limiter) and sessions kept per worker before the oldest is evicted
+AUTH_STATE_MAX_ENTRIES = int(os.getenv("AUTH_STATE_MAX_ENTRIES", "100000"))
+# How often expired entries are swept and session activity is written (seconds)
+AUTH_STATE_SWEEP_SECONDS = float(os.getenv("AUTH_STATE_SWEEP_SECONDS", "30"))
+
+# ============================================
+# Sliding Window
+# ============================================
+def sliding_count(window: int, attempts: int, previous: int, now: float, length: float) -> float:
+    """
+    Estimated attempts within the last `length` seconds
+
+    Two fixed-window counters approximate the sliding window: the previous
+    window's count is weighted by how much of it still overlaps.
+
+    Args:
+        window: Index (epoch // length) of the window `attempts` belongs to
+        attempts: Attempts counted in that window
+        previous: Attempts counted in the window before it
+        now: Current epoch time
+        length: Window length in seconds
+    """
+    current = int(now // length)
+    if window == current:
+        before, during = previous, attempts
+    elif window == current - 1:
+        before, during = attempts, 0
+    else:
+        return 0.0
+    return before * (1 - (now % length) / length) + during
+
+# ============================================
+# Login Limiter
+# ============================================
+class MemoryLoginLimiter:
+    """Failed attempts per key in this worker, O(1) per check"""
+
+    def __init__(self, max_attempts: int, window_seconds: float, maxsize: int = AUTH_STATE_MAX_ENTRIES):
+        """
+        Initialize limiter
+
+        Args:
+            max_attempts: Failed attempts within the window before lockout
+            window_seconds: Sliding window length
+            maxsize: Keys kept before the least recently failed is evicted
+        """
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self.maxsize = maxsize
+        # key -> [window, attempts, previous attempts], least recently failed first
+        self.entries: "OrderedDict[str, List[int]]" = OrderedDict()
+
+    async def record_attempt(self, identifier: str, success: bool = False):
+        """Record a login attempt (only failures count)"""
+        if success:
+            return
+
+        now = time.time()
+        current = int(now // self.window_seconds)
+        entry = self.entries.get(identifier)
+        if entry is None:
+            self.entries[identifier] = [current, 1, 0]
+        else:
+            window, attempts, _ = entry
+            if window == current:
+                entry[1] += 1
+            else:
+                entry[:] = [current, 1, attempts if window == current - 1 else 0]
+            self.entries.move_to_end(identifier)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    async def is_locked_out(self, identifier: str) -> bool:
+        """Check if the key reached max_attempts within the window"""
+        entry = self.entries.get(identifier)
+        if entry is None:
+            return False
+        return sliding_count(*entry, time.time(), self.window_seconds) >= self.max_attempts
+
+    async def sweep(self) -> int:
+        """
+        Drop keys without failures in the last two windows
+
+        Entries are ordered by last failure, so this stops at the first
+        live one and costs only what it removes.
+        """
+        stale_before = int(time.time() // self.window_seconds) - 1
+        removed = 0
+        while self.entries:
+            key, (window, _, _) = next(iter(self.entries.items()))
+            if window >= stale_before:
+                break
+            del self.entries[key]
+            removed += 1
+        return removed
+
+class PostgresLoginLimiter:
+    """Failed attempts per key shared by all workers (login_attempts table)"""
+
+    def __init__(self, max_attempts: int, window_seconds: float):
+        """
+        Initialize limiter
+
+        Args:
+            max_attempts: Failed attempts within the window before lockout
+            window_seconds: Sliding window length
+        """
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+
+    async def record_attempt(self, identifier: str, success: bool = False):
+        """Record a login attempt (only failures count) in one upsert"""
+        if success:
+            return
+
+        async with raw_connection() as conn:
+            await conn.execute(
+                """
+                INSERT INTO login_attempts AS a (identifier, window_index, attempts, previous_attempts)
+                VALUES ($1, $2, 1, 0)
+                ON CONFLICT (identifier) DO UPDATE SET
+                    previous_attempts = CASE
+                        WHEN a.window_index = $2 THEN a.previous_attempts
+                        WHEN a.window_index = $2 - 1 THEN a.attempts
+                        ELSE 0
+                    END,
+                    attempts = CASE WHEN a.window_index = $2 THEN a.attempts + 1 ELSE 1 END,
+                    window_index = $2
+                """,
+                identifier,
+                int(time.time() // self.window_seconds)
+            )
+
+    async def is_locked_out(self, identifier: str) -> bool:
+        """Check if the key reached max_attempts within the window"""
+        async with raw_connection() as conn:
+            row = await conn.fetchrow(
+                "SELECT window_index, attempts, previous_attempts FROM login_attempts WHERE identifier = $1",
+                identifier
+            )
+        if row is None:
+            return False
+        return sliding_count(*row, time.time(), self.window_seconds) >= self.max_attempts
+
+    async def sweep(self) -> int:
+        """Delete keys without failures in the last two windows"""
+        async with raw_connection() as conn:
+            result = await conn.execute(
+                "DELETE FROM login_attempts WHERE window_index < $1",
+                int(time.time() // self.window_seconds) - 1
+            )
+        return int(result.split()[-1])
+
+# ============================================
+# Session Store
+# ============================================
+class MemorySessionStore:
+    """Sessions of this worker, O(1) per operation"""
+
+    def __init__(self, ttl_hours: float, maxsize: int = AUTH_STATE_MAX_ENTRIES):
+        """
+        Initialize store
+
+        Args:
+            ttl_hours: Session lifetime (the access token lifetime)
+            maxsize: Sessions kept before the oldest is evicted
+        """
+        self.ttl = timedelta(hours=ttl_hours)
+        self.maxsize = maxsize
+        # Every session lives for the same ttl, so creation order is expiry order
+        self.sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self.by_token: Dict[str, str] = {}
+
+    async def create_session(
+        self,
+        user_id: int,
+        username: str,
+        token_hash: str,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> str:
+        """
+        Create user session
+
+        Args:
+            user_id: User ID
+            username: Username
+            token_hash: Hash of the session's access token
+            ip_address: Client IP
+            user_agent: Client User-Agent
+
+        Returns:
+            Session ID
+        """
+        session_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+        self.sessions[session_id] = {
+            "user_id": user_id,
+            "username": username,
+            "token_hash": token_hash,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": now,
+            "last_activity": now,
+            "expires_at": now + self.ttl
+        }
+        self.by_token[token_hash] = session_id
+
+        while len(self.sessions) > self.maxsize:
+            self._remove(next(iter(self.sessions)))
+
+        logger.info(f"✅ Session created for user: {username}")
+        return session_id
+
+    async def get_session(self, session_id: str) -> Optional[Dict]:
+        """Get session info (None if unknown or expired)"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        if session["expires_at"] < datetime.utcnow():
+            self._remove(session_id)
+            return None
+        return session
+
+    def touch(self, token_hash: str):
+        """Record activity on the session of a token"""
+        session_id = self.by_token.get(token_hash)
+        if session_id is not None:
+            self.sessions[session_id]["last_activity"] = datetime.utcnow()
+
+    async def invalidate_session(self, session_id: str) -> bool:
+        """Invalidate (logout) session"""
+        if session_id not in self.sessions:
+            return False
+        self._remove(session_id)
+        logger.info(f"✅ Session invalidated: {session_id}")
+        return True
+
+    async def invalidate_token(self, token_hash: str) -> bool:
+        """Invalidate the session of a token"""
+        session_id = self.by_token.get(token_hash)
+        return session_id is not None and await self.invalidate_session(session_id)
+
+    async def flush(self):
+        """Nothing to write; activity is recorded in place"""
+
+    async def sweep(self) -> int:
+        """Drop expired sessions, stopping at the first live one"""
+        now = datetime.utcnow()
+        removed = 0
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session["expires_at"] >= now:
+                break
+            self._remove(session_id)
+            removed += 1
+        return removed
+
+    def _remove(self, session_id: str):
+        session = self.sessions.pop(session_id)
+        self.by_token.pop(session["token_hash"], None)
+
+class PostgresSessionStore:
+    """Sessions shared by all workers (user_sessions table)"""
+
+    def __init__(self, ttl_hours: float, maxsize: int = AUTH_STATE_MAX_ENTRIES):
+        """
+        Initialize store
+
+        Args:
+            ttl_hours: Session lifetime (the access token lifetime)
+            maxsize: Tokens whose activity is buffered between flushes
+        """
+        self.ttl = timedelta(hours=ttl_hours)
+        self.maxsize = maxsize
+        # token_hash -> last activity not yet written
+        self.pending: Dict[str, datetime] = {}
+
+    async def create_session(
+        self,
+        user_id: int,
+        username: str,
+        token_hash: str,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None
+    ) -> str:
+        """
+        Create user session
+
+        Args:
+            user_id: User ID
+            username: Username
+            token_hash: Hash of the session's access token
+            ip_address: Client IP
+            user_agent: Client User-Agent
+
+        Returns:
+            Session ID
+        """
+        now = datetime.utcnow()
+        async with raw_connection() as conn:
+            session_id = await conn.fetchval(
+                """
+                INSERT INTO user_sessions
+                (user_id, token_hash, ip_address, user_agent, created_at, last_activity, expires_at)
+                VALUES ($1, $2, $3, $4, $5, $5, $6)
+                RETURNING id::text
+                """,
+                user_id, token_hash, ip_address, user_agent, now, now + self.ttl
+            )
+        logger.info(f"✅ Session created for user: {username}")
+        return session_id
+
+    async def get_session(self, session_id: str) -> Optional[Dict]:
+        """Get session info (None if unknown, invalidated or expired)"""
+        try:
+            session_uuid = uuid.UUID(session_id)
+        except ValueError:
+            return None
+
+        async with raw_connection() as conn:
+            row = await conn.fetchrow(
+                """
+                SELECT s.user_id, u.username, s.token_hash, s.ip_address, s.user_agent,
+                       s.created_at, s.last_activity, s.expires_at
+                FROM user_sessions s
+                JOIN users u ON u.id = s.user_id
+                WHERE s.id = $1 AND s.is_active AND s.expires_at >= LOCALTIMESTAMP
+                """,
+                session_uuid
+            )
+        if row is None:
+            return None
+        session = dict(row)
+        session["last_activity"] = self.pending.get(session["token_hash"], session["last_activity"])
+        return session
+
+    def touch(self, token_hash: str):
+        """
+        Record activity on the session of a token
+
+        Only buffered: flush() writes the latest activity of every token in
+        one statement, so a busy token costs one row update per sweep
+        instead of one per request.
+        """
+        if token_hash in self.pending or len(self.pending) < self.maxsize:
+            self.pending[token_hash] = datetime.utcnow()
+
+    async def invalidate_session(self, session_id: str) -> bool:
+        """Invalidate (logout) session"""
+        try:
+            session_uuid = uuid.UUID(session_id)
+        except ValueError:
+            return False
+
+        async with raw_connection() as conn:
+            token_hash = await conn.fetchval(
+                """
+                UPDATE user_sessions SET is_active = false
+                WHERE id = $1 AND is_active
+                RETURNING token_hash
+                """,
+                session_uuid
+            )
+        if token_hash is None:
+            return False
+        self.pending.pop(token_hash, None)
+        logger.info(f"✅ Session invalidated: {session_id}")
+        return True
+
+    async def invalidate_token(self, token_hash: str) -> bool:
+        """Invalidate the session of a token"""
+        self.pending.pop(token_hash, None)
+        async with raw_connection() as conn:
+            result = await conn.execute(
+                "UPDATE user_sessions SET is_active = false WHERE token_hash = $1 AND is_active",
+                token_hash
+            )
+        return result != "UPDATE 0"
+
+    async def flush(self):
+        """Write buffered activity in one statement"""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, {}
+        async with raw_connection() as conn:
+            await conn.execute(
+                """
+                UPDATE user_sessions s
+                SET last_activity = t.last_activity
+                FROM unnest($1::text[], $2::timestamp[]) AS t(token_hash, last_activity)
+                WHERE s.token_hash = t.token_hash
+                  AND s.is_active
+                  AND s.last_activity < t.last_activity
+                """,
+                list(pending.keys()),
+                list(pending.values())
+            )
+
+    async def sweep(self) -> int:
+        """Write buffered activity and delete expired sessions"""
+        await self.flush()
+        async with raw_connection() as conn:
+            result = await conn.execute(
+                "DELETE FROM user_sessions WHERE expires_at < $1",
+                datetime.utcnow()
+            )
+        return int(result.split()[-1])
+
+# ============================================
+# Store Selection and Sweeper
+# ============================================
+def create_login_limiter(max_attempts: int, window_seconds: float):
+    """Login limiter of the configured AUTH_STATE_STORE"""
+    if AUTH_STATE_STORE == "postgres":
+        return PostgresLoginLimiter(max_attempts, window_seconds)
+    return MemoryLoginLimiter(max_attempts, window_seconds)
+
+def create_session_store(ttl_hours: float):
+    """Session store of the configured AUTH_STATE_STORE"""
+    if AUTH_STATE_STORE == "postgres":
+        return PostgresSessionStore(ttl_hours)
+    return MemorySessionStore(ttl_hours)
+
+async def sweep_revoked_tokens() -> int:
+    """Delete revocations of tokens that have expired (they are rejected by exp anyway)"""
+    async with raw_connection() as conn:
+        result = await conn.execute(
+            "DELETE FROM revoked_tokens WHERE expires_at < $1",
+            datetime.utcnow()
+        )
+    return int(result.split()[-1])
+
+async def run_sweeper(limiter, sessions, interval: float = AUTH_STATE_SWEEP_SECONDS):
+    """
+    Sweep loop (runs until cancelled)
+
+    revoked_tokens is always in Postgres, so it is swept whatever the
+    AUTH_STATE_STORE.
+
+    Args:
+        limiter: Login limiter
+        sessions: Session store
+        interval: Seconds between sweeps
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            expired = (
+                await limiter.sweep()
+                + await sessions.sweep()
+                + await sweep_revoked_tokens()
+            )
+            if expired:
+                logger.debug(f"🧹 Swept {expired} expired auth entries")
+        except Exception as e:
+            logger.error(f"❌ Auth state sweep failed: {str(e)}")
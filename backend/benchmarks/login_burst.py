@@ -0,0 +1,118 @@
+"""
+Login burst benchmark
+Fires a burst of concurrent logins at a running backend while probing a
+cheap endpoint, and reports latency percentiles for both
+
+Usage:
+    python backend/benchmarks/login_burst.py --url http://localhost:8080 \
+        --username admin --password 'Admin@123456' --logins 200 --concurrency 50
+
+Run against the backend port directly: nginx rate-limits /api/auth/login.
+Repeated failures lock the account out (login_tracker), so use valid
+credentials.
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import requests
+
+# ============================================
+# Measurement
+# ============================================
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples (milliseconds)"""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+def summarize(name: str, samples: List[float], statuses: Dict[int, int]):
+    """Print one result line"""
+    print(
+        f"{name:<8} n={len(samples):<5} "
+        f"p50={percentile(samples, 50):8.1f}ms  p90={percentile(samples, 90):8.1f}ms  "
+        f"p99={percentile(samples, 99):8.1f}ms  max={max(samples, default=float('nan')):8.1f}ms  "
+        f"mean={statistics.fmean(samples) if samples else float('nan'):8.1f}ms  "
+        f"status={dict(sorted(statuses.items()))}"
+    )
+
+def timed(session: requests.Session, method: str, url: str, **kwargs) -> Tuple[float, int]:
+    """(latency in ms, status code; 0 on connection error)"""
+    start = time.perf_counter()
+    try:
+        code = session.request(method, url, timeout=60, **kwargs).status_code
+    except requests.RequestException:
+        code = 0
+    return (time.perf_counter() - start) * 1000, code
+
+# ============================================
+# Burst
+# ============================================
+def run(args: argparse.Namespace):
+    """Run the burst and the background probe, then print percentiles"""
+    login_url = f"{args.url}/api/auth/login"
+    probe_url = f"{args.url}{args.probe_path}"
+    credentials = {"username": args.username, "password": args.password}
+
+    local = threading.local()
+
+    def session() -> requests.Session:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        return local.session
+
+    login_samples: List[float] = []
+    login_statuses: Dict[int, int] = {}
+    probe_samples: List[float] = []
+    probe_statuses: Dict[int, int] = {}
+    done = threading.Event()
+
+    def login(_: int):
+        latency, code = timed(session(), "POST", login_url, json=credentials)
+        login_samples.append(latency)
+        login_statuses[code] = login_statuses.get(code, 0) + 1
+
+    def probe():
+        probe_session = requests.Session()
+        while not done.is_set():
+            latency, code = timed(probe_session, "GET", probe_url)
+            probe_samples.append(latency)
+            probe_statuses[code] = probe_statuses.get(code, 0) + 1
+            time.sleep(args.probe_interval)
+
+    # Baseline probe latency with no logins in flight
+    baseline = [timed(requests.Session(), "GET", probe_url)[0] for _ in range(20)]
+
+    prober = threading.Thread(target=probe, daemon=True)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    prober.join()
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, {elapsed:.2f}s "
+          f"({args.logins / elapsed:.1f} logins/s)")
+    summarize("baseline", baseline, {})
+    summarize("login", login_samples, login_statuses)
+    summarize(args.probe_path, probe_samples, probe_statuses)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a login burst against a running backend")
+    parser.add_argument("--url", default="http://localhost:8080", help="Backend base URL")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200, help="Total login requests")
+    parser.add_argument("--concurrency", type=int, default=50, help="Logins in flight at once")
+    parser.add_argument("--probe-path", default="/health", help="Endpoint timed during the burst")
+    parser.add_argument("--probe-interval", type=float, default=0.02, help="Seconds between probes")
+    run(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
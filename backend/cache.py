@@ -0,0 +1,50 @@
+"""
+In-process caching
+Short-lived per-worker caches for hot read endpoints
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+class TTLCache:
+    """Bounded cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        """
+        Initialize cache
+
+        Args:
+            ttl: Seconds an entry stays fresh
+            maxsize: Entries kept before the least recently used is evicted
+        """
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a fresh entry, or default if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store an entry (ttl overrides the cache default)"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop one entry"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
@@ -100,6 +100,23 @@ async def get_session():
         finally:
             await session.close()
 
+@asynccontextmanager
+async def raw_connection():
+    """
+    Borrow a pooled connection as a plain asyncpg connection
+
+    For driver features SQLAlchemy does not expose, such as COPY.
+    The caller manages its own transaction.
+
+    Usage:
+        async with raw_connection() as conn:
+            async with conn.transaction():
+                await conn.copy_records_to_table("staging", records=rows)
+    """
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        yield raw.driver_connection
+
 # ============================================
 # Lifecycle Management
 # ============================================
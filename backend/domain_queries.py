@@ -0,0 +1,342 @@
+"""
+Domain list queries
+Single-query domain listing joined to the certificate status read model,
+with server-side filtering, sorting and keyset pagination
+"""
+import base64
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, Date, DateTime, select, func, tuple_, literal_column, or_
+
+from backend.models import Domain, DomainCertStatus
+
+EXPIRING_SOON_DAYS = int(os.getenv("EXPIRING_SOON_DAYS", "7"))
+
+SSL_STATUS_VALUES = ("VALID", "INVALID")
+
+# Sentinels keep NULL sort values orderable inside keyset tuples (asyncpg
+# maps them to date.max / datetime.min). Spelled as SQL literals so the
+# expressions match idx_domains_active_last_scanned.
+_NO_EXPIRY = literal_column("'infinity'::DATE", Date)
+_NEVER_SCANNED = literal_column("'-infinity'::TIMESTAMP", DateTime)
+
+# ============================================
+# Certificate Status
+# ============================================
+def certificate_status():
+    """
+    Certificate status read model, one row per scanned domain
+
+    Maintained by the scanner's batch writer, so the list joins it on
+    its primary key instead of searching ssl_certificates per domain.
+    """
+    return DomainCertStatus.__table__
+
+def _join_certificate(query: Select, cert) -> Select:
+    """Outer join the certificate status (domains never scanned have none)"""
+    return query.outerjoin(cert, cert.c.domain_id == Domain.id)
+
+# ============================================
+# Sorting
+# ============================================
+SORT_ALIASES = {
+    "domain": "domain_name",
+    "domain_name": "domain_name",
+    "created_at": "created_at",
+    "last_scanned": "last_scanned",
+    "scan_time": "last_scanned",
+    "expiry": "expiry_date",
+    "expiry_date": "expiry_date",
+}
+
+_SORT_PARSERS: Dict[str, Callable[[str], Any]] = {
+    "domain_name": str,
+    "created_at": datetime.fromisoformat,
+    "last_scanned": datetime.fromisoformat,
+    "expiry_date": date.fromisoformat,
+}
+
+def resolve_sort(sort_by: Optional[str], sort_order: Optional[str]) -> Tuple[str, bool]:
+    """
+    Validate sort parameters
+
+    Args:
+        sort_by: Sort field or alias (None = created_at)
+        sort_order: 'asc' or 'desc' (None = desc for created_at, asc otherwise)
+
+    Returns:
+        (canonical sort field, descending)
+
+    Raises:
+        HTTPException: If the field or order is unknown
+    """
+    field = SORT_ALIASES.get(sort_by or "created_at")
+    if not field:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort_by. Allowed: {', '.join(sorted(SORT_ALIASES))}"
+        )
+
+    order = (sort_order or ("desc" if field == "created_at" else "asc")).lower()
+    if order not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid sort_order. Allowed: asc, desc"
+        )
+
+    return field, order == "desc"
+
+def _sort_expression(field: str, cert):
+    """SQL expression for a canonical sort field"""
+    if field == "domain_name":
+        return Domain.domain_name
+    if field == "last_scanned":
+        return func.coalesce(Domain.last_scanned, _NEVER_SCANNED)
+    if field == "expiry_date":
+        return func.coalesce(cert.c.expiry_date, _NO_EXPIRY)
+    return Domain.created_at
+
+# ============================================
+# Keyset Cursor
+# ============================================
+def encode_cursor(field: str, value: Any, domain_id: int) -> str:
+    """Encode the sort key of the last row of a page"""
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    raw = json.dumps([field, value, domain_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, field: str) -> List[Any]:
+    """
+    Decode a page cursor issued for the given sort field
+
+    Raises:
+        HTTPException: If the cursor is malformed or from another sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_field, value, domain_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_field != field:
+            raise ValueError("cursor sort field mismatch")
+        return [_SORT_PARSERS[field](value), int(domain_id)]
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+# ============================================
+# Filtering
+# ============================================
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def suffix_filter(suffix: str):
+    """
+    Match a domain and its subdomains by suffix
+
+    `example.com` matches example.com and *.example.com; a leading `*.`
+    matches subdomains only. Expressed on reverse_labels(domain_name)
+    (com.example...), so idx_domains_name_reversed serves it as a range scan.
+    """
+    suffix = suffix.strip().lower().rstrip(".")
+    subdomains_only = suffix.startswith("*.")
+    suffix = suffix.lstrip("*.")
+    reversed_suffix = ".".join(reversed(suffix.split(".")))
+
+    reversed_name = func.reverse_labels(Domain.domain_name)
+    subdomains = reversed_name.like(_escape_like(reversed_suffix) + ".%")
+    if subdomains_only:
+        return subdomains
+    return or_(reversed_name == reversed_suffix, subdomains)
+
+def domain_filters(
+    cert,
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
+    prefix: Optional[str] = None,
+    suffix: Optional[str] = None,
+    ssl_status: Optional[str] = None,
+    expired_soon: bool = False,
+    expiring_within_days: Optional[int] = None
+) -> list:
+    """
+    Build filter expressions for the domain list
+
+    Certificate filters are served by idx_cert_status_valid_expiry, an
+    index range scan on (is_valid, expiry_date).
+
+    Args:
+        cert: Certificate status table (from certificate_status())
+        is_active: Filter by active flag
+        search: Substring of the domain name (idx_domains_name_trgm)
+        prefix: Start of the domain name (idx_domains_name_pattern)
+        suffix: Parent domain, optionally as *.parent (see suffix_filter())
+        ssl_status: 'VALID' or 'INVALID'
+        expired_soon: Only valid certificates expiring within the window
+        expiring_within_days: Window for expired_soon (default EXPIRING_SOON_DAYS)
+
+    Returns:
+        List of SQLAlchemy filter expressions
+
+    Raises:
+        HTTPException: If ssl_status is unknown
+    """
+    filters = []
+    if is_active is not None:
+        filters.append(Domain.is_active == is_active)
+    if search:
+        filters.append(Domain.domain_name.ilike(f"%{_escape_like(search.strip())}%"))
+    if prefix:
+        filters.append(Domain.domain_name.like(f"{_escape_like(prefix.strip().lower())}%"))
+    if suffix and suffix.strip("*. "):
+        filters.append(suffix_filter(suffix))
+
+    if ssl_status:
+        ssl_status = ssl_status.upper()
+        if ssl_status not in SSL_STATUS_VALUES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid ssl_status. Allowed: {', '.join(SSL_STATUS_VALUES)}"
+            )
+        filters.append(cert.c.is_valid == (ssl_status == "VALID"))
+
+    if expired_soon:
+        days = expiring_within_days if expiring_within_days is not None else EXPIRING_SOON_DAYS
+        horizon = func.current_date() + days
+        filters += [
+            cert.c.is_valid == True,
+            cert.c.expiry_date >= func.current_date(),
+            cert.c.expiry_date <= horizon,
+        ]
+
+    return filters
+
+# ============================================
+# Domain List Query
+# ============================================
+def domain_list_query(
+    cert,
+    filters: list,
+    limit: int,
+    sort_field: str = "created_at",
+    descending: bool = True,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    include_total: bool = False
+) -> Select:
+    """
+    Build the single statement behind GET /api/domains
+
+    Rows are ordered on (sort key, id). With a cursor the page starts
+    strictly after the cursor's key, which is an index range scan for
+    indexed sort keys no matter how deep the page is. `skip` is an
+    OFFSET fallback for clients without cursors.
+
+    Args:
+        cert: Certificate status table (from certificate_status())
+        filters: Filter expressions (from domain_filters())
+        limit: Page size
+        sort_field: Canonical sort field (from resolve_sort())
+        descending: Sort direction
+        cursor: Keyset cursor from a previous page
+        skip: Rows to skip when no cursor is given
+        include_total: Add a `total` column (count of all filtered rows)
+
+    Returns:
+        Select of (Domain, certificate status columns, days_until_expiry,
+        sort_value[, total])
+    """
+    sort_expr = _sort_expression(sort_field, cert)
+    columns = [
+        Domain,
+        cert.c.last_status,
+        cert.c.last_error,
+        cert.c.issuer,
+        cert.c.expiry_date,
+        cert.c.is_valid,
+        cert.c.expiry_bucket,
+        (cert.c.expiry_date - func.current_date()).label("days_until_expiry"),
+        sort_expr.label("sort_value"),
+    ]
+    if include_total:
+        columns.append(func.count().over().label("total"))
+
+    query = _join_certificate(select(*columns), cert)
+    if filters:
+        query = query.where(*filters)
+
+    if cursor:
+        key = tuple_(sort_expr, Domain.id)
+        after = tuple_(*decode_cursor(cursor, sort_field))
+        query = query.where(key < after if descending else key > after)
+    elif skip:
+        query = query.offset(skip)
+
+    if descending:
+        query = query.order_by(sort_expr.desc(), Domain.id.desc())
+    else:
+        query = query.order_by(sort_expr.asc(), Domain.id.asc())
+
+    return query.limit(limit)
+
+def domain_count_query(cert, filters: list) -> Select:
+    """Count of all domains matching the list filters"""
+    query = _join_certificate(select(func.count(Domain.id)).select_from(Domain), cert)
+    if filters:
+        query = query.where(*filters)
+    return query
+
+def domain_export_query(
+    cert,
+    filters: list,
+    sort_field: str = "created_at",
+    descending: bool = True
+) -> Select:
+    """
+    Build the unpaginated statement behind the CSV export
+
+    Args:
+        cert: Certificate status table (from certificate_status())
+        filters: Filter expressions (from domain_filters())
+        sort_field: Canonical sort field (from resolve_sort())
+        descending: Sort direction
+
+    Returns:
+        Select of plain export columns, ordered like the list
+    """
+    sort_expr = _sort_expression(sort_field, cert)
+    query = _join_certificate(
+        select(
+            Domain.id,
+            Domain.domain_name,
+            Domain.description,
+            Domain.is_active,
+            Domain.created_at,
+            Domain.last_scanned,
+            cert.c.last_status,
+            cert.c.last_error,
+            cert.c.common_name,
+            cert.c.issuer,
+            cert.c.fingerprint_sha256,
+            cert.c.issued_date,
+            cert.c.expiry_date,
+            (cert.c.expiry_date - func.current_date()).label("days_until_expiry"),
+            cert.c.is_valid,
+            cert.c.is_self_signed,
+            cert.c.key_size,
+            cert.c.expiry_bucket,
+        ),
+        cert
+    )
+    if filters:
+        query = query.where(*filters)
+
+    if descending:
+        return query.order_by(sort_expr.desc(), Domain.id.desc())
+    return query.order_by(sort_expr.asc(), Domain.id.asc())
@@ -0,0 +1,150 @@
+"""
+Live scan events
+One LISTEN connection per worker, fanned out to every connected SSE client
+"""
+import asyncio
+import logging
+import os
+from typing import Optional, Set
+
+import asyncpg
+
+from backend.database import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY channel -> SSE event name (see publish_results() in the scanner and
+# notify_scan_progress() in init.sql)
+EVENT_CHANNELS = {
+    "scan_results": "results",
+    "scan_progress": "progress",
+}
+
+EVENTS_CLIENT_BUFFER = int(os.getenv("EVENTS_CLIENT_BUFFER", "1000"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+EVENTS_RECONNECT_SECONDS = float(os.getenv("EVENTS_RECONNECT_SECONDS", "5"))
+
+# ============================================
+# Subscriber
+# ============================================
+class Subscriber:
+    """Bounded event buffer of one connected client"""
+
+    def __init__(self, maxsize: int):
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def push(self, frame: bytes) -> bool:
+        """
+        Queue a frame without waiting
+
+        Returns:
+            False if the buffer is full (the client is too slow)
+        """
+        try:
+            self.queue.put_nowait(frame)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def drop(self):
+        """Discard buffered frames and wake the reader with the end marker"""
+        self.dropped = True
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+# ============================================
+# Broker
+# ============================================
+class EventBroker:
+    """Shares one LISTEN connection between all SSE clients of a worker"""
+
+    def __init__(self, client_buffer: int = EVENTS_CLIENT_BUFFER):
+        """
+        Initialize broker
+
+        Args:
+            client_buffer: Frames buffered per client before it is dropped
+        """
+        self.client_buffer = client_buffer
+        self.subscribers: Set[Subscriber] = set()
+        self.conn: Optional[asyncpg.Connection] = None
+        self.lock = asyncio.Lock()
+        self.reconnect_task: Optional[asyncio.Task] = None
+
+    async def subscribe(self) -> Subscriber:
+        """Register a client, starting to listen on first use"""
+        await self._ensure_listening()
+        subscriber = Subscriber(self.client_buffer)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        """Remove a client"""
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: str, data: str):
+        """
+        Fan an event out to all clients
+
+        The frame is encoded once and shared. A client whose buffer is full
+        is dropped instead of blocking the others; its EventSource
+        reconnects and resyncs from the list endpoints.
+        """
+        frame = f"event: {event}\ndata: {data}\n\n".encode()
+        for subscriber in list(self.subscribers):
+            if not subscriber.push(frame):
+                self.subscribers.discard(subscriber)
+                subscriber.drop()
+                logger.warning("⚠️ Dropped slow scan event client")
+
+    async def _ensure_listening(self):
+        """Open the LISTEN connection if it is not open yet"""
+        async with self.lock:
+            if self.conn is not None and not self.conn.is_closed():
+                return
+
+            self.conn = await asyncpg.connect(
+                host=DB_HOST,
+                port=int(DB_PORT),
+                database=DB_NAME,
+                user=DB_USER,
+                password=DB_PASSWORD
+            )
+            self.conn.add_termination_listener(self._on_terminated)
+            for channel in EVENT_CHANNELS:
+                await self.conn.add_listener(channel, self._on_notification)
+            logger.info(f"✅ Listening for scan events on {', '.join(EVENT_CHANNELS)}")
+
+    def _on_notification(self, _conn: asyncpg.Connection, _pid: int, channel: str, payload: str):
+        self.publish(EVENT_CHANNELS[channel], payload)
+
+    def _on_terminated(self, _conn: asyncpg.Connection):
+        logger.warning("⚠️ Scan event connection lost")
+        if self.reconnect_task is None or self.reconnect_task.done():
+            self.reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        """Re-listen while clients are connected (events sent meanwhile are lost)"""
+        while self.subscribers:
+            try:
+                await self._ensure_listening()
+                return
+            except Exception as e:
+                logger.error(f"❌ Scan event reconnect failed: {str(e)}")
+                await asyncio.sleep(EVENTS_RECONNECT_SECONDS)
+
+    async def close(self):
+        """End all client streams and close the LISTEN connection"""
+        for subscriber in list(self.subscribers):
+            subscriber.drop()
+        self.subscribers.clear()
+        if self.reconnect_task:
+            self.reconnect_task.cancel()
+        if self.conn is not None and not self.conn.is_closed():
+            self.conn.remove_termination_listener(self._on_terminated)
+            await self.conn.close()
+        self.conn = None
+
+broker = EventBroker()
@@ -8,13 +8,17 @@ from fastapi.responses import JSONResponse
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
+import asyncio
 import os
 from datetime import datetime, timezone
 import logging
 import uuid
 
+from backend.auth import login_tracker, session_manager
+from backend.auth_state import run_sweeper
 from backend.database import init_db, close_db
-from backend.routes import auth, domains, scan
+from backend.events import broker
+from backend.routes import auth, certificates, dashboard, domains, export, reports, scan
 
 # ============================================
 # Logging Configuration
@@ -178,6 +182,7 @@ async def startup():
     try:
         logger.info("🚀 Starting SSL Monitor Backend...")
         await init_db()
+        app.state.auth_sweeper = asyncio.create_task(run_sweeper(login_tracker, session_manager))
         logger.info("✅ Backend started successfully")
     except Exception as e:
         logger.error(f"❌ Startup failed: {str(e)}")
@@ -188,6 +193,9 @@ async def shutdown():
     """Cleanup on shutdown"""
     try:
         logger.info("🔄 Shutting down SSL Monitor Backend...")
+        await broker.close()
+        app.state.auth_sweeper.cancel()
+        await session_manager.flush()
         await close_db()
         logger.info("✅ Backend shutdown complete")
     except Exception as e:
@@ -230,6 +238,10 @@ async def readiness_probe():
 # ============================================
 app.include_router(auth.router)
 app.include_router(domains.router)
+app.include_router(certificates.router)
+app.include_router(dashboard.router)
+app.include_router(export.router)
+app.include_router(reports.router)
 app.include_router(scan.router)
 
 # ============================================
@@ -1,8 +1,9 @@
 """
 SQLAlchemy ORM models for SSL Monitor
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, Boolean, Date, DateTime, Text, ForeignKey, JSON, Float
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -50,6 +51,25 @@ class UserSession(Base):
     # Relationships
     user = relationship("User", back_populates="sessions")
 
+# ============================================
+# Token Revocation Models
+# ============================================
+class RevokedToken(Base):
+    """Access token revoked before its expiry (e.g. by logout)"""
+    __tablename__ = "revoked_tokens"
+    
+    token_hash = Column(String(64), primary_key=True)  # sha256 hex of the JWT
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class AuthRevocationState(Base):
+    """Revocation counter shared by all workers (single row, bumped by trigger)"""
+    __tablename__ = "auth_revocation_state"
+    
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(BigInteger, default=0, nullable=False)
+
 # ============================================
 # Domain Model
 # ============================================
@@ -81,13 +101,13 @@ class SSLCertificate(Base):
     __tablename__ = "ssl_certificates"
     
     id = Column(Integer, primary_key=True, index=True)
-    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), nullable=False)
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), nullable=False, unique=True)
     common_name = Column(String(255), nullable=True)
-    subject_alt_names = Column(Text, nullable=True)
+    subject_alt_names = Column(ARRAY(Text), default=list, nullable=False)
     issuer = Column(String(255), nullable=True)
     serial_number = Column(String(100), nullable=True)
-    issued_date = Column(DateTime, nullable=True)
-    expiry_date = Column(DateTime, nullable=False, index=True)
+    issued_date = Column(Date, nullable=True)
+    expiry_date = Column(Date, nullable=False, index=True)
     is_self_signed = Column(Boolean, default=False)
     is_valid = Column(Boolean, default=True, index=True)
     certificate_pem = Column(Text, nullable=True)
@@ -99,26 +119,173 @@ class SSLCertificate(Base):
     # Relationships
     domain = relationship("Domain", back_populates="certificates")
 
+# ============================================
+# Certificate Inventory Model
+# ============================================
+class CertificateInventory(Base):
+    """Current certificates per issuer / key size / signature algorithm (maintained by triggers)"""
+    __tablename__ = "certificate_inventory"
+    
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String(255), primary_key=True)
+    certificates = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# ============================================
+# Certificate Store Models
+# ============================================
+class Certificate(Base):
+    """Distinct certificate, stored once per fingerprint"""
+    __tablename__ = "certificates"
+    
+    fingerprint_sha256 = Column(String(64), primary_key=True)
+    common_name = Column(String(255), nullable=True)
+    subject_alt_names = Column(ARRAY(Text), default=list, nullable=False)
+    issuer = Column(String(255), nullable=True)
+    serial_number = Column(String(100), nullable=True)
+    issued_date = Column(Date, nullable=True)
+    expiry_date = Column(Date, nullable=False)
+    is_self_signed = Column(Boolean, default=False)
+    key_size = Column(Integer, nullable=True)
+    signature_algorithm = Column(String(100), nullable=True)
+    first_seen_at = Column(DateTime, default=datetime.utcnow)
+
+class DomainCertificateHistory(Base):
+    """Period during which a domain served one certificate"""
+    __tablename__ = "domain_certificate_history"
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), nullable=False)
+    fingerprint_sha256 = Column(String(64), ForeignKey("certificates.fingerprint_sha256"), nullable=False)
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    
+    # Relationships
+    certificate = relationship("Certificate")
+
+# ============================================
+# Domain Certificate Status Model
+# ============================================
+class DomainCertStatus(Base):
+    """Latest certificate and scan outcome per domain (maintained by the scanner)"""
+    __tablename__ = "domain_cert_status"
+    
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), primary_key=True)
+    is_active = Column(Boolean, default=True, nullable=False)
+    last_status = Column(String(20), nullable=False)
+    last_error = Column(Text, nullable=True)
+    common_name = Column(String(255), nullable=True)
+    issuer = Column(String(255), nullable=True)
+    fingerprint_sha256 = Column(String(64), nullable=True)
+    issued_date = Column(Date, nullable=True)
+    expiry_date = Column(Date, nullable=True)
+    is_valid = Column(Boolean, nullable=True)
+    is_self_signed = Column(Boolean, nullable=True)
+    key_size = Column(Integer, nullable=True)
+    expiry_bucket = Column(String(10), default="none", nullable=False)
+    last_scanned_at = Column(DateTime, nullable=False)
+    last_success_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# ============================================
+# Dashboard Counters Model
+# ============================================
+class DashboardCounters(Base):
+    """Fleet totals for the dashboard (single row, maintained by triggers)"""
+    __tablename__ = "dashboard_counters"
+    
+    id = Column(Integer, primary_key=True, default=1)
+    total_domains = Column(BigInteger, default=0, nullable=False)
+    ssl_valid_count = Column(BigInteger, default=0, nullable=False)
+    expired_soon_count = Column(BigInteger, default=0, nullable=False)
+    failed_count = Column(BigInteger, default=0, nullable=False)
+    last_scan_time = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+# ============================================
+# Fleet Daily Stats Model
+# ============================================
+class FleetDailyStats(Base):
+    """Active domains per day by health, issuer and key size class (maintained by triggers)"""
+    __tablename__ = "fleet_daily_stats"
+    
+    day = Column(Date, primary_key=True)
+    health = Column(String(10), primary_key=True)
+    issuer = Column(String(255), primary_key=True, default="")
+    key_size_class = Column(String(10), primary_key=True)
+    domains = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
 # ============================================
 # Scan Result Model
 # ============================================
 class ScanResult(Base):
-    """Scan result model"""
+    """Scan result model (partitioned by month on started_at)"""
     __tablename__ = "scan_results"
     
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), nullable=False)
     scan_type = Column(String(50), nullable=False)
-    status = Column(String(20), nullable=False, index=True)
+    status = Column(String(20), nullable=False)
     result_data = Column(JSON, nullable=True)
     error_message = Column(Text, nullable=True)
-    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
     completed_at = Column(DateTime, nullable=True)
     duration_seconds = Column(Integer, nullable=True)
     
     # Relationships
     domain = relationship("Domain", back_populates="scan_results")
 
+# ============================================
+# Scan Result Daily Rollup Model
+# ============================================
+class ScanResultDaily(Base):
+    """Per-domain daily summary of compacted scan results"""
+    __tablename__ = "scan_results_daily"
+    
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    scan_count = Column(Integer, default=0, nullable=False)
+    success_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    min_days_until_expiry = Column(Integer, nullable=True)
+    last_status = Column(String(20), nullable=True)
+    first_scan_at = Column(DateTime, nullable=True)
+    last_scan_at = Column(DateTime, nullable=True)
+
+# ============================================
+# Scan Run Model
+# ============================================
+class ScanRun(Base):
+    """Scan run (sweep) progress model"""
+    __tablename__ = "scan_runs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String(20), default="scanner", nullable=False)
+    status = Column(String(20), default="running", nullable=False, index=True)
+    total_domains = Column(Integer, default=0, nullable=False)
+    completed_count = Column(Integer, default=0, nullable=False)
+    success_count = Column(Integer, default=0, nullable=False)
+    failed_count = Column(Integer, default=0, nullable=False)
+    domains_per_second = Column(Float, nullable=True)
+    eta_seconds = Column(Integer, nullable=True)
+    error_message = Column(Text, nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+# ============================================
+# Scan Queue Model
+# ============================================
+class ScanQueue(Base):
+    """Domain requested for scanning ahead of the regular sweep"""
+    __tablename__ = "scan_queue"
+    
+    domain_id = Column(Integer, ForeignKey("domains.id", ondelete="CASCADE"), primary_key=True)
+    priority = Column(SmallInteger, default=0, nullable=False)
+    requested_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    requested_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
 # ============================================
 # Alert Model
 # ============================================
@@ -132,7 +299,7 @@ class Alert(Base):
     severity = Column(String(20), default="medium", nullable=False)
     title = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    is_resolved = Column(Boolean, default=False, index=True)
+    is_resolved = Column(Boolean, default=False, nullable=False, index=True)
     resolved_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     
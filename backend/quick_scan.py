@@ -0,0 +1,95 @@
+"""
+On-demand certificate checks
+Single handshakes for the API, deduplicated and briefly cached per host
+"""
+import asyncio
+import logging
+import os
+import ssl
+import time
+from typing import Dict, Tuple
+
+from backend.cache import TTLCache
+from scanner.engine import fetch_der_certificate, parse_certificate
+
+logger = logging.getLogger(__name__)
+
+QUICK_SCAN_TIMEOUT = float(os.getenv("QUICK_SCAN_TIMEOUT", "10"))
+QUICK_SCAN_CACHE_SECONDS = float(os.getenv("QUICK_SCAN_CACHE_SECONDS", "30"))
+QUICK_SCAN_VERIFY_SSL = os.getenv("SCANNER_VERIFY_SSL", "false").lower() == "true"
+# Ports the API may connect to; anything else is rejected before a socket is opened
+QUICK_SCAN_PORTS = frozenset(
+    int(port) for port in os.getenv("QUICK_SCAN_PORTS", "443").split(",") if port.strip()
+)
+# Returned for every failure: the cause (refused, timed out, TLS alert) stays in the
+# log so the endpoint cannot be used to probe which ports answer on a host
+SCAN_FAILED_ERROR = "Could not retrieve certificate"
+
+# (host, port) -> (monotonic time of the scan, result)
+scan_cache = TTLCache(ttl=QUICK_SCAN_CACHE_SECONDS, maxsize=1024)
+# (host, port) -> handshake in progress, shared by concurrent callers
+in_flight: Dict[Tuple[str, int], asyncio.Task] = {}
+
+async def _handshake(host: str, port: int) -> Dict:
+    """
+    Fetch and parse one certificate within QUICK_SCAN_TIMEOUT
+
+    Failures are returned as results (like the scanner's), so they are
+    cached too and an unreachable host is not retried on every refresh.
+    The reason is logged, the result only carries SCAN_FAILED_ERROR.
+    """
+    try:
+        der_cert = await asyncio.wait_for(
+            fetch_der_certificate(host, port, timeout=QUICK_SCAN_TIMEOUT, verify=QUICK_SCAN_VERIFY_SSL),
+            timeout=QUICK_SCAN_TIMEOUT
+        )
+        if not der_cert:
+            reason = "no certificate found"
+        else:
+            return parse_certificate(der_cert, host)
+    except (asyncio.TimeoutError, TimeoutError):
+        reason = f"timeout after {QUICK_SCAN_TIMEOUT:g}s"
+    except ssl.SSLError as e:
+        reason = f"SSL error: {str(e)}"
+    except OSError as e:
+        reason = f"connection error: {str(e)}"
+    except Exception as e:
+        reason = f"unexpected error: {str(e)}"
+
+    logger.warning(f"⚠️  Quick scan of {host}:{port} failed: {reason}")
+    return {"status": "failed", "error": SCAN_FAILED_ERROR}
+
+async def _scan_and_cache(key: Tuple[str, int]) -> Tuple[float, Dict]:
+    try:
+        result = await _handshake(*key)
+        entry = (time.monotonic(), result)
+        scan_cache.set(key, entry)
+        return entry
+    finally:
+        in_flight.pop(key, None)
+
+async def quick_scan(host: str, port: int = 443) -> Tuple[Dict, float, bool]:
+    """
+    Scan one host now, or reuse a recent or running scan of it
+
+    Args:
+        host: Normalized host name
+        port: TLS port
+
+    Returns:
+        (result, age in seconds, whether another request's scan was reused)
+    """
+    key = (host, port)
+    entry = scan_cache.get(key)
+    if entry is not None:
+        scanned_at, result = entry
+        return result, time.monotonic() - scanned_at, True
+
+    task = in_flight.get(key)
+    shared = task is not None
+    if task is None:
+        task = in_flight[key] = asyncio.create_task(_scan_and_cache(key))
+
+    # A caller that disconnects must not cancel the handshake for the others
+    scanned_at, result = await asyncio.shield(task)
+    return result, time.monotonic() - scanned_at, shared
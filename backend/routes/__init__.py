@@ -1,6 +1,6 @@
 """
 Backend API routes
 """
-from backend.routes import auth, domains, scan
+from backend.routes import auth, certificates, dashboard, domains, export, reports, scan
 
-__all__ = ["auth", "domains", "scan"]
+__all__ = ["auth", "certificates", "dashboard", "domains", "export", "reports", "scan"]
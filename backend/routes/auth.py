@@ -2,18 +2,23 @@
 Authentication routes for SSL Monitor
 """
 from fastapi import APIRouter, HTTPException, status, Request, Depends
+from fastapi.security import HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timezone
+from datetime import datetime
 import logging
 
 from backend.auth import (
-    hash_password,
-    verify_password,
+    verify_password_async,
     create_access_token,
     create_refresh_token,
-    verify_token,
+    verify_refresh_token,
+    is_revoked,
+    get_current_user,
+    revoke_token,
+    bearer_scheme,
+    token_hash,
     session_manager,
     login_tracker
 )
@@ -68,7 +73,7 @@ async def login(
     identifier = f"{credentials.username}:{client_ip}"
     
     # Check if locked out
-    if login_tracker.is_locked_out(identifier):
+    if await login_tracker.is_locked_out(identifier):
         logger.warning(f"❌ Login attempt from locked account: {identifier}")
         raise HTTPException(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
@@ -85,16 +90,17 @@ async def login(
         user = result.scalars().first()
         
         if not user:
-            login_tracker.record_attempt(identifier, success=False)
+            await login_tracker.record_attempt(identifier, success=False)
             logger.warning(f"❌ Login failed - user not found: {credentials.username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
             )
         
-        # Verify password
-        if not verify_password(credentials.password, user.password_hash):
-            login_tracker.record_attempt(identifier, success=False)
+        # Verify password (bcrypt runs on the hashing pool, not the event loop)
+        password_ok, new_hash = await verify_password_async(credentials.password, user.password_hash)
+        if not password_ok:
+            await login_tracker.record_attempt(identifier, success=False)
             logger.warning(f"❌ Login failed - wrong password: {credentials.username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -110,21 +116,28 @@ async def login(
             )
         
         # Record successful attempt
-        login_tracker.record_attempt(identifier, success=True)
+        await login_tracker.record_attempt(identifier, success=True)
         
         # Create tokens
         token_data = create_access_token(user.id, user.username, user.role)
         refresh_token = create_refresh_token(user.id, user.username)
         
         # Create session
-        session_id = session_manager.create_session(
+        await session_manager.create_session(
             user.id,
             user.username,
-            token_data["access_token"]
+            token_hash(token_data["access_token"]),
+            ip_address=client_ip,
+            user_agent=request.headers.get("user-agent")
         )
         
-        # Update last login
-        user.last_login = datetime.now(timezone.utc)
+        # Upgrade the stored hash if the bcrypt settings changed (PASSWORD_REHASH)
+        if new_hash:
+            user.password_hash = new_hash
+            logger.info(f"🔄 Password re-hashed for user: {credentials.username}")
+        
+        # Update last login (naive UTC, like the column)
+        user.last_login = datetime.utcnow()
         db.add(user)
         await db.commit()
         
@@ -154,23 +167,13 @@ async def login(
 
 @router.post("/logout")
 async def logout(
-    request: Request,
-    current_user: dict = Depends(verify_token)
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """Logout endpoint"""
+    """Logout endpoint (revokes the access token on all workers)"""
     try:
-        # Get session from request
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Missing token"
-            )
-        
-        token = auth_header.split(" ")[1]
-        
-        # Invalidate session
-        # You would need to store sessions in database/cache
+        await revoke_token(credentials.credentials, current_user, db)
         
         logger.info(f"✅ User logged out: {current_user['username']}")
         
@@ -184,23 +187,48 @@ async def logout(
         )
 
 @router.post("/refresh")
-async def refresh(request: RefreshTokenRequest):
-    """Refresh access token"""
+async def refresh(
+    request: RefreshTokenRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Refresh access token
+
+    Only refresh tokens are accepted, never access tokens, and revoked
+    tokens are refused. The role comes from the user's current record.
+    """
     try:
         # Verify refresh token
-        payload = verify_token(request.refresh_token)
-        
+        payload = verify_refresh_token(request.refresh_token)
+
+        if await is_revoked(request.refresh_token, db):
+            logger.warning(f"❌ Revoked refresh token used by: {payload['username']}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+
+        from backend.models import User
+
+        user = (await db.execute(
+            select(User).where(User.id == payload["user_id"])
+        )).scalars().first()
+        if not user or not user.is_active:
+            logger.warning(f"❌ Token refresh for missing or disabled user: {payload['username']}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token refresh failed"
+            )
+
         # Create new access token
-        token_data = create_access_token(
-            payload["user_id"],
-            payload["username"],
-            payload["role"]
-        )
+        token_data = create_access_token(user.id, user.username, user.role)
         
-        logger.info(f"✅ Token refreshed for user: {payload['username']}")
+        logger.info(f"✅ Token refreshed for user: {user.username}")
         
         return token_data
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Token refresh failed: {str(e)}")
         raise HTTPException(
@@ -209,8 +237,8 @@ async def refresh(request: RefreshTokenRequest):
         )
 
 @router.get("/me")
-async def get_current_user(
-    current_user: dict = Depends(verify_token),
+async def get_me(
+    current_user: dict = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
     """Get current user info"""
@@ -0,0 +1,139 @@
+"""
+Certificate routes
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Dict, List, Optional
+import logging
+
+from backend.database import get_db
+from backend.models import Domain, SSLCertificate
+from backend.auth import get_current_user
+from backend.domain_names import normalize_domain
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/certificates", tags=["certificates"])
+
+# ============================================
+# Response Models
+# ============================================
+class CoveredDomain(BaseModel):
+    """Domain currently serving a covering certificate"""
+    id: int
+    domain_name: str
+    is_active: bool
+
+class CoveringCertificate(BaseModel):
+    """Certificate whose SANs cover the requested host"""
+    fingerprint_sha256: Optional[str]
+    common_name: Optional[str]
+    issuer: Optional[str]
+    expiry_date: date
+    matched_names: List[str]
+    domains: List[CoveredDomain]
+
+class CoveringResponse(BaseModel):
+    """Coverage lookup result"""
+    host: str
+    names: List[str]  # SAN values searched for
+    certificates: List[CoveringCertificate]
+    truncated: bool
+
+def covering_names(host: str) -> List[str]:
+    """
+    SAN values that cover a host
+
+    A certificate covers api.example.com if it lists the name itself or
+    the wildcard *.example.com (wildcards span exactly one label).
+    A wildcard host is only matched literally.
+    """
+    names = [host]
+    labels = host.split(".")
+    if not host.startswith("*.") and len(labels) > 2:
+        names.append("*." + ".".join(labels[1:]))
+    return names
+
+# ============================================
+# Routes
+# ============================================
+
+@router.get("/covering", response_model=CoveringResponse)
+async def get_covering_certificates(
+    host: str = Query(..., min_length=1, max_length=253),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Find the current certificates that cover a host, grouped by fingerprint
+
+    Lists every domain serving each certificate, e.g. all domains that
+    must be redeployed when a shared or wildcard certificate is rotated.
+    Uses the GIN index on subject_alt_names (array overlap).
+    """
+    host = host.strip().lower()
+    wildcard = host.startswith("*.")
+    name = normalize_domain(host[2:] if wildcard else host)
+    if not name:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid host"
+        )
+
+    try:
+        names = covering_names(f"*.{name}" if wildcard else name)
+        stmt = (
+            select(
+                SSLCertificate.fingerprint_sha256,
+                SSLCertificate.common_name,
+                SSLCertificate.issuer,
+                SSLCertificate.expiry_date,
+                SSLCertificate.subject_alt_names,
+                Domain.id,
+                Domain.domain_name,
+                Domain.is_active
+            )
+            .join(Domain, Domain.id == SSLCertificate.domain_id)
+            .where(SSLCertificate.subject_alt_names.overlap(names))
+            .order_by(SSLCertificate.fingerprint_sha256, Domain.domain_name)
+            .limit(limit + 1)
+        )
+        rows = (await db.execute(stmt)).all()
+        truncated = len(rows) > limit
+
+        certificates: Dict[Optional[str], CoveringCertificate] = {}
+        for row in rows[:limit]:
+            cert = certificates.get(row.fingerprint_sha256)
+            if cert is None:
+                cert = certificates[row.fingerprint_sha256] = CoveringCertificate(
+                    fingerprint_sha256=row.fingerprint_sha256,
+                    common_name=row.common_name,
+                    issuer=row.issuer,
+                    expiry_date=row.expiry_date,
+                    matched_names=[san for san in names if san in row.subject_alt_names],
+                    domains=[]
+                )
+            cert.domains.append(CoveredDomain(
+                id=row.id,
+                domain_name=row.domain_name,
+                is_active=row.is_active
+            ))
+
+        logger.info(f"✅ Coverage lookup for {host}: {len(certificates)} certificates, {len(rows[:limit])} domains")
+
+        return CoveringResponse(
+            host=names[0],
+            names=names,
+            certificates=list(certificates.values()),
+            truncated=truncated
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Coverage lookup error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to look up covering certificates"
+        )
@@ -0,0 +1,83 @@
+"""
+Dashboard routes
+"""
+from fastapi import APIRouter, HTTPException, status, Depends
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Optional
+import logging
+import os
+
+from backend.database import get_db
+from backend.models import DashboardCounters
+from backend.auth import get_current_user
+from backend.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
+
+DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "5"))
+
+summary_cache = TTLCache(ttl=DASHBOARD_CACHE_TTL, maxsize=1)
+
+# ============================================
+# Response Models
+# ============================================
+class DashboardSummaryResponse(BaseModel):
+    """Dashboard summary response"""
+    total_domains: int
+    ssl_valid_count: int
+    expired_soon_count: int
+    failed_count: int
+    last_scan_time: Optional[datetime]
+    updated_at: Optional[datetime]
+
+# ============================================
+# Routes
+# ============================================
+
+@router.get("/summary", response_model=DashboardSummaryResponse)
+async def get_dashboard_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get fleet totals for the dashboard
+
+    Reads the single dashboard_counters row, which triggers keep current
+    as domains and scan results change. Responses are cached per worker
+    for DASHBOARD_CACHE_TTL seconds.
+    """
+    summary = summary_cache.get("summary")
+    if summary is not None:
+        return summary
+
+    try:
+        counters = await db.get(DashboardCounters, 1)
+        if not counters:
+            counters = DashboardCounters(
+                total_domains=0,
+                ssl_valid_count=0,
+                expired_soon_count=0,
+                failed_count=0
+            )
+
+        summary = DashboardSummaryResponse(
+            total_domains=counters.total_domains,
+            ssl_valid_count=counters.ssl_valid_count,
+            expired_soon_count=counters.expired_soon_count,
+            failed_count=counters.failed_count,
+            last_scan_time=counters.last_scan_time,
+            updated_at=counters.updated_at
+        )
+        summary_cache.set("summary", summary)
+
+        return summary
+
+    except Exception as e:
+        logger.error(f"❌ Get dashboard summary error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get dashboard summary"
+        )
@@ -3,20 +3,33 @@ Domain management routes
 """
 from fastapi import APIRouter, HTTPException, status, Request, Depends, Query
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, update, any_, bindparam, Integer, String
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timezone
-from typing import Optional, List
+from datetime import date, datetime, timezone
+from typing import Dict, Optional, List
+import codecs
 import logging
-import re
-
-from backend.database import get_db
-from backend.models import Domain, SSLCertificate
-from backend.auth import verify_token
+import os
+
+from backend.database import get_db, raw_connection
+from backend.models import Domain, DomainCertStatus, AuditLog, Certificate, DomainCertificateHistory
+from backend.auth import get_current_user
+from backend.domain_names import normalize_domain, DomainImport
+from backend.domain_queries import (
+    certificate_status,
+    domain_filters,
+    domain_list_query,
+    domain_count_query,
+    resolve_sort,
+    encode_cursor
+)
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/domains", tags=["domains"])
 
+BULK_IMPORT_MAX_DOMAINS = int(os.getenv("BULK_IMPORT_MAX_DOMAINS", "500000"))
+
 # ============================================
 # Request/Response Models
 # ============================================
@@ -28,11 +41,10 @@ class DomainCreate(BaseModel):
     @validator('domain_name')
     def validate_domain_name(cls, v):
         """Validate domain name format"""
-        # Basic domain name validation
-        pattern = r'^([a-zA-Z0-9](-?[a-zA-Z0-9])*\.)+[a-zA-Z]{2,}$'
-        if not re.match(pattern, v):
+        name = normalize_domain(v)  # Lowercase, IDNA-encoded
+        if not name:
             raise ValueError('Invalid domain name format')
-        return v.lower()  # Store lowercase
+        return name
 
     class Config:
         json_schema_extra = {
@@ -60,10 +72,191 @@ class DomainResponse(BaseModel):
 
     # Certificate info if available
     certificate: Optional[dict] = None
+    last_scan_status: Optional[str] = None
+    last_scan_error: Optional[str] = None
 
     class Config:
         from_attributes = True
 
+class BulkImportResponse(BaseModel):
+    """Bulk import result"""
+    added: int
+    duplicates: int  # repeated in the input or already present
+    invalid: int
+    invalid_samples: List[str]
+
+class BulkDomainIds(BaseModel):
+    """Bulk operation by domain ID"""
+    domain_ids: List[int] = Field(..., min_length=1, max_length=BULK_IMPORT_MAX_DOMAINS)
+
+class BulkDomainNames(BaseModel):
+    """Bulk operation by domain name"""
+    domains: List[str] = Field(..., min_length=1, max_length=BULK_IMPORT_MAX_DOMAINS)
+
+class BulkReactivateRequest(BaseModel):
+    """Bulk reactivation by domain ID and/or name"""
+    domain_ids: List[int] = Field(default_factory=list, max_length=BULK_IMPORT_MAX_DOMAINS)
+    domains: List[str] = Field(default_factory=list, max_length=BULK_IMPORT_MAX_DOMAINS)
+
+class BulkUpdateResponse(BaseModel):
+    """Bulk status change result"""
+    requested: int
+    affected: int  # domains whose status changed
+    unchanged: int  # unknown, or already in the requested state
+    invalid: int = 0  # malformed names (by-name requests only)
+    unchanged_names: List[str] = []  # valid names left unchanged (by-name requests only)
+
+class CertificatePeriod(BaseModel):
+    """Certificate served by a domain between first_seen and last_seen"""
+    fingerprint_sha256: str
+    first_seen: datetime
+    last_seen: datetime
+    common_name: Optional[str]
+    subject_alt_names: List[str]
+    issuer: Optional[str]
+    serial_number: Optional[str]
+    issued_date: Optional[date]
+    expiry_date: date
+    is_self_signed: Optional[bool]
+    key_size: Optional[int]
+    signature_algorithm: Optional[str]
+
+# ============================================
+# Bulk Status Helpers
+# ============================================
+def _require_admin(current_user: dict, action: str):
+    """Reject non-admin users"""
+    if current_user["role"] != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Only admins can {action} domains"
+        )
+
+async def _set_active(
+    db: AsyncSession,
+    is_active: bool,
+    domain_ids: Optional[List[int]] = None,
+    names: Optional[List[str]] = None
+) -> Dict[int, str]:
+    """
+    Flip is_active for many domains in one statement
+
+    The rows are locked in ID order first, like the scanner's ResultWriter
+    does, so a bulk change and a concurrent result batch (both also touch
+    domain_cert_status, here through sync_cert_status_active) cannot
+    deadlock.
+
+    Args:
+        db: Database session
+        is_active: Target state
+        domain_ids: Domains to change by ID
+        names: Domains to change by normalized name
+
+    Returns:
+        Names of the domains whose state actually changed, by ID
+    """
+    targets = []
+    if domain_ids:
+        targets.append(Domain.id == any_(bindparam("ids", domain_ids, type_=ARRAY(Integer))))
+    if names:
+        targets.append(Domain.domain_name == any_(bindparam("names", names, type_=ARRAY(String))))
+    if not targets:
+        return {}
+
+    match = targets[0] if len(targets) == 1 else (targets[0] | targets[1])
+    await db.execute(
+        select(Domain.id)
+        .where(match, Domain.is_active != is_active)
+        .order_by(Domain.id)
+        .with_for_update(key_share=True)
+    )
+    stmt = (
+        update(Domain)
+        .where(match, Domain.is_active != is_active)
+        .values(is_active=is_active)
+        .returning(Domain.id, Domain.domain_name)
+        .execution_options(synchronize_session=False)
+    )
+    result = await db.execute(stmt)
+    return {row[0]: row[1] for row in result}
+
+def _audit_bulk(
+    db: AsyncSession,
+    request: Request,
+    current_user: dict,
+    action: str,
+    changed: Dict[int, str],
+    **details
+):
+    """Record one audit entry for a whole bulk operation"""
+    db.add(AuditLog(
+        user_id=current_user["user_id"],
+        action=action,
+        resource_type="domain",
+        new_values={"domain_ids": list(changed), "affected": len(changed), **details},
+        ip_address=request.client.host if request.client else None,
+        user_agent=request.headers.get("user-agent")
+    ))
+
+def _normalize_names(raw_names: List[str]) -> tuple:
+    """Normalize names, returning (unique valid names, invalid count)"""
+    names, invalid = set(), 0
+    for raw in raw_names:
+        name = normalize_domain(raw)
+        if name:
+            names.add(name)
+        else:
+            invalid += 1
+    return list(names), invalid
+
+# ============================================
+# Bulk Import Helpers
+# ============================================
+async def _read_domain_lines(request: Request, domain_import: DomainImport):
+    """Feed a streamed text/CSV body into the import chunk by chunk"""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    async for chunk in request.stream():
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        domain_import.add_lines(lines)
+
+    domain_import.add_lines([pending + decoder.decode(b"", final=True)])
+
+async def _insert_domains(names, created_by: int) -> int:
+    """
+    Insert new domains through a COPY-loaded staging table
+
+    Args:
+        names: Normalized, unique domain names
+        created_by: User ID recorded on new rows
+
+    Returns:
+        Number of domains actually inserted (existing names are skipped)
+    """
+    async with raw_connection() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                "CREATE TEMP TABLE domain_import (domain_name VARCHAR(253)) ON COMMIT DROP"
+            )
+            await conn.copy_records_to_table(
+                "domain_import",
+                records=((name,) for name in names),
+                columns=["domain_name"]
+            )
+            result = await conn.execute(
+                """
+                INSERT INTO domains (domain_name, created_by, is_active)
+                SELECT domain_name, $1, true FROM domain_import
+                ORDER BY domain_name
+                ON CONFLICT (domain_name) DO NOTHING
+                """,
+                created_by
+            )
+
+    # Command tag: "INSERT 0 <rows>"
+    return int(result.split()[-1])
+
 # ============================================
 # Routes
 # ============================================
@@ -72,50 +265,75 @@ class DomainResponse(BaseModel):
 async def get_domains(
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token),
+    current_user: dict = Depends(get_current_user),
     skip: int = Query(0, ge=0),
     limit: int = Query(25, ge=1, le=100),
+    page: Optional[int] = Query(None, ge=1),
+    per_page: Optional[int] = Query(None, ge=1, le=100),
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
     is_active: Optional[bool] = None,
-    search: Optional[str] = None
+    search: Optional[str] = None,
+    prefix: Optional[str] = None,
+    suffix: Optional[str] = None,
+    ssl_status: Optional[str] = None,
+    expired_soon: bool = False,
+    expiring_within_days: Optional[int] = Query(None, ge=0, le=3650),
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = None
 ):
     """
-    Get all domains with pagination and filtering
+    Get all domains with pagination, filtering and sorting
+
+    Pass `next_cursor` from the previous page as `cursor` for keyset
+    pagination (constant cost at any depth); `skip` (or `page`/`per_page`)
+    remains as an OFFSET fallback. The total is computed on offset pages
+    by default and on cursor pages only with `include_total=true`.
+
+    `search` matches a substring, `prefix` the start of the name and
+    `suffix` a parent domain (`example.com`, or `*.example.com` for
+    subdomains only); each is served by its own index.
     """
     try:
-        # Build query
-        query = select(Domain)
-        count_query = select(func.count(Domain.id))
-
-        # Apply filters
-        filters = []
-        if is_active is not None:
-            filters.append(Domain.is_active == is_active)
-        if search:
-            filters.append(Domain.domain_name.ilike(f"%{search}%"))
-
-        if filters:
-            query = query.where(and_(*filters))
-            count_query = count_query.where(and_(*filters))
-
-        # Get total count
-        total_result = await db.execute(count_query)
-        total = total_result.scalar()
-
-        # Get domains with pagination
-        query = query.order_by(Domain.created_at.desc()).offset(skip).limit(limit)
+        if per_page is not None:
+            limit = per_page
+        if page is not None:
+            skip = (page - 1) * limit
+
+        sort_field, descending = resolve_sort(sort_by, sort_order)
+        cert = certificate_status()
+        filters = domain_filters(
+            cert,
+            is_active=is_active,
+            search=search,
+            prefix=prefix,
+            suffix=suffix,
+            ssl_status=ssl_status,
+            expired_soon=expired_soon,
+            expiring_within_days=expiring_within_days
+        )
+
+        if include_total is None:
+            include_total = cursor is None
+        with_total = include_total and cursor is None
+
+        query = domain_list_query(
+            cert,
+            filters,
+            limit,
+            sort_field=sort_field,
+            descending=descending,
+            cursor=cursor,
+            skip=skip,
+            include_total=with_total
+        )
         result = await db.execute(query)
-        domains = result.scalars().all()
+        rows = result.all()
 
-        # Get certificates for domains
         domain_data = []
-        for domain in domains:
-            cert_query = select(SSLCertificate).where(
-                SSLCertificate.domain_id == domain.id
-            ).order_by(SSLCertificate.scanned_at.desc()).limit(1)
-            cert_result = await db.execute(cert_query)
-            cert = cert_result.scalars().first()
-
-            domain_dict = {
+        for row in rows:
+            domain = row.Domain
+            domain_data.append({
                 "id": domain.id,
                 "domain_name": domain.domain_name,
                 "description": domain.description,
@@ -125,24 +343,46 @@ async def get_domains(
                 "created_at": domain.created_at.isoformat(),
                 "updated_at": domain.updated_at.isoformat(),
                 "certificate": {
-                    "expiry_date": cert.expiry_date.isoformat() if cert else None,
-                    "is_valid": cert.is_valid if cert else None,
-                    "days_until_expiry": (cert.expiry_date - datetime.now(timezone.utc)).days if cert and cert.expiry_date else None,
-                } if cert else None
-            }
-            domain_data.append(domain_dict)
-
-        logger.info(f"✅ Retrieved {len(domains)} domains (total: {total})")
+                    "issuer": row.issuer,
+                    "expiry_date": row.expiry_date.isoformat(),
+                    "is_valid": row.is_valid,
+                    "days_until_expiry": row.days_until_expiry,
+                    "expiry_bucket": row.expiry_bucket,
+                } if row.expiry_date else None,
+                "last_scan_status": row.last_status,
+                "last_scan_error": row.last_error
+            })
+
+        total = None
+        if with_total and rows:
+            total = rows[0].total
+        elif with_total and skip == 0:
+            total = 0
+        elif include_total:
+            # Cursor page, or offset past the end where the window count
+            # has no row to ride on
+            total = (await db.execute(domain_count_query(cert, filters))).scalar()
+
+        next_cursor = None
+        if len(rows) == limit:
+            next_cursor = encode_cursor(sort_field, rows[-1].sort_value, rows[-1].Domain.id)
+
+        logger.info(f"✅ Retrieved {len(rows)} domains (total: {total})")
 
         return {
             "data": domain_data,
             "total": total,
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor,
+            "sort_by": sort_field,
+            "sort_order": "desc" if descending else "asc",
             "page": (skip // limit) + 1 if limit > 0 else 1,
-            "pages": (total + limit - 1) // limit if limit > 0 else 1
+            "pages": (total + limit - 1) // limit if limit > 0 and total is not None else None
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Get domains error: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -155,7 +395,7 @@ async def create_domain(
     request: Request,
     domain: DomainCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Create new domain
@@ -197,11 +437,200 @@ async def create_domain(
             detail="Failed to create domain"
         )
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_domains(
+    request: Request,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Bulk import domains
+
+    Accepts JSON (`{"domains": [...]}` or a bare array) or a streamed
+    text/plain or text/csv upload with one domain per line (first CSV
+    column). Names are IDNA-normalized, validated and deduplicated in
+    memory, then loaded with COPY and inserted with ON CONFLICT DO NOTHING.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    domain_import = DomainImport(max_domains=BULK_IMPORT_MAX_DOMAINS)
+
+    try:
+        if content_type == "application/json":
+            payload = await request.json()
+            values = payload.get("domains") if isinstance(payload, dict) else payload
+            if not isinstance(values, list):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail='Expected {"domains": [...]} or a JSON array'
+                )
+            domain_import.add_many(values)
+        else:
+            await _read_domain_lines(request, domain_import)
+    except HTTPException:
+        raise
+    except OverflowError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many domains (max {BULK_IMPORT_MAX_DOMAINS} per import)"
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid JSON body"
+        )
+
+    try:
+        added = 0
+        if domain_import.names:
+            added = await _insert_domains(domain_import.names, current_user["user_id"])
+
+        existing = len(domain_import.names) - added
+        logger.info(
+            f"✅ Bulk import by user {current_user['username']}: {added} added, "
+            f"{domain_import.duplicates + existing} duplicates, {domain_import.invalid} invalid"
+        )
+
+        return BulkImportResponse(
+            added=added,
+            duplicates=domain_import.duplicates + existing,
+            invalid=domain_import.invalid,
+            invalid_samples=domain_import.invalid_samples
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Bulk import error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to import domains"
+        )
+
+@router.post("/bulk-delete", response_model=BulkUpdateResponse)
+async def bulk_delete_domains(
+    request: Request,
+    body: BulkDomainIds,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Delete (deactivate) many domains by ID in a single UPDATE
+    """
+    try:
+        _require_admin(current_user, "delete")
+
+        domain_ids = list(set(body.domain_ids))
+        changed = await _set_active(db, False, domain_ids=domain_ids)
+        _audit_bulk(db, request, current_user, "domains.bulk_delete", changed, requested=len(domain_ids))
+
+        logger.info(f"✅ Bulk deleted {len(changed)}/{len(domain_ids)} domains by admin {current_user['username']}")
+
+        return BulkUpdateResponse(
+            requested=len(domain_ids),
+            affected=len(changed),
+            unchanged=len(domain_ids) - len(changed)
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Bulk delete error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete domains"
+        )
+
+@router.post("/bulk-delete-by-name", response_model=BulkUpdateResponse)
+async def bulk_delete_domains_by_name(
+    request: Request,
+    body: BulkDomainNames,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Delete (deactivate) many domains by name in a single UPDATE
+    """
+    try:
+        _require_admin(current_user, "delete")
+
+        names, invalid = _normalize_names(body.domains)
+        changed = await _set_active(db, False, names=names)
+        _audit_bulk(
+            db, request, current_user, "domains.bulk_delete", changed,
+            requested=len(names), invalid=invalid
+        )
+
+        logger.info(f"✅ Bulk deleted {len(changed)}/{len(names)} domains by name by admin {current_user['username']}")
+
+        changed_names = set(changed.values())
+        return BulkUpdateResponse(
+            requested=len(names),
+            affected=len(changed),
+            unchanged=len(names) - len(changed),
+            invalid=invalid,
+            unchanged_names=[name for name in names if name not in changed_names]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Bulk delete by name error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to delete domains"
+        )
+
+@router.post("/bulk-reactivate", response_model=BulkUpdateResponse)
+async def bulk_reactivate_domains(
+    request: Request,
+    body: BulkReactivateRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Reactivate many deleted domains by ID and/or name in a single UPDATE
+    """
+    try:
+        _require_admin(current_user, "reactivate")
+
+        if not body.domain_ids and not body.domains:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Provide domain_ids and/or domains"
+            )
+
+        domain_ids = list(set(body.domain_ids))
+        names, invalid = _normalize_names(body.domains)
+        requested = len(domain_ids) + len(names)
+
+        changed = await _set_active(db, True, domain_ids=domain_ids, names=names)
+        _audit_bulk(
+            db, request, current_user, "domains.bulk_reactivate", changed,
+            requested=requested, invalid=invalid
+        )
+
+        logger.info(f"✅ Bulk reactivated {len(changed)} domains by admin {current_user['username']}")
+
+        changed_names = set(changed.values())
+        return BulkUpdateResponse(
+            requested=requested,
+            affected=len(changed),
+            unchanged=max(requested - len(changed), 0),
+            invalid=invalid,
+            unchanged_names=[name for name in names if name not in changed_names]
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Bulk reactivate error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to reactivate domains"
+        )
+
 @router.get("/{domain_id}", response_model=DomainResponse)
 async def get_domain(
     domain_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Get domain by ID
@@ -217,22 +646,27 @@ async def get_domain(
                 detail=f"Domain with ID {domain_id} not found"
             )
 
-        # Get latest certificate
-        cert_query = select(SSLCertificate).where(
-            SSLCertificate.domain_id == domain_id
-        ).order_by(SSLCertificate.scanned_at.desc()).limit(1)
-        cert_result = await db.execute(cert_query)
-        cert = cert_result.scalars().first()
+        # Get certificate status
+        cert = await db.get(DomainCertStatus, domain_id)
 
         domain_dict = DomainResponse.model_validate(domain)
-        if cert:
+        if cert and cert.expiry_date:
             domain_dict.certificate = {
                 "common_name": cert.common_name,
                 "issuer": cert.issuer,
+                "fingerprint_sha256": cert.fingerprint_sha256,
+                "issued_date": cert.issued_date.isoformat() if cert.issued_date else None,
                 "expiry_date": cert.expiry_date.isoformat(),
                 "is_valid": cert.is_valid,
-                "days_until_expiry": (cert.expiry_date - datetime.now(timezone.utc)).days
+                "is_self_signed": cert.is_self_signed,
+                "key_size": cert.key_size,
+                "days_until_expiry": (cert.expiry_date - datetime.now(timezone.utc).date()).days,
+                "expiry_bucket": cert.expiry_bucket,
+                "last_success_at": cert.last_success_at.isoformat() if cert.last_success_at else None
             }
+        if cert:
+            domain_dict.last_scan_status = cert.last_status
+            domain_dict.last_scan_error = cert.last_error
 
         return domain_dict
 
@@ -245,12 +679,68 @@ async def get_domain(
             detail="Failed to retrieve domain"
         )
 
+@router.get("/{domain_id}/certificates", response_model=List[CertificatePeriod])
+async def get_domain_certificates(
+    domain_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get the certificate rotation timeline of a domain, newest first
+
+    Each entry is one period during which the domain kept serving the
+    same certificate; consecutive scans of it only extend last_seen.
+    """
+    try:
+        if not await db.get(Domain, domain_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Domain with ID {domain_id} not found"
+            )
+
+        stmt = (
+            select(DomainCertificateHistory, Certificate)
+            .join(Certificate, Certificate.fingerprint_sha256 == DomainCertificateHistory.fingerprint_sha256)
+            .where(DomainCertificateHistory.domain_id == domain_id)
+            .order_by(DomainCertificateHistory.first_seen.desc(), DomainCertificateHistory.id.desc())
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+
+        return [
+            CertificatePeriod(
+                fingerprint_sha256=cert.fingerprint_sha256,
+                first_seen=period.first_seen,
+                last_seen=period.last_seen,
+                common_name=cert.common_name,
+                subject_alt_names=cert.subject_alt_names,
+                issuer=cert.issuer,
+                serial_number=cert.serial_number,
+                issued_date=cert.issued_date,
+                expiry_date=cert.expiry_date,
+                is_self_signed=cert.is_self_signed,
+                key_size=cert.key_size,
+                signature_algorithm=cert.signature_algorithm
+            )
+            for period, cert in result.all()
+        ]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Get certificate history error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to retrieve certificate history"
+        )
+
 @router.put("/{domain_id}", response_model=DomainResponse)
 async def update_domain(
     domain_id: int,
     domain_update: DomainUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Update domain
@@ -292,7 +782,7 @@ async def update_domain(
 async def delete_domain(
     domain_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Delete domain (soft delete by setting is_active=False)
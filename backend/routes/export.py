@@ -0,0 +1,274 @@
+"""
+Export routes
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse, FileResponse
+from pydantic import BaseModel
+from datetime import datetime
+from typing import AsyncIterator, Optional, List
+import csv
+import io
+import logging
+import os
+import zlib
+
+from sqlalchemy import Select
+
+from backend.database import AsyncSessionLocal
+from backend.auth import get_current_user, get_stream_user
+from backend import snapshots
+from backend.domain_queries import (
+    certificate_status,
+    domain_filters,
+    domain_export_query,
+    resolve_sort
+)
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# Rows fetched per round trip and written per chunk
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+
+CSV_COLUMNS = [
+    "id",
+    "domain_name",
+    "description",
+    "is_active",
+    "created_at",
+    "last_scanned",
+    "last_status",
+    "last_error",
+    "common_name",
+    "issuer",
+    "fingerprint_sha256",
+    "issued_date",
+    "expiry_date",
+    "days_until_expiry",
+    "is_valid",
+    "is_self_signed",
+    "key_size",
+    "expiry_bucket",
+]
+
+# ============================================
+# Request/Response Models
+# ============================================
+class SnapshotRequest(BaseModel):
+    """Snapshot creation request"""
+    dataset: str = "inventory"  # 'inventory' or 'scan_history'
+    format: str = "parquet"  # 'parquet' or 'arrow'
+    since: Optional[datetime] = None  # watermark of a previous snapshot
+    month: Optional[str] = None  # YYYY-MM, one scan_history partition
+
+class SnapshotResponse(BaseModel):
+    """Snapshot metadata"""
+    name: str
+    dataset: str
+    format: str
+    status: str
+    since: Optional[datetime]
+    month: Optional[str]
+    rows: int
+    watermark: Optional[datetime]
+    size_bytes: Optional[int]
+    error: Optional[str]
+    created_at: datetime
+    finished_at: Optional[datetime]
+
+# ============================================
+# CSV Streaming
+# ============================================
+def _csv_value(value):
+    """Format a value for CSV output"""
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ", timespec="seconds")
+    return value
+
+async def stream_csv(query: Select, compress: bool = False) -> AsyncIterator[bytes]:
+    """
+    Stream query rows as CSV chunks
+
+    Rows are read through a server-side cursor in EXPORT_CHUNK_ROWS
+    partitions and each partition is written out before the next is
+    fetched, so memory stays constant regardless of the row count.
+    Owns its session because it runs after the request handler returned.
+
+    Args:
+        query: Statement selecting CSV_COLUMNS
+        compress: Gzip the output
+
+    Yields:
+        CSV (or gzip) encoded chunks
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    compressor = zlib.compressobj(wbits=31) if compress else None  # 31 = gzip container
+
+    def drain() -> bytes:
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+
+    writer.writerow(CSV_COLUMNS)
+    rows = 0
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=EXPORT_CHUNK_ROWS))
+        async for partition in result.partitions():
+            writer.writerows([_csv_value(value) for value in row] for row in partition)
+            rows += len(partition)
+            chunk = drain()
+            if chunk:
+                yield chunk
+
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+    logger.info(f"✅ Exported {rows} domains to CSV")
+
+# ============================================
+# Routes
+# ============================================
+
+@router.get("/csv")
+async def export_csv(
+    current_user: dict = Depends(get_stream_user),
+    is_active: Optional[bool] = None,
+    search: Optional[str] = None,
+    prefix: Optional[str] = None,
+    suffix: Optional[str] = None,
+    ssl_status: Optional[str] = None,
+    expired_soon: bool = False,
+    expiring_within_days: Optional[int] = Query(None, ge=0, le=3650),
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = None,
+    gzip: bool = False
+):
+    """
+    Export domains with their certificate status as CSV
+
+    Accepts the same filters and sort options as GET /api/domains.
+    The file is streamed while it is read from the database;
+    `gzip=true` returns a .csv.gz download instead. Like the event stream,
+    it also accepts `?token=`, since a browser download cannot set headers.
+    """
+    try:
+        sort_field, descending = resolve_sort(sort_by, sort_order)
+        cert = certificate_status()
+        filters = domain_filters(
+            cert,
+            is_active=is_active,
+            search=search,
+            prefix=prefix,
+            suffix=suffix,
+            ssl_status=ssl_status,
+            expired_soon=expired_soon,
+            expiring_within_days=expiring_within_days
+        )
+        query = domain_export_query(cert, filters, sort_field, descending)
+
+        filename = f"ssl-domains-{datetime.utcnow():%Y%m%d-%H%M%S}.csv"
+        media_type = "text/csv"
+        if gzip:
+            filename += ".gz"
+            media_type = "application/gzip"
+
+        logger.info(f"📤 CSV export started by user {current_user['username']}")
+
+        return StreamingResponse(
+            stream_csv(query, compress=gzip),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ CSV export error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to export domains"
+        )
+
+@router.post("/snapshots", response_model=SnapshotResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_snapshot(
+    body: SnapshotRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Start a columnar snapshot of the certificate inventory or scan history
+
+    The snapshot is written in the background; poll GET /snapshots until
+    its status is `completed`, then download it. Pass the `watermark` of
+    a previous snapshot as `since` to export only rows changed after it.
+    """
+    try:
+        meta = snapshots.new_snapshot(body.dataset, body.format, body.since, body.month)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    try:
+        background_tasks.add_task(snapshots.run_snapshot, meta)
+        logger.info(f"📦 Snapshot {meta['name']} requested by user {current_user['username']}")
+        return meta
+
+    except Exception as e:
+        logger.error(f"❌ Create snapshot error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create snapshot"
+        )
+
+@router.get("/snapshots", response_model=List[SnapshotResponse])
+async def get_snapshots(
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List snapshots, newest first
+    """
+    try:
+        return snapshots.list_snapshots()
+
+    except Exception as e:
+        logger.error(f"❌ List snapshots error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list snapshots"
+        )
+
+@router.get("/snapshots/{name}")
+async def download_snapshot(
+    name: str,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Download a completed snapshot file
+    """
+    meta = snapshots.get_snapshot(name)
+    if not meta:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Snapshot '{name}' not found"
+        )
+    if meta["status"] != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Snapshot '{name}' is {meta['status']}"
+        )
+
+    media_type = (
+        "application/vnd.apache.parquet" if meta["format"] == "parquet"
+        else "application/vnd.apache.arrow.file"
+    )
+    return FileResponse(snapshots.snapshot_path(name), media_type=media_type, filename=name)
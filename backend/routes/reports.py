@@ -0,0 +1,415 @@
+"""
+Report routes
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+import logging
+import os
+
+from backend.database import get_db
+from backend.models import CertificateInventory, DashboardCounters, Domain, SSLCertificate
+from backend.auth import get_current_user
+from backend.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/reports", tags=["reports"])
+
+REPORTS_CACHE_TTL = float(os.getenv("REPORTS_CACHE_TTL", "300"))
+
+report_cache = TTLCache(ttl=REPORTS_CACHE_TTL, maxsize=256)
+
+BUCKET_DAYS = {"day": 1, "week": 7}
+
+INVENTORY_COLUMNS = {
+    "issuer": SSLCertificate.issuer,
+    "key_size": SSLCertificate.key_size,
+    "signature_algorithm": SSLCertificate.signature_algorithm,
+}
+
+# ============================================
+# Response Models
+# ============================================
+class IssuerCount(BaseModel):
+    """Certificates of one issuer"""
+    issuer: Optional[str]
+    count: int
+
+class ExpiryBucket(BaseModel):
+    """Certificates expiring in [start_date, end_date)"""
+    start_date: date
+    end_date: date
+    total: int
+    issuers: List[IssuerCount]
+
+class ExpiryHistogramResponse(BaseModel):
+    """Expiry histogram response"""
+    bucket: str
+    horizon_days: int
+    start_date: date
+    end_date: date
+    total: int
+    buckets: List[ExpiryBucket]
+    generated_at: datetime
+
+class TrendPoint(BaseModel):
+    """Active domains by health on one day"""
+    day: date
+    valid: int
+    expiring: int  # valid, expiring within 30 days
+    invalid: int  # expired or failed validation
+    failed: int  # latest scan failed
+    total: int
+
+class TrendsResponse(BaseModel):
+    """Fleet health trend response"""
+    start_date: date
+    end_date: date
+    issuer: Optional[str]
+    key_size_class: Optional[str]
+    points: List[TrendPoint]
+
+class InventoryEntry(BaseModel):
+    """Current certificates with one issuer, key size or algorithm"""
+    value: Optional[str]  # None = unknown
+    certificates: int
+
+class InventoryResponse(BaseModel):
+    """Certificate inventory response"""
+    issuer: List[InventoryEntry]
+    key_size: List[InventoryEntry]
+    signature_algorithm: List[InventoryEntry]
+
+class InventoryDomain(BaseModel):
+    """Domain in an inventory drill-down"""
+    id: int
+    domain_name: str
+    is_active: bool
+    common_name: Optional[str]
+    issuer: Optional[str]
+    key_size: Optional[int]
+    signature_algorithm: Optional[str]
+    expiry_date: date
+
+class InventoryDomainsResponse(BaseModel):
+    """Inventory drill-down page"""
+    dimension: str
+    value: Optional[str]
+    items: List[InventoryDomain]
+    next_cursor: Optional[int]  # pass as cursor for the next page
+
+# ============================================
+# Cache Helpers
+# ============================================
+async def _data_version(db: AsyncSession) -> Optional[datetime]:
+    """
+    Version of the certificate data behind the reports
+
+    dashboard_counters.updated_at is bumped by every scanner batch and
+    domain status change, so cached reports keyed by it are invalidated
+    as soon as new scan results land (one primary key lookup).
+    """
+    result = await db.execute(
+        select(DashboardCounters.updated_at).where(DashboardCounters.id == 1)
+    )
+    return result.scalar()
+
+# ============================================
+# Routes
+# ============================================
+
+@router.get("/expiry-histogram", response_model=ExpiryHistogramResponse)
+async def get_expiry_histogram(
+    bucket: str = Query("day", pattern="^(day|week)$"),
+    horizon: int = Query(90, ge=1, le=365),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Count active certificates expiring per day or week, by issuer
+
+    Buckets start today and cover the next `horizon` days; empty buckets
+    are included. Reads the current certificate of each domain through a
+    range scan on the active expiry index.
+    """
+    try:
+        version = await _data_version(db)
+        cache_key = ("expiry-histogram", bucket, horizon, version, date.today())
+        report = report_cache.get(cache_key)
+        if report is not None:
+            return report
+
+        step = BUCKET_DAYS[bucket]
+        start = date.today()
+        end = start + timedelta(days=horizon)
+        result = await db.execute(
+            text("""
+                SELECT (expiry_date - CAST(:start AS DATE)) / CAST(:step AS INTEGER) AS slot,
+                       issuer, COUNT(*) AS count
+                FROM domain_cert_status
+                WHERE is_active
+                  AND expiry_date >= :start
+                  AND expiry_date < :end
+                GROUP BY slot, issuer
+                ORDER BY slot, count DESC, issuer
+            """),
+            {"start": start, "end": end, "step": step}
+        )
+
+        buckets: List[ExpiryBucket] = []
+        for slot in range((horizon + step - 1) // step):
+            bucket_start = start + timedelta(days=slot * step)
+            buckets.append(ExpiryBucket(
+                start_date=bucket_start,
+                end_date=min(bucket_start + timedelta(days=step), end),
+                total=0,
+                issuers=[]
+            ))
+
+        total = 0
+        for row in result:
+            entry = buckets[row.slot]
+            entry.total += row.count
+            entry.issuers.append(IssuerCount(issuer=row.issuer, count=row.count))
+            total += row.count
+
+        report = ExpiryHistogramResponse(
+            bucket=bucket,
+            horizon_days=horizon,
+            start_date=start,
+            end_date=end,
+            total=total,
+            buckets=buckets,
+            generated_at=datetime.utcnow()
+        )
+        report_cache.set(cache_key, report)
+
+        return report
+
+    except Exception as e:
+        logger.error(f"❌ Expiry histogram error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build expiry histogram"
+        )
+
+@router.get("/trends", response_model=TrendsResponse)
+async def get_trends(
+    days: int = Query(365, ge=1, le=1095),
+    issuer: Optional[str] = Query(None, max_length=255),
+    key_size_class: Optional[str] = Query(None, pattern="^(ec|rsa<2048|rsa2048|rsa3072|rsa4096\\+|unknown)$"),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Daily fleet health over the last `days` days
+
+    Reads only the fleet_daily_stats rollup (one point per day), optionally
+    narrowed to one issuer and/or key size class. Days without any change
+    repeat the previous day's counts.
+    """
+    try:
+        version = await _data_version(db)
+        cache_key = ("trends", days, issuer, key_size_class, version, date.today())
+        report = report_cache.get(cache_key)
+        if report is not None:
+            return report
+
+        end = date.today()
+        start = end - timedelta(days=days - 1)
+        conditions = ""
+        params = {"start": start, "end": end}
+        if issuer is not None:
+            conditions += " AND issuer = :issuer"
+            params["issuer"] = issuer
+        if key_size_class is not None:
+            conditions += " AND key_size_class = :key_size_class"
+            params["key_size_class"] = key_size_class
+
+        # Also read the latest day before the range to carry it in
+        result = await db.execute(
+            text(f"""
+                SELECT day, health, SUM(domains) AS domains
+                FROM fleet_daily_stats
+                WHERE day <= :end
+                  AND day >= COALESCE(
+                      (SELECT MAX(day) FROM fleet_daily_stats WHERE day <= :start), :start
+                  ){conditions}
+                GROUP BY day, health
+                ORDER BY day
+            """),
+            params
+        )
+
+        counts: Dict[date, Dict[str, int]] = {}
+        for row in result:
+            counts.setdefault(row.day, {})[row.health] = row.domains
+
+        points: List[TrendPoint] = []
+        days_with_data = sorted(counts)
+        latest: Dict[str, int] = {}
+        index = 0
+        for offset in range(days):
+            day = start + timedelta(days=offset)
+            while index < len(days_with_data) and days_with_data[index] <= day:
+                latest = counts[days_with_data[index]]
+                index += 1
+            if not latest and not points:
+                continue  # before the first rollup
+            points.append(TrendPoint(
+                day=day,
+                valid=latest.get("valid", 0),
+                expiring=latest.get("expiring", 0),
+                invalid=latest.get("invalid", 0),
+                failed=latest.get("failed", 0),
+                total=sum(latest.values())
+            ))
+
+        report = TrendsResponse(
+            start_date=start,
+            end_date=end,
+            issuer=issuer,
+            key_size_class=key_size_class,
+            points=points
+        )
+        report_cache.set(cache_key, report)
+
+        return report
+
+    except Exception as e:
+        logger.error(f"❌ Trends error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build trends"
+        )
+
+@router.get("/inventory", response_model=InventoryResponse)
+async def get_inventory(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Count current certificates by issuer, key size and signature algorithm
+
+    Reads the certificate_inventory aggregates, which triggers on
+    ssl_certificates keep current; entries are sorted by count.
+    Use /inventory/{dimension}/domains to list the domains behind one.
+    """
+    try:
+        version = await _data_version(db)
+        cache_key = ("inventory", version)
+        report = report_cache.get(cache_key)
+        if report is not None:
+            return report
+
+        result = await db.execute(
+            select(CertificateInventory)
+            .where(CertificateInventory.certificates > 0)
+            .order_by(CertificateInventory.certificates.desc(), CertificateInventory.value)
+        )
+
+        groups: Dict[str, List[InventoryEntry]] = {dimension: [] for dimension in INVENTORY_COLUMNS}
+        for entry in result.scalars():
+            groups[entry.dimension].append(InventoryEntry(
+                value=entry.value or None,
+                certificates=entry.certificates
+            ))
+
+        report = InventoryResponse(**groups)
+        report_cache.set(cache_key, report)
+
+        return report
+
+    except Exception as e:
+        logger.error(f"❌ Inventory error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to build inventory"
+        )
+
+@router.get("/inventory/{dimension}/domains", response_model=InventoryDomainsResponse)
+async def get_inventory_domains(
+    dimension: str,
+    value: Optional[str] = Query(None, max_length=255),
+    cursor: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    List domains whose current certificate has one issuer, key size or algorithm
+
+    E.g. /inventory/key_size/domains?value=1024 or
+    /inventory/signature_algorithm/domains?value=sha1WithRSAEncryption.
+    Omit value for certificates where it is unknown. Pages are keyset
+    paginated by domain ID: pass `next_cursor` back as `cursor`.
+    """
+    column = INVENTORY_COLUMNS.get(dimension)
+    if column is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown dimension. Allowed: {', '.join(INVENTORY_COLUMNS)}"
+        )
+
+    match = value if value else None
+    if match is not None and dimension == "key_size":
+        try:
+            match = int(match)
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Key size must be an integer"
+            )
+
+    try:
+        stmt = (
+            select(
+                SSLCertificate.domain_id,
+                Domain.domain_name,
+                Domain.is_active,
+                SSLCertificate.common_name,
+                SSLCertificate.issuer,
+                SSLCertificate.key_size,
+                SSLCertificate.signature_algorithm,
+                SSLCertificate.expiry_date
+            )
+            .join(Domain, Domain.id == SSLCertificate.domain_id)
+            .where(column.is_(None) if match is None else column == match)
+            .order_by(SSLCertificate.domain_id)
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            stmt = stmt.where(SSLCertificate.domain_id > cursor)
+
+        rows = (await db.execute(stmt)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        return InventoryDomainsResponse(
+            dimension=dimension,
+            value=value or None,
+            items=[
+                InventoryDomain(
+                    id=row.domain_id,
+                    domain_name=row.domain_name,
+                    is_active=row.is_active,
+                    common_name=row.common_name,
+                    issuer=row.issuer,
+                    key_size=row.key_size,
+                    signature_algorithm=row.signature_algorithm,
+                    expiry_date=row.expiry_date
+                )
+                for row in rows
+            ],
+            next_cursor=rows[-1].domain_id if has_more else None
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Inventory drill-down error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to list inventory domains"
+        )
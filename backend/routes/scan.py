@@ -1,21 +1,33 @@
 """
 Scan management routes
 """
-from fastapi import APIRouter, HTTPException, status, Request, Depends
-from pydantic import BaseModel
-from sqlalchemy import select, and_
+from fastapi import APIRouter, HTTPException, status, Request, Depends, Query
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from sqlalchemy import select, and_, any_, bindparam, func, literal
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.types import Integer
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timezone
-from typing import Optional
+from typing import AsyncIterator, Optional, List
+import asyncio
 import logging
 
 from backend.database import get_db
-from backend.models import Domain, ScanResult
-from backend.auth import verify_token
+from backend.models import Domain, DomainCertStatus, ScanQueue, ScanResult, ScanResultDaily, ScanRun
+from backend.auth import get_current_user, get_stream_user
+from backend.events import broker, Subscriber, EVENTS_KEEPALIVE_SECONDS
+from backend.quick_scan import quick_scan, QUICK_SCAN_PORTS
+from backend.domain_names import normalize_domain
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/scan", tags=["scan"])
 
+# scan_queue priority of operator requests (the regular sweep is not queued)
+MANUAL_SCAN_PRIORITY = 10
+# Domain names echoed back for explicit ID lists up to this size
+ECHO_DOMAIN_NAMES = 100
+
 # ============================================
 # Request/Response Models
 # ============================================
@@ -23,6 +35,43 @@ class ScanTriggerRequest(BaseModel):
     """Scan trigger request model"""
     domain_id: Optional[int] = None  # None = scan all active domains
 
+class BulkScanRequest(BaseModel):
+    """Bulk scan request: explicit IDs and/or filters, combined with AND"""
+    domain_ids: Optional[List[int]] = Field(None, min_length=1, max_length=50000)
+    expiring_within_days: Optional[int] = Field(None, ge=0, le=3650)  # includes expired
+    last_scan_failed: Optional[bool] = None
+    issuer: Optional[str] = Field(None, min_length=1, max_length=255)
+
+class QuickScanRequest(BaseModel):
+    """On-demand scan request model"""
+    host: str = Field(..., min_length=1, max_length=253)
+    port: int = Field(443, ge=1, le=65535)
+
+class QuickScanCertificate(BaseModel):
+    """Certificate served by the host"""
+    common_name: Optional[str]
+    subject_alt_names: List[str]
+    issuer: Optional[str]
+    serial_number: Optional[str]
+    issued_date: datetime
+    expiry_date: datetime
+    days_until_expiry: int
+    is_valid: bool
+    is_self_signed: bool
+    key_size: Optional[int]
+    signature_algorithm: Optional[str]
+    fingerprint_sha256: str
+
+class QuickScanResponse(BaseModel):
+    """On-demand scan result"""
+    host: str
+    port: int
+    status: str  # 'success', 'failed'
+    error: Optional[str]
+    certificate: Optional[QuickScanCertificate]
+    cached: bool  # served from a recent or concurrent scan
+    age_seconds: float
+
 class ScanStatusResponse(BaseModel):
     """Scan status response"""
     domain_id: int
@@ -31,6 +80,74 @@ class ScanStatusResponse(BaseModel):
     last_scan: Optional[datetime]
     scan_count: int
 
+class ScanRunResponse(BaseModel):
+    """Scan run progress response"""
+    id: int
+    source: str
+    status: str
+    total_domains: int
+    completed_count: int
+    success_count: int
+    failed_count: int
+    progress_percent: float
+    domains_per_second: Optional[float]
+    eta_seconds: Optional[int]
+    error_message: Optional[str]
+    started_at: datetime
+    updated_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+def _scan_run_response(run: ScanRun) -> ScanRunResponse:
+    """Build scan run response with derived progress"""
+    progress = (
+        round(run.completed_count * 100.0 / run.total_domains, 2)
+        if run.total_domains else 100.0
+    )
+    return ScanRunResponse(
+        id=run.id,
+        source=run.source,
+        status=run.status,
+        total_domains=run.total_domains,
+        completed_count=run.completed_count,
+        success_count=run.success_count,
+        failed_count=run.failed_count,
+        progress_percent=progress,
+        domains_per_second=run.domains_per_second,
+        eta_seconds=run.eta_seconds,
+        error_message=run.error_message,
+        started_at=run.started_at,
+        updated_at=run.updated_at,
+        finished_at=run.finished_at
+    )
+
+async def _event_stream(subscriber: Subscriber) -> AsyncIterator[bytes]:
+    """
+    SSE frames of one client, with keepalive comments while idle
+
+    Frames that queued up while the previous write was in flight are sent
+    together. Ends when the broker drops the client.
+    """
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                frame = await asyncio.wait_for(subscriber.queue.get(), EVENTS_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+
+            frames = [frame]
+            while frame is not None and not subscriber.queue.empty():
+                frame = subscriber.queue.get_nowait()
+                frames.append(frame)
+            if frames[-1] is None:
+                if len(frames) > 1:
+                    yield b"".join(frames[:-1])
+                break
+            yield b"".join(frames)
+    finally:
+        broker.unsubscribe(subscriber)
+
 # ============================================
 # Routes
 # ============================================
@@ -40,7 +157,7 @@ async def trigger_scan(
     request: Request,
     scan_request: ScanTriggerRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Trigger SSL scan for domain(s)
@@ -81,7 +198,6 @@ async def trigger_scan(
         else:
             # Trigger scan for all active domains
             stmt = select(func.count(Domain.id)).where(Domain.is_active == True)
-            from sqlalchemy import func
             result = await db.execute(stmt)
             count = result.scalar()
 
@@ -101,11 +217,193 @@ async def trigger_scan(
             detail="Failed to trigger scan"
         )
 
+@router.post("/domains", status_code=status.HTTP_202_ACCEPTED)
+async def queue_domain_scans(
+    scan_request: BulkScanRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Queue active domains for scanning ahead of the regular sweep
+
+    Selects by explicit IDs and/or certificate status filters and queues
+    them with a single INSERT ... SELECT, whatever the number of matches.
+    Domains already queued keep their position and get at least
+    MANUAL_SCAN_PRIORITY.
+    """
+    filters = (
+        scan_request.expiring_within_days is not None
+        or scan_request.last_scan_failed is not None
+        or scan_request.issuer is not None
+    )
+    if not scan_request.domain_ids and not filters:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide domain_ids or at least one filter"
+        )
+
+    try:
+        source = select(
+            Domain.id,
+            literal(MANUAL_SCAN_PRIORITY),
+            literal(current_user.get("user_id"), Integer),
+            func.now()
+        ).where(Domain.is_active == True)
+
+        if scan_request.domain_ids:
+            source = source.where(
+                Domain.id == any_(bindparam("domain_ids", scan_request.domain_ids, type_=ARRAY(Integer)))
+            )
+        if filters:
+            source = source.join(DomainCertStatus, DomainCertStatus.domain_id == Domain.id)
+        if scan_request.expiring_within_days is not None:
+            source = source.where(
+                DomainCertStatus.expiry_date <= func.current_date() + scan_request.expiring_within_days
+            )
+        if scan_request.last_scan_failed is not None:
+            source = source.where(
+                (DomainCertStatus.last_status == "failed") == scan_request.last_scan_failed
+            )
+        if scan_request.issuer is not None:
+            source = source.where(DomainCertStatus.issuer == scan_request.issuer)
+
+        stmt = insert(ScanQueue).from_select(
+            ["domain_id", "priority", "requested_by", "requested_at"], source
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ScanQueue.domain_id],
+            set_={"priority": func.greatest(ScanQueue.priority, stmt.excluded.priority)}
+        ).returning(ScanQueue.domain_id)
+
+        queued = (await db.execute(stmt)).scalars().all()
+
+        response = {
+            "message": f"Scan queued for {len(queued)} domain(s)",
+            "domain_count": len(queued)
+        }
+        if scan_request.domain_ids and len(queued) <= ECHO_DOMAIN_NAMES:
+            names = await db.execute(
+                select(Domain.domain_name).where(Domain.id.in_(queued)).order_by(Domain.domain_name)
+            )
+            response["domains"] = names.scalars().all()
+
+        logger.info(f"✅ Scan queued for {len(queued)} domains by {current_user['username']}")
+
+        return response
+
+    except Exception as e:
+        logger.error(f"❌ Queue domain scans error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to queue scans"
+        )
+
+@router.post("/now", response_model=QuickScanResponse)
+async def scan_now(
+    scan_request: QuickScanRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Scan one host immediately and return its certificate
+
+    One handshake under a hard deadline (QUICK_SCAN_TIMEOUT). Concurrent
+    requests for the same host share it, and results are reused for
+    QUICK_SCAN_CACHE_SECONDS. Nothing is stored.
+
+    Only ports in QUICK_SCAN_PORTS are allowed, and non-admin users can
+    only scan active monitored domains, so the API cannot be used to
+    probe arbitrary hosts from inside the network.
+    """
+    host = normalize_domain(scan_request.host)
+    if not host:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid host"
+        )
+
+    if scan_request.port not in QUICK_SCAN_PORTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Port not allowed (allowed: {', '.join(map(str, sorted(QUICK_SCAN_PORTS)))})"
+        )
+
+    if current_user["role"] != "admin":
+        monitored = await db.scalar(
+            select(Domain.id).where(Domain.domain_name == host, Domain.is_active == True)
+        )
+        if monitored is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only admins can scan hosts that are not monitored domains"
+            )
+
+    try:
+        result, age, cached = await quick_scan(host, scan_request.port)
+
+        succeeded = result.get("status") == "success"
+        logger.info(
+            f"✅ Quick scan of {host}:{scan_request.port} by {current_user['username']}: "
+            f"{result.get('status')}{' (cached)' if cached else ''}"
+        )
+
+        return QuickScanResponse(
+            host=host,
+            port=scan_request.port,
+            status=result.get("status", "failed"),
+            error=result.get("error"),
+            certificate=QuickScanCertificate(**result) if succeeded else None,
+            cached=cached,
+            age_seconds=round(age, 3)
+        )
+
+    except Exception as e:
+        logger.error(f"❌ Quick scan error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to scan host"
+        )
+
+@router.get("/events")
+async def stream_scan_events(
+    current_user: dict = Depends(get_stream_user)
+):
+    """
+    Server-Sent Events stream of live scan activity
+
+    Events:
+        results: Summaries of saved scan results (JSON array, one per domain)
+        progress: Scan run progress (same fields as /runs)
+
+    Slow clients are disconnected once their buffer fills up and should
+    reload state from the list endpoints after reconnecting. EventSource
+    clients pass their token as ?token= (they cannot set headers).
+    """
+    try:
+        subscriber = await broker.subscribe()
+    except Exception as e:
+        logger.error(f"❌ Scan event subscribe error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Scan events unavailable"
+        )
+
+    logger.info(f"✅ Scan event stream opened by {current_user['username']}")
+
+    return StreamingResponse(
+        _event_stream(subscriber),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 @router.get("/status/{domain_id}", response_model=ScanStatusResponse)
 async def get_scan_status(
     domain_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: dict = Depends(verify_token)
+    current_user: dict = Depends(get_current_user)
 ):
     """
     Get scan status for domain
@@ -122,10 +420,14 @@ async def get_scan_status(
                 detail=f"Domain with ID {domain_id} not found"
             )
 
-        # Get scan count
-        from sqlalchemy import func
-        count_stmt = select(func.count(ScanResult.id)).where(
-            ScanResult.domain_id == domain_id
+        # Get scan count (raw partitions + compacted daily rollups)
+        count_stmt = select(
+            select(func.count(ScanResult.id)).where(
+                ScanResult.domain_id == domain_id
+            ).scalar_subquery()
+            + select(func.coalesce(func.sum(ScanResultDaily.scan_count), 0)).where(
+                ScanResultDaily.domain_id == domain_id
+            ).scalar_subquery()
         )
         count_result = await db.execute(count_stmt)
         scan_count = count_result.scalar()
@@ -153,3 +455,60 @@ async def get_scan_status(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to get scan status"
         )
+
+@router.get("/runs", response_model=List[ScanRunResponse])
+async def get_scan_runs(
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=100),
+    run_status: Optional[str] = Query(None, alias="status")
+):
+    """
+    List recent scan runs, newest first
+    """
+    try:
+        stmt = select(ScanRun)
+        if run_status:
+            stmt = stmt.where(ScanRun.status == run_status)
+        stmt = stmt.order_by(ScanRun.started_at.desc()).limit(limit)
+
+        result = await db.execute(stmt)
+        return [_scan_run_response(run) for run in result.scalars().all()]
+
+    except Exception as e:
+        logger.error(f"❌ Get scan runs error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get scan runs"
+        )
+
+@router.get("/runs/{run_id}", response_model=ScanRunResponse)
+async def get_scan_run(
+    run_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Get progress of a single scan run
+    """
+    try:
+        stmt = select(ScanRun).where(ScanRun.id == run_id)
+        result = await db.execute(stmt)
+        run = result.scalars().first()
+
+        if not run:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Scan run with ID {run_id} not found"
+            )
+
+        return _scan_run_response(run)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Get scan run error: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get scan run"
+        )
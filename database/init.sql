@@ -5,6 +5,21 @@
 -- ============================================
 CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
 CREATE EXTENSION IF NOT EXISTS "pgcrypto";
+CREATE EXTENSION IF NOT EXISTS "pg_trgm";
+
+-- ============================================
+-- Domain Name Helpers
+-- ============================================
+-- Labels in reverse order: api.example.com -> com.example.api.
+-- Suffix searches (*.example.com) become prefix range scans on this.
+CREATE OR REPLACE FUNCTION reverse_labels(name TEXT)
+RETURNS TEXT AS $$
+    SELECT array_to_string(ARRAY(
+        SELECT label
+        FROM unnest(string_to_array(name, '.')) WITH ORDINALITY AS l(label, pos)
+        ORDER BY pos DESC
+    ), '.')
+$$ LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE;
 
 -- ============================================
 -- Users Table
@@ -50,6 +65,48 @@ CREATE TABLE IF NOT EXISTS user_sessions (
 CREATE INDEX idx_sessions_user_id ON user_sessions(user_id);
 CREATE INDEX idx_sessions_expires_at ON user_sessions(expires_at);
 CREATE INDEX idx_sessions_is_active ON user_sessions(is_active);
+-- Activity and logout are recorded by access token (see backend/auth_state.py)
+CREATE INDEX idx_sessions_token_hash ON user_sessions(token_hash);
+
+-- ============================================
+-- Login Attempts Table
+-- ============================================
+-- Failed logins per username:IP as two fixed-window counters approximating
+-- a sliding window; used with AUTH_STATE_STORE=postgres. Rows older than
+-- two windows are deleted by the backend's sweeper.
+CREATE TABLE IF NOT EXISTS login_attempts (
+    identifier TEXT PRIMARY KEY,
+    window_index BIGINT NOT NULL, -- epoch seconds / window length
+    attempts INTEGER NOT NULL DEFAULT 0,
+    previous_attempts INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX idx_login_attempts_window_index ON login_attempts(window_index);
+
+-- ============================================
+-- Token Revocation Tables
+-- ============================================
+-- Access tokens revoked before their exp (logout). Rows are only needed
+-- until the token would have expired anyway.
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    token_hash VARCHAR(64) PRIMARY KEY, -- sha256 hex of the JWT
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    expires_at TIMESTAMP NOT NULL,
+    revoked_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_revoked_tokens_expires_at ON revoked_tokens(expires_at);
+
+-- Bumped on every revocation; backend workers poll it to drop their
+-- cached token claims (see get_current_user in backend/auth.py)
+CREATE TABLE IF NOT EXISTS auth_revocation_state (
+    id INTEGER PRIMARY KEY DEFAULT 1,
+    version BIGINT NOT NULL DEFAULT 0,
+
+    CONSTRAINT chk_auth_revocation_state_single_row CHECK (id = 1)
+);
+
+INSERT INTO auth_revocation_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING;
 
 -- ============================================
 -- Domains Table
@@ -65,14 +122,24 @@ CREATE TABLE IF NOT EXISTS domains (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
-    CONSTRAINT chk_domain_format CHECK (domain_name ~ '^([a-zA-Z0-9](-?[a-zA-Z0-9])*\.)+[a-zA-Z]{2,}$')
+    -- Lowercase LDH / IDNA (xn--) names. Label lengths are enforced by
+    -- backend/domain_names.py; bounded repeats here would slow bulk inserts.
+    CONSTRAINT chk_domain_format CHECK (domain_name ~ '^([a-z0-9](-*[a-z0-9])*\.)+([a-z]{2,}|xn--[a-z0-9](-*[a-z0-9])*)$')
 );
 
 -- Create indexes for domains
-CREATE INDEX idx_domains_domain_name ON domains(domain_name);
+-- Search: substring (trigram), prefix (api*) and suffix (*.example.com)
+CREATE INDEX idx_domains_name_trgm ON domains USING GIN (domain_name gin_trgm_ops);
+CREATE INDEX idx_domains_name_pattern ON domains(domain_name text_pattern_ops);
+CREATE INDEX idx_domains_name_reversed ON domains(reverse_labels(domain_name) text_pattern_ops);
 CREATE INDEX idx_domains_is_active ON domains(is_active);
 CREATE INDEX idx_domains_last_scanned ON domains(last_scanned);
 CREATE INDEX idx_domains_next_scan ON domains(next_scan);
+-- Keyset pagination of the domain list (newest first)
+CREATE INDEX idx_domains_created_id ON domains(created_at DESC, id DESC);
+-- Sorting of active domains by name and last scan time
+CREATE INDEX idx_domains_active_name ON domains(domain_name) WHERE is_active;
+CREATE INDEX idx_domains_active_last_scanned ON domains(COALESCE(last_scanned, '-infinity'::TIMESTAMP), id) WHERE is_active;
 
 -- ============================================
 -- SSL Certificates Table
@@ -81,7 +148,7 @@ CREATE TABLE IF NOT EXISTS ssl_certificates (
     id SERIAL PRIMARY KEY,
     domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
     common_name VARCHAR(255),
-    subject_alt_names TEXT, -- JSON array of SANs
+    subject_alt_names TEXT[] NOT NULL DEFAULT '{}', -- lowercase DNS names / IPs
     issuer VARCHAR(255),
     serial_number VARCHAR(100),
     issued_date DATE,
@@ -98,34 +165,235 @@ CREATE TABLE IF NOT EXISTS ssl_certificates (
 );
 
 -- Create indexes for certificates
-CREATE INDEX idx_certs_domain_id ON ssl_certificates(domain_id);
 CREATE INDEX idx_certs_expiry_date ON ssl_certificates(expiry_date);
-CREATE INDEX idx_certs_is_valid ON ssl_certificates(is_valid);
 CREATE INDEX idx_certs_scanned_at ON ssl_certificates(scanned_at);
+-- One current certificate per domain (scanner upserts on domain_id)
+CREATE UNIQUE INDEX idx_certs_domain_id ON ssl_certificates(domain_id);
+-- Certificate coverage lookups (subject_alt_names && ARRAY[host, wildcard])
+CREATE INDEX idx_certs_sans ON ssl_certificates USING GIN (subject_alt_names);
+-- Inventory drill-down (keyset pagination by domain_id within one value)
+CREATE INDEX idx_certs_issuer_domain ON ssl_certificates(issuer, domain_id);
+CREATE INDEX idx_certs_key_size_domain ON ssl_certificates(key_size, domain_id);
+CREATE INDEX idx_certs_sig_alg_domain ON ssl_certificates(signature_algorithm, domain_id);
+
+-- ============================================
+-- Certificate Inventory
+-- Current certificates per issuer, key size and signature algorithm,
+-- kept current by a statement-level trigger on ssl_certificates
+-- ============================================
+CREATE TABLE IF NOT EXISTS certificate_inventory (
+    dimension VARCHAR(20) NOT NULL,
+    value VARCHAR(255) NOT NULL, -- '' = unknown
+    certificates BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (dimension, value),
+    CONSTRAINT chk_inventory_dimension CHECK (dimension IN ('issuer', 'key_size', 'signature_algorithm'))
+);
+
+-- ============================================
+-- Certificates (deduplicated by fingerprint)
+-- Every distinct certificate ever seen, stored once no matter how many
+-- domains serve it or how often it is scanned
+-- ============================================
+CREATE TABLE IF NOT EXISTS certificates (
+    fingerprint_sha256 VARCHAR(64) PRIMARY KEY,
+    common_name VARCHAR(255),
+    subject_alt_names TEXT[] NOT NULL DEFAULT '{}',
+    issuer VARCHAR(255),
+    serial_number VARCHAR(100),
+    issued_date DATE,
+    expiry_date DATE NOT NULL,
+    is_self_signed BOOLEAN DEFAULT false,
+    key_size INTEGER,
+    signature_algorithm VARCHAR(100),
+    first_seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- ============================================
+-- Domain Certificate History
+-- One row per certificate a domain served in a row: a new row is added
+-- only when the fingerprint changes, otherwise last_seen is bumped
+-- ============================================
+CREATE TABLE IF NOT EXISTS domain_certificate_history (
+    id BIGSERIAL PRIMARY KEY,
+    domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
+    fingerprint_sha256 VARCHAR(64) NOT NULL REFERENCES certificates(fingerprint_sha256),
+    first_seen TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create indexes for certificate history
+-- Timeline per domain, newest first (also finds the current row)
+CREATE INDEX idx_cert_history_domain_seen ON domain_certificate_history(domain_id, first_seen DESC, id DESC);
+CREATE INDEX idx_cert_history_fingerprint ON domain_certificate_history(fingerprint_sha256);
+
+-- ============================================
+-- Domain Certificate Status (read model)
+-- One denormalized row per scanned domain, upserted by the scanner's
+-- batch writer in the same transaction as the scan results
+-- ============================================
+CREATE TABLE IF NOT EXISTS domain_cert_status (
+    domain_id INTEGER PRIMARY KEY REFERENCES domains(id) ON DELETE CASCADE,
+    is_active BOOLEAN NOT NULL DEFAULT true, -- mirrors domains.is_active
+    last_status VARCHAR(20) NOT NULL, -- status of the latest scan: 'success', 'failed'
+    last_error TEXT,
+    -- Certificate of the latest successful scan
+    common_name VARCHAR(255),
+    issuer VARCHAR(255),
+    fingerprint_sha256 VARCHAR(64),
+    issued_date DATE,
+    expiry_date DATE,
+    is_valid BOOLEAN,
+    is_self_signed BOOLEAN,
+    key_size INTEGER,
+    expiry_bucket VARCHAR(10) NOT NULL DEFAULT 'none', -- see cert_expiry_bucket()
+    last_scanned_at TIMESTAMP NOT NULL,
+    last_success_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_cert_status_bucket CHECK (expiry_bucket IN ('expired', '1d', '7d', '14d', '30d', 'ok', 'none'))
+);
+
+-- Create indexes for certificate status
+-- SSL status / "expiring within N days" filters (index range scan on expiry)
+CREATE INDEX idx_cert_status_valid_expiry ON domain_cert_status(is_valid, expiry_date);
+CREATE INDEX idx_cert_status_active_bucket ON domain_cert_status(expiry_bucket) WHERE is_active;
+-- Expiry histogram (index-only range scan on upcoming expiries)
+CREATE INDEX idx_cert_status_active_expiry ON domain_cert_status(expiry_date) INCLUDE (issuer) WHERE is_active;
+-- Bulk scan filters (POST /api/scan/domains)
+CREATE INDEX idx_cert_status_active_issuer ON domain_cert_status(issuer) WHERE is_active;
+CREATE INDEX idx_cert_status_active_failed ON domain_cert_status(domain_id) WHERE is_active AND last_status = 'failed';
 
 -- ============================================
--- Scan Results Table
+-- Dashboard Counters
+-- Single row of fleet totals behind GET /api/dashboard/summary, kept
+-- current by statement-level triggers on domains and domain_cert_status
+-- ============================================
+CREATE TABLE IF NOT EXISTS dashboard_counters (
+    id INTEGER PRIMARY KEY DEFAULT 1,
+    total_domains BIGINT NOT NULL DEFAULT 0, -- active domains
+    ssl_valid_count BIGINT NOT NULL DEFAULT 0, -- active, valid certificate
+    expired_soon_count BIGINT NOT NULL DEFAULT 0, -- active, valid, expiring within 7 days
+    failed_count BIGINT NOT NULL DEFAULT 0, -- active, last scan failed or certificate invalid
+    last_scan_time TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT chk_dashboard_counters_single_row CHECK (id = 1)
+);
+
+INSERT INTO dashboard_counters (id) VALUES (1) ON CONFLICT DO NOTHING;
+
+-- ============================================
+-- Fleet Daily Stats
+-- Active domains per day by health, issuer and key size class, behind
+-- GET /api/reports/trends. Today's rows are kept current by a trigger on
+-- domain_cert_status; earlier days are frozen once the date rolls over.
+-- ============================================
+CREATE TABLE IF NOT EXISTS fleet_daily_stats (
+    day DATE NOT NULL,
+    health VARCHAR(10) NOT NULL, -- see fleet_health()
+    issuer VARCHAR(255) NOT NULL DEFAULT '', -- '' = unknown
+    key_size_class VARCHAR(10) NOT NULL, -- see key_size_class()
+    domains BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (day, health, issuer, key_size_class),
+    CONSTRAINT chk_fleet_daily_health CHECK (health IN ('valid', 'expiring', 'invalid', 'failed'))
+);
+
+-- ============================================
+-- Scan Results Table (partitioned by month on started_at)
 -- ============================================
 CREATE TABLE IF NOT EXISTS scan_results (
-    id SERIAL PRIMARY KEY,
+    id BIGSERIAL,
     domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
     scan_type VARCHAR(50) NOT NULL, -- 'ssl', 'http_redirect', 'certificate_chain'
     status VARCHAR(20) NOT NULL, -- 'pending', 'running', 'success', 'failed'
-    result_data JSONB,
+    result_data JSONB, -- summary: fingerprint_sha256, days_until_expiry (details live in certificates)
     error_message TEXT,
-    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     completed_at TIMESTAMP,
     duration_seconds FLOAT,
     
+    PRIMARY KEY (id, started_at),
     CONSTRAINT chk_scan_type CHECK (scan_type IN ('ssl', 'http_redirect', 'certificate_chain')),
     CONSTRAINT chk_scan_status CHECK (status IN ('pending', 'running', 'success', 'failed'))
+) PARTITION BY RANGE (started_at);
+
+-- Safety net for rows outside the pre-created months (should stay empty)
+CREATE TABLE IF NOT EXISTS scan_results_default PARTITION OF scan_results DEFAULT;
+
+-- Create indexes for scan results (inherited by every partition).
+-- Time filtering is handled by partition pruning, so only the per-domain
+-- history lookup and the small pending/running work set are indexed.
+CREATE INDEX idx_scan_results_domain_started ON scan_results(domain_id, started_at DESC);
+CREATE INDEX idx_scan_results_open ON scan_results(status) WHERE status IN ('pending', 'running');
+
+-- ============================================
+-- Scan Results Daily Rollup
+-- Compact per-domain summary of compacted (dropped) partitions
+-- ============================================
+CREATE TABLE IF NOT EXISTS scan_results_daily (
+    domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    scan_count INTEGER NOT NULL DEFAULT 0,
+    success_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    min_days_until_expiry INTEGER,
+    last_status VARCHAR(20),
+    first_scan_at TIMESTAMP,
+    last_scan_at TIMESTAMP,
+    
+    PRIMARY KEY (domain_id, day)
 );
 
--- Create indexes for scan results
-CREATE INDEX idx_scan_results_domain_id ON scan_results(domain_id);
-CREATE INDEX idx_scan_results_status ON scan_results(status);
-CREATE INDEX idx_scan_results_scan_type ON scan_results(scan_type);
-CREATE INDEX idx_scan_results_started_at ON scan_results(started_at);
+CREATE INDEX idx_scan_results_daily_day ON scan_results_daily(day);
+
+-- Archived partitions are moved here when SCAN_RESULTS_ARCHIVE=true
+CREATE SCHEMA IF NOT EXISTS scan_archive;
+
+-- ============================================
+-- Scan Runs Table
+-- ============================================
+CREATE TABLE IF NOT EXISTS scan_runs (
+    id SERIAL PRIMARY KEY,
+    source VARCHAR(20) NOT NULL DEFAULT 'scanner', -- 'scanner', 'shell'
+    status VARCHAR(20) NOT NULL DEFAULT 'running', -- 'running', 'completed', 'failed'
+    total_domains INTEGER NOT NULL DEFAULT 0,
+    completed_count INTEGER NOT NULL DEFAULT 0, -- success + failed
+    success_count INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    domains_per_second FLOAT,
+    eta_seconds INTEGER,
+    error_message TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+
+    CONSTRAINT chk_scan_run_source CHECK (source IN ('scanner', 'shell')),
+    CONSTRAINT chk_scan_run_status CHECK (status IN ('running', 'completed', 'failed')),
+    CONSTRAINT chk_scan_run_counts CHECK (completed_count = success_count + failed_count)
+);
+
+-- Create indexes for scan runs
+CREATE INDEX idx_scan_runs_started_at ON scan_runs(started_at DESC);
+CREATE INDEX idx_scan_runs_status ON scan_runs(status);
+
+-- ============================================
+-- Scan Queue Table
+-- ============================================
+-- Domains requested for scanning ahead of the regular sweep. One row per
+-- domain: re-requesting keeps the original position and raises priority.
+-- The scanner claims rows with FOR UPDATE SKIP LOCKED and deletes them.
+CREATE TABLE IF NOT EXISTS scan_queue (
+    domain_id INTEGER PRIMARY KEY REFERENCES domains(id) ON DELETE CASCADE,
+    priority SMALLINT NOT NULL DEFAULT 0, -- higher first
+    requested_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    requested_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX idx_scan_queue_order ON scan_queue(priority DESC, requested_at);
 
 -- ============================================
 -- Alerts Table
@@ -133,11 +401,11 @@ CREATE INDEX idx_scan_results_started_at ON scan_results(started_at);
 CREATE TABLE IF NOT EXISTS alerts (
     id SERIAL PRIMARY KEY,
     domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
-    alert_type VARCHAR(100) NOT NULL, -- 'cert_expiry', 'cert_revoked', 'weak_encryption'
+    alert_type VARCHAR(100) NOT NULL, -- 'cert_expiry', 'cert_invalid', 'self_signed', 'key_downgrade'
     severity VARCHAR(20) NOT NULL DEFAULT 'medium', -- 'low', 'medium', 'high', 'critical'
     title VARCHAR(255) NOT NULL,
     description TEXT,
-    is_resolved BOOLEAN DEFAULT false,
+    is_resolved BOOLEAN NOT NULL DEFAULT false,
     resolved_at TIMESTAMP,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
@@ -150,6 +418,8 @@ CREATE INDEX idx_alerts_alert_type ON alerts(alert_type);
 CREATE INDEX idx_alerts_severity ON alerts(severity);
 CREATE INDEX idx_alerts_is_resolved ON alerts(is_resolved);
 CREATE INDEX idx_alerts_created_at ON alerts(created_at);
+-- At most one open alert per domain and type (scanner upserts against it)
+CREATE UNIQUE INDEX idx_alerts_open ON alerts(domain_id, alert_type) WHERE NOT is_resolved;
 
 -- ============================================
 -- Audit Logs Table
@@ -180,10 +450,14 @@ CREATE TABLE IF NOT EXISTS cert_expiry_notifications (
     id SERIAL PRIMARY KEY,
     certificate_id INTEGER NOT NULL REFERENCES ssl_certificates(id) ON DELETE CASCADE,
     domain_id INTEGER NOT NULL REFERENCES domains(id) ON DELETE CASCADE,
+    fingerprint_sha256 VARCHAR(64) NOT NULL, -- certificate the threshold was crossed for
     days_until_expiry INTEGER,
     notification_type VARCHAR(50) NOT NULL, -- '30days', '14days', '7days', '1day'
     sent_at TIMESTAMP,
     is_sent BOOLEAN DEFAULT false,
+    attempts INTEGER NOT NULL DEFAULT 0, -- dispatch runs that missed a recipient
+    failed_at TIMESTAMP, -- given up after NOTIFY_MAX_ATTEMPTS runs
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     
     CONSTRAINT chk_notification_type CHECK (notification_type IN ('30days', '14days', '7days', '1day'))
 );
@@ -191,6 +465,18 @@ CREATE TABLE IF NOT EXISTS cert_expiry_notifications (
 -- Create indexes for notifications
 CREATE INDEX idx_cert_expiry_domain_id ON cert_expiry_notifications(domain_id);
 CREATE INDEX idx_cert_expiry_is_sent ON cert_expiry_notifications(is_sent);
+-- One notification per certificate and threshold, however often it is scanned
+CREATE UNIQUE INDEX idx_cert_expiry_once ON cert_expiry_notifications(domain_id, fingerprint_sha256, notification_type);
+
+-- Recipients a notification was delivered to ('webhook:<url>' or
+-- 'email:<address>'), so a retry only goes to the recipients that failed
+CREATE TABLE IF NOT EXISTS notification_deliveries (
+    notification_id INTEGER NOT NULL REFERENCES cert_expiry_notifications(id) ON DELETE CASCADE,
+    recipient TEXT NOT NULL,
+    delivered_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (notification_id, recipient)
+);
 
 -- ============================================
 -- API Usage Metrics Table
@@ -231,6 +517,472 @@ CREATE TRIGGER update_domains_timestamp
     FOR EACH ROW
     EXECUTE FUNCTION update_timestamp();
 
+CREATE TRIGGER update_cert_status_timestamp
+    BEFORE UPDATE ON domain_cert_status
+    FOR EACH ROW
+    EXECUTE FUNCTION update_timestamp();
+
+-- ============================================
+-- Domain Certificate Status Maintenance
+-- ============================================
+-- Expiry bucket of a certificate as of a given day
+CREATE OR REPLACE FUNCTION cert_expiry_bucket(expiry DATE, as_of DATE)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN expiry IS NULL THEN 'none'
+        WHEN expiry < as_of THEN 'expired'
+        WHEN expiry <= as_of + 1 THEN '1d'
+        WHEN expiry <= as_of + 7 THEN '7d'
+        WHEN expiry <= as_of + 14 THEN '14d'
+        WHEN expiry <= as_of + 30 THEN '30d'
+        ELSE 'ok'
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Keep domain_cert_status.is_active in sync with domains. Statement level,
+-- so bulk (de)activation is one UPDATE however many rows it touches.
+CREATE OR REPLACE FUNCTION sync_cert_status_active()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE domain_cert_status s
+    SET is_active = n.is_active
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id
+    WHERE s.domain_id = n.id
+      AND o.is_active IS DISTINCT FROM n.is_active;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER sync_domains_cert_status_active
+    AFTER UPDATE ON domains
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION sync_cert_status_active();
+
+-- Move certificates into the next bucket as days pass. Only rows expiring
+-- within the widest bucket can change. Returns the moved rows with their
+-- previous bucket, so the scanner can raise the thresholds they crossed
+-- (a later scan sees the new bucket already and would not).
+CREATE OR REPLACE FUNCTION refresh_expiry_buckets()
+RETURNS TABLE (domain_id INTEGER, previous_bucket VARCHAR) AS $$
+    WITH moved AS (
+        SELECT s.domain_id, s.expiry_bucket
+        FROM domain_cert_status s
+        WHERE s.expiry_date <= CURRENT_DATE + 31
+          AND s.expiry_bucket IS DISTINCT FROM cert_expiry_bucket(s.expiry_date, CURRENT_DATE)
+        ORDER BY s.domain_id
+        FOR UPDATE
+    )
+    UPDATE domain_cert_status s
+    SET expiry_bucket = cert_expiry_bucket(s.expiry_date, CURRENT_DATE)
+    FROM moved m
+    WHERE s.domain_id = m.domain_id
+    RETURNING s.domain_id, m.expiry_bucket;
+$$ LANGUAGE sql;
+
+-- ============================================
+-- Dashboard Counter Maintenance
+-- ============================================
+-- Apply the net change of one statement on domains (transition tables
+-- old_rows / new_rows) to dashboard_counters.total_domains
+CREATE OR REPLACE FUNCTION apply_domain_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+    delta BIGINT := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT delta + COUNT(*) FILTER (WHERE is_active) INTO delta FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT delta - COUNT(*) FILTER (WHERE is_active) INTO delta FROM old_rows;
+    END IF;
+
+    IF delta <> 0 THEN
+        UPDATE dashboard_counters
+        SET total_domains = total_domains + delta,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER domains_counters_insert
+    AFTER INSERT ON domains
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_domain_counters();
+
+CREATE TRIGGER domains_counters_update
+    AFTER UPDATE ON domains
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_domain_counters();
+
+CREATE TRIGGER domains_counters_delete
+    AFTER DELETE ON domains
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_domain_counters();
+
+-- Same for certificate states in domain_cert_status. A scanner batch,
+-- bucket refresh or is_active sync costs one counter update per statement.
+CREATE OR REPLACE FUNCTION apply_cert_status_counters()
+RETURNS TRIGGER AS $$
+DECLARE
+    d_valid BIGINT := 0;
+    d_soon BIGINT := 0;
+    d_failed BIGINT := 0;
+    scanned TIMESTAMP;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT d_valid + COUNT(*) FILTER (WHERE is_active AND is_valid),
+               d_soon + COUNT(*) FILTER (WHERE is_active AND is_valid AND expiry_bucket IN ('1d', '7d')),
+               d_failed + COUNT(*) FILTER (WHERE is_active AND (last_status = 'failed' OR NOT is_valid)),
+               MAX(last_scanned_at)
+        INTO d_valid, d_soon, d_failed, scanned
+        FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT d_valid - COUNT(*) FILTER (WHERE is_active AND is_valid),
+               d_soon - COUNT(*) FILTER (WHERE is_active AND is_valid AND expiry_bucket IN ('1d', '7d')),
+               d_failed - COUNT(*) FILTER (WHERE is_active AND (last_status = 'failed' OR NOT is_valid))
+        INTO d_valid, d_soon, d_failed
+        FROM old_rows;
+    END IF;
+
+    IF d_valid <> 0 OR d_soon <> 0 OR d_failed <> 0 OR scanned IS NOT NULL THEN
+        UPDATE dashboard_counters
+        SET ssl_valid_count = ssl_valid_count + d_valid,
+            expired_soon_count = expired_soon_count + d_soon,
+            failed_count = failed_count + d_failed,
+            last_scan_time = GREATEST(last_scan_time, scanned),
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cert_status_counters_insert
+    AFTER INSERT ON domain_cert_status
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_cert_status_counters();
+
+CREATE TRIGGER cert_status_counters_update
+    AFTER UPDATE ON domain_cert_status
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_cert_status_counters();
+
+CREATE TRIGGER cert_status_counters_delete
+    AFTER DELETE ON domain_cert_status
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_cert_status_counters();
+
+-- Recompute dashboard_counters from scratch (initial load or repair)
+CREATE OR REPLACE FUNCTION recount_dashboard_counters()
+RETURNS VOID AS $$
+BEGIN
+    UPDATE dashboard_counters c
+    SET total_domains = (SELECT COUNT(*) FROM domains WHERE is_active),
+        ssl_valid_count = s.valid,
+        expired_soon_count = s.soon,
+        failed_count = s.failed,
+        last_scan_time = s.scanned,
+        updated_at = CURRENT_TIMESTAMP
+    FROM (
+        SELECT COUNT(*) FILTER (WHERE is_active AND is_valid) AS valid,
+               COUNT(*) FILTER (WHERE is_active AND is_valid AND expiry_bucket IN ('1d', '7d')) AS soon,
+               COUNT(*) FILTER (WHERE is_active AND (last_status = 'failed' OR NOT is_valid)) AS failed,
+               MAX(last_scanned_at) AS scanned
+        FROM domain_cert_status
+    ) s
+    WHERE c.id = 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Certificate Inventory Maintenance
+-- ============================================
+-- Apply the net change of one ssl_certificates statement: one upsert per
+-- (dimension, value) touched; rescans of the same certificate cancel out
+CREATE OR REPLACE FUNCTION apply_certificate_inventory()
+RETURNS TRIGGER AS $$
+DECLARE
+    source TEXT;
+BEGIN
+    source := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT *, 1 AS delta FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT *, -1 AS delta FROM old_rows'
+        ELSE 'SELECT *, 1 AS delta FROM new_rows UNION ALL SELECT *, -1 FROM old_rows'
+    END;
+
+    EXECUTE format($q$
+        INSERT INTO certificate_inventory AS i (dimension, value, certificates)
+        SELECT v.dimension, v.value, SUM(r.delta)
+        FROM (%s) r
+        CROSS JOIN LATERAL (VALUES
+            ('issuer', COALESCE(r.issuer, '')),
+            ('key_size', COALESCE(r.key_size::TEXT, '')),
+            ('signature_algorithm', COALESCE(r.signature_algorithm, ''))
+        ) AS v(dimension, value)
+        GROUP BY v.dimension, v.value
+        HAVING SUM(r.delta) <> 0
+        ON CONFLICT (dimension, value) DO UPDATE
+        SET certificates = i.certificates + EXCLUDED.certificates,
+            updated_at = CURRENT_TIMESTAMP
+    $q$, source);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER certs_inventory_insert
+    AFTER INSERT ON ssl_certificates
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_certificate_inventory();
+
+CREATE TRIGGER certs_inventory_update
+    AFTER UPDATE ON ssl_certificates
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_certificate_inventory();
+
+CREATE TRIGGER certs_inventory_delete
+    AFTER DELETE ON ssl_certificates
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_certificate_inventory();
+
+-- Recompute certificate_inventory from scratch (initial load or repair)
+CREATE OR REPLACE FUNCTION recount_certificate_inventory()
+RETURNS VOID AS $$
+BEGIN
+    LOCK TABLE ssl_certificates IN SHARE MODE;
+    DELETE FROM certificate_inventory;
+    INSERT INTO certificate_inventory (dimension, value, certificates)
+    SELECT v.dimension, v.value, COUNT(*)
+    FROM ssl_certificates c
+    CROSS JOIN LATERAL (VALUES
+        ('issuer', COALESCE(c.issuer, '')),
+        ('key_size', COALESCE(c.key_size::TEXT, '')),
+        ('signature_algorithm', COALESCE(c.signature_algorithm, ''))
+    ) AS v(dimension, value)
+    GROUP BY v.dimension, v.value;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Fleet Daily Stats Maintenance
+-- ============================================
+-- Health of a domain_cert_status row, consistent with the dashboard:
+-- a failing scan wins over the state of the last known certificate
+CREATE OR REPLACE FUNCTION fleet_health(last_status TEXT, is_valid BOOLEAN, expiry_bucket TEXT)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN last_status = 'failed' OR expiry_bucket = 'none' THEN 'failed'
+        WHEN expiry_bucket = 'expired' OR NOT is_valid THEN 'invalid'
+        WHEN expiry_bucket IN ('1d', '7d', '14d', '30d') THEN 'expiring'
+        ELSE 'valid'
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- EC curves report their size in bits (256/384/521), RSA its modulus
+CREATE OR REPLACE FUNCTION key_size_class(key_size INTEGER)
+RETURNS VARCHAR AS $$
+    SELECT CASE
+        WHEN key_size IS NULL THEN 'unknown'
+        WHEN key_size <= 521 THEN 'ec'
+        WHEN key_size < 2048 THEN 'rsa<2048'
+        WHEN key_size < 3072 THEN 'rsa2048'
+        WHEN key_size < 4096 THEN 'rsa3072'
+        ELSE 'rsa4096+'
+    END
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Start a day's rows from the latest earlier day (no-op once started)
+CREATE OR REPLACE FUNCTION open_fleet_day(target DATE)
+RETURNS VOID AS $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM fleet_daily_stats WHERE day = target) THEN
+        INSERT INTO fleet_daily_stats (day, health, issuer, key_size_class, domains)
+        SELECT target, health, issuer, key_size_class, domains
+        FROM fleet_daily_stats
+        WHERE day = (SELECT MAX(day) FROM fleet_daily_stats WHERE day < target)
+          AND domains <> 0
+        ON CONFLICT DO NOTHING;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Apply the net change of one domain_cert_status statement to today's
+-- rows: one upsert per (health, issuer, key size class) group touched.
+-- Rescans that change nothing cancel out and write nothing.
+CREATE OR REPLACE FUNCTION apply_fleet_daily_stats()
+RETURNS TRIGGER AS $$
+DECLARE
+    source TEXT;
+BEGIN
+    source := CASE TG_OP
+        WHEN 'INSERT' THEN 'SELECT *, 1 AS delta FROM new_rows'
+        WHEN 'DELETE' THEN 'SELECT *, -1 AS delta FROM old_rows'
+        ELSE 'SELECT *, 1 AS delta FROM new_rows UNION ALL SELECT *, -1 FROM old_rows'
+    END;
+
+    PERFORM open_fleet_day(CURRENT_DATE);
+
+    EXECUTE format($q$
+        INSERT INTO fleet_daily_stats AS f (day, health, issuer, key_size_class, domains)
+        SELECT CURRENT_DATE,
+               fleet_health(r.last_status, r.is_valid, r.expiry_bucket),
+               COALESCE(r.issuer, ''),
+               key_size_class(r.key_size),
+               SUM(r.delta)
+        FROM (%s) r
+        WHERE r.is_active
+        GROUP BY 2, 3, 4
+        HAVING SUM(r.delta) <> 0
+        ON CONFLICT (day, health, issuer, key_size_class) DO UPDATE
+        SET domains = f.domains + EXCLUDED.domains,
+            updated_at = CURRENT_TIMESTAMP
+    $q$, source);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER cert_status_fleet_stats_insert
+    AFTER INSERT ON domain_cert_status
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_fleet_daily_stats();
+
+CREATE TRIGGER cert_status_fleet_stats_update
+    AFTER UPDATE ON domain_cert_status
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_fleet_daily_stats();
+
+CREATE TRIGGER cert_status_fleet_stats_delete
+    AFTER DELETE ON domain_cert_status
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION apply_fleet_daily_stats();
+
+-- Rebuild fleet_daily_stats from from_day on (initial load or repair).
+-- Past days are replayed from the last scan of each domain per day in
+-- scan_results, so they only reach back as far as the raw partitions
+-- kept by compaction. Historic chain validity is not recorded, so replayed
+-- certificates count as valid until they expire, and failed scans carry
+-- no issuer. Today is recounted exactly from domain_cert_status.
+CREATE OR REPLACE FUNCTION backfill_fleet_daily_stats(from_day DATE)
+RETURNS INTEGER AS $$
+DECLARE
+    written INTEGER;
+    today_rows INTEGER;
+BEGIN
+    -- Hold off scanner batches so today's recount is not double-applied
+    LOCK TABLE domain_cert_status IN SHARE MODE;
+
+    DELETE FROM fleet_daily_stats WHERE day >= from_day;
+
+    INSERT INTO fleet_daily_stats (day, health, issuer, key_size_class, domains)
+    WITH daily AS (
+        SELECT DISTINCT ON (r.domain_id, r.started_at::DATE)
+               r.domain_id, r.started_at::DATE AS day, r.status,
+               r.result_data->>'fingerprint_sha256' AS fingerprint
+        FROM scan_results r
+        WHERE r.started_at < CURRENT_DATE
+        ORDER BY r.domain_id, r.started_at::DATE, r.started_at DESC
+    ),
+    spans AS (
+        SELECT d.*,
+               LEAD(d.day, 1, CURRENT_DATE) OVER (PARTITION BY d.domain_id ORDER BY d.day) AS until
+        FROM daily d
+    )
+    SELECT g.day::DATE,
+           fleet_health(s.status, true, cert_expiry_bucket(c.expiry_date, g.day::DATE)),
+           COALESCE(c.issuer, ''),
+           key_size_class(c.key_size),
+           COUNT(*)
+    FROM spans s
+    JOIN domains dm ON dm.id = s.domain_id AND dm.is_active
+    LEFT JOIN certificates c ON c.fingerprint_sha256 = s.fingerprint
+    CROSS JOIN LATERAL generate_series(GREATEST(s.day, from_day), s.until - 1, INTERVAL '1 day') AS g(day)
+    GROUP BY 1, 2, 3, 4;
+    GET DIAGNOSTICS written = ROW_COUNT;
+
+    INSERT INTO fleet_daily_stats (day, health, issuer, key_size_class, domains)
+    SELECT CURRENT_DATE,
+           fleet_health(last_status, is_valid, expiry_bucket),
+           COALESCE(issuer, ''),
+           key_size_class(key_size),
+           COUNT(*)
+    FROM domain_cert_status
+    WHERE is_active
+    GROUP BY 2, 3, 4;
+    GET DIAGNOSTICS today_rows = ROW_COUNT;
+
+    RETURN written + today_rows;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Live Scan Events
+-- ============================================
+-- Publish scan run progress to the backend's SSE stream (LISTEN
+-- scan_progress). Fires for every writer of scan_runs, including the
+-- shell scanner; NOTIFY is only delivered once the transaction commits.
+CREATE OR REPLACE FUNCTION notify_scan_progress()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('scan_progress', json_build_object(
+        'id', NEW.id,
+        'source', NEW.source,
+        'status', NEW.status,
+        'total_domains', NEW.total_domains,
+        'completed_count', NEW.completed_count,
+        'success_count', NEW.success_count,
+        'failed_count', NEW.failed_count,
+        'progress_percent', CASE WHEN NEW.total_domains > 0
+            THEN round(NEW.completed_count * 100.0 / NEW.total_domains, 2)
+            ELSE 100.0 END,
+        'domains_per_second', NEW.domains_per_second,
+        'eta_seconds', NEW.eta_seconds,
+        'error_message', NEW.error_message,
+        'started_at', NEW.started_at,
+        'updated_at', NEW.updated_at,
+        'finished_at', NEW.finished_at
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER scan_runs_notify_progress
+    AFTER INSERT OR UPDATE ON scan_runs
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_scan_progress();
+
+-- ============================================
+-- Token Revocation Version
+-- ============================================
+-- Statement level: revoking many tokens at once is one bump
+CREATE OR REPLACE FUNCTION bump_auth_revocation_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE auth_revocation_state SET version = version + 1 WHERE id = 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER revoked_tokens_bump_version
+    AFTER INSERT ON revoked_tokens
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_auth_revocation_version();
+
 -- ============================================
 -- Create Function to Cleanup Expired Sessions
 -- ============================================
@@ -239,9 +991,123 @@ RETURNS void AS $$
 BEGIN
     DELETE FROM user_sessions
     WHERE expires_at < CURRENT_TIMESTAMP;
+
+    -- Expired tokens are rejected by their exp claim alone
+    DELETE FROM revoked_tokens
+    WHERE expires_at < CURRENT_TIMESTAMP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ============================================
+-- Scan Results Partition Maintenance
+-- ============================================
+-- Create monthly partitions scan_results_YYYYMM from the current month
+-- up to months_ahead months in the future. Returns the number created.
+CREATE OR REPLACE FUNCTION ensure_scan_results_partitions(months_ahead INTEGER DEFAULT 2)
+RETURNS INTEGER AS $$
+DECLARE
+    month_start DATE;
+    partition_name TEXT;
+    created INTEGER := 0;
+BEGIN
+    FOR i IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', CURRENT_DATE) + make_interval(months => i))::DATE;
+        partition_name := 'scan_results_' || to_char(month_start, 'YYYYMM');
+
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF scan_results FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start,
+                (month_start + INTERVAL '1 month')::DATE
+            );
+            created := created + 1;
+        END IF;
+    END LOOP;
+
+    RETURN created;
 END;
 $$ LANGUAGE plpgsql;
 
+-- Fold scan_results rows of one partition into scan_results_daily.
+-- Each partition is rolled up exactly once, right before it is detached.
+CREATE OR REPLACE FUNCTION rollup_scan_results_partition(partition_name TEXT)
+RETURNS INTEGER AS $$
+DECLARE
+    rolled_up INTEGER;
+BEGIN
+    EXECUTE format($q$
+        INSERT INTO scan_results_daily AS d
+            (domain_id, day, scan_count, success_count, failed_count,
+             min_days_until_expiry, last_status, first_scan_at, last_scan_at)
+        SELECT
+            domain_id,
+            started_at::DATE,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE status = 'success'),
+            COUNT(*) FILTER (WHERE status = 'failed'),
+            MIN((result_data->>'days_until_expiry')::INTEGER),
+            (ARRAY_AGG(status ORDER BY started_at DESC))[1],
+            MIN(started_at),
+            MAX(started_at)
+        FROM %I
+        GROUP BY domain_id, started_at::DATE
+        ON CONFLICT (domain_id, day) DO UPDATE SET
+            scan_count = d.scan_count + EXCLUDED.scan_count,
+            success_count = d.success_count + EXCLUDED.success_count,
+            failed_count = d.failed_count + EXCLUDED.failed_count,
+            min_days_until_expiry = LEAST(d.min_days_until_expiry, EXCLUDED.min_days_until_expiry),
+            last_status = CASE WHEN EXCLUDED.last_scan_at >= d.last_scan_at
+                               THEN EXCLUDED.last_status ELSE d.last_status END,
+            first_scan_at = LEAST(d.first_scan_at, EXCLUDED.first_scan_at),
+            last_scan_at = GREATEST(d.last_scan_at, EXCLUDED.last_scan_at)
+    $q$, partition_name);
+
+    GET DIAGNOSTICS rolled_up = ROW_COUNT;
+    RETURN rolled_up;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Roll up and detach every monthly partition older than retention_months.
+-- Detached partitions are dropped, or moved to the scan_archive schema
+-- when archive is true.
+CREATE OR REPLACE FUNCTION compact_scan_results(retention_months INTEGER, archive BOOLEAN DEFAULT false)
+RETURNS TABLE(partition_name TEXT, daily_rows INTEGER, action TEXT) AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', CURRENT_DATE) - make_interval(months => retention_months))::DATE;
+    part RECORD;
+BEGIN
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE i.inhparent = 'scan_results'::regclass
+          AND n.nspname = current_schema()
+          AND c.relname ~ '^scan_results_[0-9]{6}$'
+          AND to_date(right(c.relname, 6), 'YYYYMM') < cutoff
+        ORDER BY c.relname
+    LOOP
+        partition_name := part.relname;
+        daily_rows := rollup_scan_results_partition(part.relname);
+
+        EXECUTE format('ALTER TABLE scan_results DETACH PARTITION %I', part.relname);
+
+        IF archive THEN
+            EXECUTE format('ALTER TABLE %I SET SCHEMA scan_archive', part.relname);
+            action := 'archived';
+        ELSE
+            EXECUTE format('DROP TABLE %I', part.relname);
+            action := 'dropped';
+        END IF;
+
+        RETURN NEXT;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_scan_results_partitions(2);
+
 -- ============================================
 -- Create Initial Admin User (CHANGE PASSWORD!)
 -- ============================================
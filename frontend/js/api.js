@@ -93,8 +93,10 @@ async function triggerDomainsScan(domainIds) {
 
 // Export API
 function exportCSV(sslStatus = null) {
-    const url = sslStatus
-        ? `${API_BASE_URL}/export/csv?ssl_status=${sslStatus}`
-        : `${API_BASE_URL}/export/csv`;
-    window.location.href = url;
+    // A navigation cannot send the Authorization header; pass the token instead
+    const params = new URLSearchParams({ token: getAuthToken() || '' });
+    if (sslStatus) {
+        params.append('ssl_status', sslStatus);
+    }
+    window.location.href = `${API_BASE_URL}/export/csv?${params}`;
 }
@@ -70,13 +70,13 @@ async function login(username, password) {
         }
 
         // Save token and user
-        setAuthToken(data.token);
+        setAuthToken(data.access_token);
         setCurrentUser(data.user);
 
         return {
             success: true,
             user: data.user,
-            token: data.token
+            token: data.access_token
         };
     } catch (error) {
         console.error('Login error:', error);
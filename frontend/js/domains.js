@@ -240,7 +240,7 @@ async function bulkAddDomains() {
         });
 
         const result = await response.json();
-        alert(`Success!\nAdded: ${result.total_added}\nFailed: ${result.total_failed}`);
+        alert(`Success!\nAdded: ${result.added}\nDuplicates: ${result.duplicates}\nInvalid: ${result.invalid}`);
 
         $('#bulkAddModal').modal('hide');
         document.getElementById('bulkDomains').value = '';
@@ -327,14 +327,17 @@ async function bulkDeleteDomains() {
 
         if (response.ok) {
             const result = await response.json();
-            let message = `Successfully deleted ${result.deleted_count} domains!`;
+            let message = `Successfully deleted ${result.affected} domains!`;
 
-            if (result.not_found_domains && result.not_found_domains.length > 0) {
-                message += `\n\nNot found (${result.not_found_domains.length}):\n${result.not_found_domains.slice(0, 10).join('\n')}`;
-                if (result.not_found_domains.length > 10) {
-                    message += `\n... and ${result.not_found_domains.length - 10} more`;
+            if (result.unchanged_names && result.unchanged_names.length > 0) {
+                message += `\n\nNot found or already deleted (${result.unchanged_names.length}):\n${result.unchanged_names.slice(0, 10).join('\n')}`;
+                if (result.unchanged_names.length > 10) {
+                    message += `\n... and ${result.unchanged_names.length - 10} more`;
                 }
             }
+            if (result.invalid > 0) {
+                message += `\n\nInvalid names: ${result.invalid}`;
+            }
 
             alert(message);
             $('#bulkDeleteModal').modal('hide');
@@ -550,11 +553,13 @@ function refreshData() {
 
 function exportCSV() {
     const sslStatus = document.getElementById('sslStatusFilter')?.value;
-    const url = sslStatus ?
-        `${API_BASE_URL}/export/csv?ssl_status=${sslStatus}` :
-        `${API_BASE_URL}/export/csv`;
+    // A navigation cannot send the Authorization header; pass the token instead
+    const params = new URLSearchParams({ token: getAuthToken() || '' });
+    if (sslStatus) {
+        params.append('ssl_status', sslStatus);
+    }
 
-    window.location.href = url;
+    window.location.href = `${API_BASE_URL}/export/csv?${params}`;
 }
 
 // ==================== Initialize ====================
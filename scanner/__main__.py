@@ -0,0 +1,17 @@
+"""
+Scanner CLI entry point
+`python -m scanner <command> [options]` runs the CLI without executing
+scanner.py as a script first
+"""
+import os
+import sys
+
+# The scanner modules import each other flat (`from writer import ...`), and
+# `scanner` must resolve to scanner.py rather than to this directory, which
+# `-m` registered as a namespace package
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.modules.pop("scanner", None)
+
+from cli import main
+
+sys.exit(main())
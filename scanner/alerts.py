@@ -0,0 +1,223 @@
+"""
+Alert evaluation
+Opens and resolves alerts from the before/after certificate state of each
+written scan batch, so the cost follows what changed, not the fleet size
+"""
+import logging
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import asyncpg
+
+from writer import ScanBatch
+
+logger = logging.getLogger(__name__)
+
+# Expiry bucket -> alert severity (see cert_expiry_bucket() in init.sql)
+EXPIRY_SEVERITY = {
+    "30d": "low",
+    "14d": "medium",
+    "7d": "high",
+    "1d": "critical",
+    "expired": "critical",
+}
+
+# Expiry bucket -> cert_expiry_notifications.notification_type
+EXPIRY_NOTIFICATIONS = {
+    "30d": "30days",
+    "14d": "14days",
+    "7d": "7days",
+    "1d": "1day",
+}
+
+EXPIRY_TITLES = {
+    "30d": "Certificate expires within 30 days",
+    "14d": "Certificate expires within 14 days",
+    "7d": "Certificate expires within 7 days",
+    "1d": "Certificate expires within 1 day",
+    "expired": "Certificate has expired",
+}
+
+# (domain_id, alert_type, severity, title, description)
+AlertOpen = Tuple[int, str, str, str, str]
+# (domain_id, alert_type)
+AlertResolve = Tuple[int, str]
+# (domain_id, fingerprint_sha256, days_until_expiry, notification_type)
+Notification = Tuple[int, str, int, str]
+
+# ============================================
+# Evaluation
+# ============================================
+class AlertChanges:
+    """Alert rows to open, resolve and notify for one batch"""
+
+    def __init__(self):
+        self.opened: List[AlertOpen] = []
+        self.resolved: List[AlertResolve] = []
+        self.notifications: List[Notification] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.opened or self.resolved or self.notifications)
+
+def _invalid(status: Dict) -> bool:
+    """Certificate failed validation for a reason other than expiry"""
+    return status.get("is_valid") is False and status.get("expiry_bucket") != "expired"
+
+def evaluate(domain_id: int, previous: Optional[Dict], current: Dict, changes: AlertChanges):
+    """
+    Compare one domain's certificate status before and after a scan
+
+    Only transitions produce changes: an unchanged certificate in an
+    unchanged expiry bucket costs nothing. Failed scans keep the last
+    known certificate in domain_cert_status, so they never fire.
+
+    Args:
+        domain_id: Domain ID
+        previous: domain_cert_status row before the batch (None if first scan)
+        current: domain_cert_status row after the batch
+        changes: Collector for the resulting alert changes
+    """
+    previous = previous or {}
+    bucket = current.get("expiry_bucket")
+    fingerprint = current.get("fingerprint_sha256")
+    rotated = fingerprint != previous.get("fingerprint_sha256")
+    detail = f"Issuer: {current.get('issuer')}, expires: {current.get('expiry_date')}"
+
+    # Expiry thresholds (30/14/7/1 days, expired)
+    if bucket != previous.get("expiry_bucket") or rotated:
+        if bucket in EXPIRY_SEVERITY:
+            changes.opened.append(
+                (domain_id, "cert_expiry", EXPIRY_SEVERITY[bucket], EXPIRY_TITLES[bucket], detail)
+            )
+        elif bucket == "ok":
+            changes.resolved.append((domain_id, "cert_expiry"))
+
+        if bucket in EXPIRY_NOTIFICATIONS and fingerprint:
+            days = (current["expiry_date"] - date.today()).days
+            changes.notifications.append((domain_id, fingerprint, days, EXPIRY_NOTIFICATIONS[bucket]))
+
+    # Newly invalid (expired certificates are covered by cert_expiry)
+    invalid = _invalid(current)
+    was_invalid = _invalid(previous)
+    if invalid and not was_invalid:
+        changes.opened.append(
+            (domain_id, "cert_invalid", "high", "Certificate failed validation", detail)
+        )
+    elif was_invalid and not invalid:
+        changes.resolved.append((domain_id, "cert_invalid"))
+
+    # Self-signed
+    is_self_signed = current.get("is_self_signed")
+    if is_self_signed is True and previous.get("is_self_signed") is not True:
+        changes.opened.append(
+            (domain_id, "self_signed", "medium", "Self-signed certificate", detail)
+        )
+    elif is_self_signed is False and previous.get("is_self_signed") is True:
+        changes.resolved.append((domain_id, "self_signed"))
+
+    # Key downgrade on rotation; resolved by a later upgrade
+    key_size, previous_key_size = current.get("key_size"), previous.get("key_size")
+    if rotated and key_size and previous_key_size:
+        if key_size < previous_key_size:
+            changes.opened.append((
+                domain_id, "key_downgrade", "high", "Certificate key size decreased",
+                f"Key size dropped from {previous_key_size} to {key_size} bits. {detail}"
+            ))
+        elif key_size > previous_key_size:
+            changes.resolved.append((domain_id, "key_downgrade"))
+
+# ============================================
+# Batch Hook and Bucket Refresh
+# ============================================
+async def evaluate_alerts(conn: asyncpg.Connection, batch: ScanBatch):
+    """
+    Writer hook: apply the alert changes of a batch in bulk
+
+    Runs inside the batch transaction. Opening is idempotent through the
+    one-open-alert-per-type index (an open alert is updated in place, e.g.
+    when it escalates), and expiry notifications are queued once per
+    certificate and threshold.
+    """
+    changes = AlertChanges()
+    for domain_id, current in batch.current.items():
+        evaluate(domain_id, batch.previous.get(domain_id), current, changes)
+
+    await apply_changes(conn, changes)
+
+async def evaluate_bucket_moves(conn: asyncpg.Connection, moved: List[asyncpg.Record]):
+    """
+    Apply the alert changes of expiry buckets moved by maintenance
+
+    refresh_expiry_buckets() ages buckets between scans; the next scan
+    then sees no transition, so the thresholds crossed are evaluated
+    here, from the status before and after the move. Run in the
+    transaction that moved them.
+
+    Args:
+        conn: Database connection
+        moved: Rows of refresh_expiry_buckets() (domain_id, previous_bucket)
+    """
+    previous_buckets = {row["domain_id"]: row["previous_bucket"] for row in moved}
+    rows = await conn.fetch(
+        "SELECT * FROM domain_cert_status WHERE domain_id = ANY($1::int[]) AND is_active",
+        list(previous_buckets)
+    )
+
+    changes = AlertChanges()
+    for row in rows:
+        current = dict(row)
+        previous = dict(current, expiry_bucket=previous_buckets[row["domain_id"]])
+        evaluate(row["domain_id"], previous, current, changes)
+
+    await apply_changes(conn, changes)
+
+async def apply_changes(conn: asyncpg.Connection, changes: AlertChanges):
+    """Write opened and resolved alerts and queue notifications"""
+    if not changes:
+        return
+
+    if changes.resolved:
+        await conn.execute(
+            """
+            UPDATE alerts a
+            SET is_resolved = true, resolved_at = NOW()
+            FROM unnest($1::int[], $2::text[]) AS r(domain_id, alert_type)
+            WHERE a.domain_id = r.domain_id
+              AND a.alert_type = r.alert_type
+              AND NOT a.is_resolved
+            """,
+            [row[0] for row in changes.resolved],
+            [row[1] for row in changes.resolved]
+        )
+
+    if changes.opened:
+        await conn.execute(
+            """
+            INSERT INTO alerts AS a (domain_id, alert_type, severity, title, description)
+            SELECT * FROM unnest($1::int[], $2::text[], $3::text[], $4::text[], $5::text[])
+            ON CONFLICT (domain_id, alert_type) WHERE NOT is_resolved DO UPDATE SET
+                severity = EXCLUDED.severity,
+                title = EXCLUDED.title,
+                description = EXCLUDED.description
+            """,
+            *[list(column) for column in zip(*changes.opened)]
+        )
+
+    if changes.notifications:
+        await conn.execute(
+            """
+            INSERT INTO cert_expiry_notifications
+            (certificate_id, domain_id, fingerprint_sha256, days_until_expiry, notification_type)
+            SELECT c.id, n.domain_id, n.fingerprint_sha256, n.days_until_expiry, n.notification_type
+            FROM unnest($1::int[], $2::text[], $3::int[], $4::text[])
+                AS n(domain_id, fingerprint_sha256, days_until_expiry, notification_type)
+            JOIN ssl_certificates c ON c.domain_id = n.domain_id
+            ON CONFLICT (domain_id, fingerprint_sha256, notification_type) DO NOTHING
+            """,
+            *[list(column) for column in zip(*changes.notifications)]
+        )
+
+    logger.info(
+        f"🔔 Alerts: {len(changes.opened)} opened/updated, {len(changes.resolved)} resolved, "
+        f"{len(changes.notifications)} notifications queued"
+    )
@@ -0,0 +1,242 @@
+"""
+Scanner command line interface
+Offline bulk scanning and scan history maintenance
+
+Usage:
+    python -m scanner scan-file domains.txt > results.ndjson
+    cat domains.txt | python -m scanner scan-file - --concurrency 200
+    python -m scanner maintain --retention-months 3
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import IO, List, Optional, Tuple
+
+from scanner import SSLScanner, CONCURRENCY, TIMEOUT
+from maintenance import run_maintenance, RETENTION_MONTHS, ARCHIVE
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK_LINES = 1000
+
+# ============================================
+# Input Parsing
+# ============================================
+def parse_line(line: str) -> Optional[Tuple[Optional[int], str]]:
+    """
+    Parse one input line
+
+    Accepts a bare domain name or the `id|domain` format used by
+    selective scan files of scanner.sh. Blank lines and `#` comments
+    are skipped.
+
+    Args:
+        line: Raw input line
+
+    Returns:
+        (domain_id, domain_name) tuple, or None to skip the line
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    domain_id = None
+    if "|" in line:
+        raw_id, line = line.split("|", 1)
+        try:
+            domain_id = int(raw_id.strip())
+        except ValueError:
+            domain_id = None
+
+    domain = line.strip().rstrip(".").lower()
+    return (domain_id, domain) if domain else None
+
+def _read_lines(stream: IO[str], count: int) -> List[str]:
+    """Read up to `count` lines (runs in a worker thread)"""
+    lines = []
+    for _ in range(count):
+        line = stream.readline()
+        if not line:
+            break
+        lines.append(line)
+    return lines
+
+# ============================================
+# scan-file Command
+# ============================================
+class NDJSONScan:
+    """Stream domains through SSLScanner and emit NDJSON results"""
+
+    def __init__(
+        self,
+        scanner: SSLScanner,
+        source: IO[str],
+        sink: IO[str],
+        workers: int,
+        port: int = 443
+    ):
+        """
+        Initialize streaming scan
+
+        Args:
+            scanner: Scanner engine (no database connection needed)
+            source: Input stream of domains
+            sink: Output stream for NDJSON lines
+            workers: Number of concurrent scan workers
+            port: Port to connect to
+        """
+        self.scanner = scanner
+        self.source = source
+        self.sink = sink
+        self.workers = workers
+        self.port = port
+        # Bounded queue keeps memory constant regardless of input size
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=workers * 2)
+        self.success = 0
+        self.failed = 0
+
+    async def produce(self):
+        """Feed parsed input lines into the work queue"""
+        while True:
+            lines = await asyncio.to_thread(_read_lines, self.source, READ_CHUNK_LINES)
+            if not lines:
+                break
+            for line in lines:
+                item = parse_line(line)
+                if item:
+                    await self.queue.put(item)
+
+        for _ in range(self.workers):
+            await self.queue.put(None)
+
+    async def consume(self):
+        """Scan queued domains and write one JSON line per result"""
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                return
+
+            domain_id, domain = item
+            try:
+                result = await self.scanner.get_ssl_certificate(domain, self.port)
+            except Exception as e:
+                result = {"status": "failed", "error": str(e) or type(e).__name__}
+
+            result["domain"] = domain
+            if domain_id is not None:
+                result["domain_id"] = domain_id
+
+            if result.get("status") == "success":
+                self.success += 1
+            else:
+                self.failed += 1
+
+            self.sink.write(json.dumps(result, separators=(",", ":"), default=str) + "\n")
+            self.sink.flush()
+
+    async def run(self):
+        """Run producer and workers until the input is exhausted"""
+        consumers = [asyncio.create_task(self.consume()) for _ in range(self.workers)]
+        producer = asyncio.create_task(self.produce())
+
+        try:
+            await asyncio.gather(producer, *consumers)
+        except BaseException:
+            for task in [producer, *consumers]:
+                task.cancel()
+            raise
+
+async def scan_file(args: argparse.Namespace) -> int:
+    """Run the scan-file command"""
+    source = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    scanner = SSLScanner(concurrency=args.concurrency, timeout=args.timeout)
+    scan = NDJSONScan(scanner, source, sys.stdout, args.concurrency, args.port)
+    started = time.monotonic()
+
+    try:
+        await scan.run()
+    except BrokenPipeError:
+        # Downstream consumer went away (e.g. `| head`)
+        return 0
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    elapsed = time.monotonic() - started
+    total = scan.success + scan.failed
+    print(
+        f"✅ Scanned {total} domains in {elapsed:.1f}s - "
+        f"Success: {scan.success}, Failed: {scan.failed}, "
+        f"Throughput: {total / elapsed if elapsed > 0 else 0:.1f} domains/s",
+        file=sys.stderr
+    )
+    return 0
+
+# ============================================
+# maintain Command
+# ============================================
+async def maintain(args: argparse.Namespace) -> int:
+    """Run the maintain command"""
+    scanner = SSLScanner()
+    await scanner.connect_db()
+
+    try:
+        compacted = await run_maintenance(
+            scanner.db_pool,
+            retention_months=args.retention_months,
+            archive=args.archive
+        )
+    finally:
+        await scanner.disconnect_db()
+
+    for row in compacted:
+        print(json.dumps(row))
+    return 0
+
+# ============================================
+# Entry Point
+# ============================================
+def build_parser() -> argparse.ArgumentParser:
+    """Build argument parser"""
+    parser = argparse.ArgumentParser(prog="python -m scanner", description="SSL Monitor scanner tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan = subparsers.add_parser(
+        "scan-file",
+        help="Scan domains from a file or stdin and write NDJSON to stdout (no database)"
+    )
+    scan.add_argument("input", nargs="?", default="-", help="Input file, one domain or id|domain per line ('-' = stdin)")
+    scan.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Concurrent handshakes")
+    scan.add_argument("--port", type=int, default=443, help="Port to connect to")
+    scan.add_argument("--timeout", type=float, default=TIMEOUT, help="Per-handshake timeout in seconds")
+    scan.add_argument("--log-level", default="ERROR", help="Log level for stderr output")
+
+    maintain_cmd = subparsers.add_parser(
+        "maintain",
+        help="Create upcoming scan_results partitions and compact expired ones"
+    )
+    maintain_cmd.add_argument("--retention-months", type=int, default=RETENTION_MONTHS, help="Months of raw results to keep")
+    maintain_cmd.add_argument("--archive", action="store_true", default=ARCHIVE, help="Move expired partitions to scan_archive instead of dropping")
+    maintain_cmd.add_argument("--log-level", default="INFO", help="Log level for stderr output")
+
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """CLI main function"""
+    args = build_parser().parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        stream=sys.stderr
+    )
+
+    if args.command == "scan-file":
+        return asyncio.run(scan_file(args))
+    if args.command == "maintain":
+        return asyncio.run(maintain(args))
+
+    return 2
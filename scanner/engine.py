@@ -0,0 +1,154 @@
+"""
+SSL Handshake Engine
+Non-blocking certificate fetch and parsing shared by the scanner and the CLI
+"""
+import asyncio
+import hashlib
+import ssl
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+from cryptography import x509
+from cryptography.hazmat.backends import default_backend
+
+# ============================================
+# SSL Context
+# ============================================
+@lru_cache(maxsize=2)
+def get_ssl_context(verify: bool) -> ssl.SSLContext:
+    """
+    Get (cached) client SSL context
+
+    Building a context loads the CA bundle, so it is created once
+    per verification mode instead of once per handshake.
+
+    Args:
+        verify: Enable hostname and chain verification
+
+    Returns:
+        SSL context
+    """
+    context = ssl.create_default_context()
+
+    if not verify:
+        # Disable SSL verification for monitoring purposes
+        # We're just checking certificate existence and expiry
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    else:
+        # Full SSL verification enabled
+        context.check_hostname = True
+        context.verify_mode = ssl.CERT_REQUIRED
+
+    return context
+
+# ============================================
+# Certificate Fetch
+# ============================================
+async def fetch_der_certificate(
+    domain: str,
+    port: int = 443,
+    timeout: float = 15,
+    verify: bool = False
+) -> Optional[bytes]:
+    """
+    Perform a TLS handshake and return the peer certificate
+
+    Runs on the event loop (no thread per connection), so thousands of
+    handshakes can be in flight at once.
+
+    Args:
+        domain: Domain name (also sent as SNI)
+        port: Port number
+        timeout: Connect + handshake deadline in seconds
+        verify: Enable certificate verification
+
+    Returns:
+        DER encoded certificate, or None if the peer sent none
+
+    Raises:
+        TimeoutError: Deadline exceeded
+        ssl.SSLError: Handshake failed
+        OSError: Connection error
+    """
+    _reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(
+            domain,
+            port,
+            ssl=get_ssl_context(verify),
+            server_hostname=domain,
+            ssl_handshake_timeout=timeout
+        ),
+        timeout=timeout
+    )
+
+    try:
+        ssl_object = writer.get_extra_info("ssl_object")
+        return ssl_object.getpeercert(binary_form=True) if ssl_object else None
+    finally:
+        writer.close()
+        try:
+            await asyncio.wait_for(writer.wait_closed(), timeout=1)
+        except Exception:
+            pass
+
+# ============================================
+# Certificate Parsing
+# ============================================
+def signature_algorithm_name(cert: x509.Certificate) -> str:
+    """Signature algorithm name (e.g. sha256WithRSAEncryption), or its OID if unnamed"""
+    oid = cert.signature_algorithm_oid
+    name = getattr(oid, "_name", None)
+    return oid.dotted_string if not name or name == "Unknown OID" else name
+
+def parse_certificate(der_cert: bytes, domain: str) -> Dict:
+    """
+    Extract certificate information from DER bytes
+
+    Args:
+        der_cert: DER encoded certificate
+        domain: Domain the certificate was served for
+
+    Returns:
+        Certificate information dictionary
+    """
+    cert = x509.load_der_x509_certificate(der_cert, default_backend())
+    common_names = cert.subject.get_attributes_for_oid(x509.oid.NameOID.COMMON_NAME)
+    now = datetime.utcnow()
+
+    return {
+        "domain": domain,
+        "common_name": common_names[0].value if common_names else None,
+        "subject_alt_names": extract_san(cert),
+        "issuer": cert.issuer.rfc4514_string(),
+        "serial_number": str(cert.serial_number),
+        "issued_date": cert.not_valid_before.isoformat(),
+        "expiry_date": cert.not_valid_after.isoformat(),
+        "is_self_signed": cert.issuer == cert.subject,
+        "key_size": cert.public_key().key_size,
+        "signature_algorithm": signature_algorithm_name(cert),
+        "fingerprint_sha256": hashlib.sha256(der_cert).hexdigest(),
+        "is_valid": is_certificate_valid(cert),
+        "days_until_expiry": (cert.not_valid_after - now).days,
+        "scanned_at": now.isoformat(),
+        "status": "success"
+    }
+
+def is_certificate_valid(cert) -> bool:
+    """Check if certificate is within its validity period"""
+    try:
+        now = datetime.utcnow()
+        return cert.not_valid_before <= now <= cert.not_valid_after
+    except Exception:
+        return False
+
+def extract_san(cert) -> List[str]:
+    """Extract Subject Alternative Names"""
+    try:
+        san_ext = cert.extensions.get_extension_for_oid(
+            x509.oid.ExtensionOID.SUBJECT_ALTERNATIVE_NAME
+        )
+        return [str(name.value) for name in san_ext.value]
+    except Exception:
+        return []
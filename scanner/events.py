@@ -0,0 +1,56 @@
+"""
+Live scan events
+Publishes a summary of every saved result to the backend's SSE stream
+"""
+import asyncpg
+
+from writer import ScanBatch
+
+# Domain summaries per notification: a batch commits all of its
+# notifications at once, so fewer, larger ones keep the burst that
+# listeners must buffer small. Even at maximum field lengths (about 1KB
+# each with truncated error and issuer), five summaries stay below the
+# 8000-byte NOTIFY payload limit.
+RESULTS_PER_EVENT = 5
+
+# ============================================
+# Batch Hook
+# ============================================
+async def publish_results(conn: asyncpg.Connection, batch: ScanBatch):
+    """
+    Writer hook: NOTIFY scan_results with the summaries of a batch
+
+    Runs inside the batch transaction, so listeners only see results that
+    were committed. Summaries are built from domain_cert_status in one
+    statement, each notification carrying a JSON array of them.
+    """
+    if not batch.current:
+        return
+
+    await conn.execute(
+        """
+        SELECT pg_notify('scan_results', json_agg(summary ORDER BY domain_id)::text)
+        FROM (
+            SELECT s.domain_id,
+                   (row_number() OVER (ORDER BY s.domain_id) - 1) / $2 AS chunk,
+                   json_build_object(
+                       'domain_id', s.domain_id,
+                       'domain_name', d.domain_name,
+                       'status', s.last_status,
+                       'error', left(s.last_error, 200),
+                       'expiry_date', s.expiry_date,
+                       'expiry_bucket', s.expiry_bucket,
+                       'is_valid', s.is_valid,
+                       'issuer', left(s.issuer, 200),
+                       'fingerprint_sha256', s.fingerprint_sha256,
+                       'scanned_at', s.last_scanned_at
+                   ) AS summary
+            FROM domain_cert_status s
+            JOIN domains d ON d.id = s.domain_id
+            WHERE s.domain_id = ANY($1::int[])
+        ) summaries
+        GROUP BY chunk
+        """,
+        list(batch.current),
+        RESULTS_PER_EVENT
+    )
@@ -0,0 +1,91 @@
+"""
+Scan history maintenance
+Keeps scan_results partitions ahead of time, compacts expired months
+and ages certificate expiry buckets
+"""
+import logging
+import os
+from typing import Dict, List
+
+import asyncpg
+
+from alerts import evaluate_bucket_moves
+
+logger = logging.getLogger(__name__)
+
+RETENTION_MONTHS = int(os.getenv("SCAN_RESULTS_RETENTION_MONTHS", "3"))
+ARCHIVE = os.getenv("SCAN_RESULTS_ARCHIVE", "false").lower() == "true"
+PARTITIONS_AHEAD = int(os.getenv("SCAN_RESULTS_PARTITIONS_AHEAD", "2"))
+MAINTENANCE_INTERVAL = int(os.getenv("SCANNER_MAINTENANCE_INTERVAL", "21600"))
+
+async def refresh_expiry_buckets(conn: asyncpg.Connection) -> int:
+    """
+    Age expiry buckets and raise the thresholds they crossed
+
+    Moving a bucket and its alerts/notifications share one transaction,
+    so a crossed threshold is never lost between the two.
+
+    Args:
+        conn: Database connection
+
+    Returns:
+        Number of certificates moved
+    """
+    async with conn.transaction():
+        moved = await conn.fetch("SELECT * FROM refresh_expiry_buckets()")
+        if moved:
+            await evaluate_bucket_moves(conn, moved)
+    return len(moved)
+
+async def run_maintenance(
+    pool: asyncpg.Pool,
+    retention_months: int = RETENTION_MONTHS,
+    archive: bool = ARCHIVE
+) -> List[Dict]:
+    """
+    Run scan history maintenance
+
+    Creates upcoming monthly partitions, re-buckets certificates whose
+    expiry bucket changed with the date (raising the expiry alerts they
+    crossed) and opens today's fleet stats,
+    then rolls every partition older than the retention window up into
+    scan_results_daily and drops it (or moves it to the scan_archive schema).
+
+    Args:
+        pool: Database connection pool
+        retention_months: Full months of raw scan results to keep
+        archive: Archive detached partitions instead of dropping them
+
+    Returns:
+        One dict per compacted partition
+    """
+    async with pool.acquire() as conn:
+        created = await conn.fetchval(
+            "SELECT ensure_scan_results_partitions($1)",
+            PARTITIONS_AHEAD
+        )
+        if created:
+            logger.info(f"✅ Created {created} scan_results partition(s)")
+
+        moved = await refresh_expiry_buckets(conn)
+        if moved:
+            logger.info(f"✅ Moved {moved} certificate(s) to a new expiry bucket")
+
+        # Days without scans still get a fleet_daily_stats row
+        await conn.execute("SELECT open_fleet_day(CURRENT_DATE)")
+
+        # Single transaction: a partition is never dropped without its rollup
+        async with conn.transaction():
+            rows = await conn.fetch(
+                "SELECT * FROM compact_scan_results($1, $2)",
+                retention_months,
+                archive
+            )
+
+    compacted = [dict(row) for row in rows]
+    for row in compacted:
+        logger.info(
+            f"🗜️ Compacted {row['partition_name']} into {row['daily_rows']} daily rows ({row['action']})"
+        )
+
+    return compacted
@@ -0,0 +1,385 @@
+"""
+Notification dispatcher
+Coalesces pending cert_expiry_notifications into one digest per recipient
+and time window, and delivers the digests by email and webhook
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import aiosmtplib
+import asyncpg
+import backoff
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_EMAIL_TO = [a.strip() for a in os.getenv("NOTIFY_EMAIL_TO", "").split(",") if a.strip()]
+NOTIFY_WEBHOOK_URLS = [
+    u.strip() for u in
+    (os.getenv("NOTIFY_WEBHOOK_URLS", "") + "," + os.getenv("SLACK_WEBHOOK_URL", "")).split(",")
+    if u.strip()
+]
+NOTIFY_INTERVAL = float(os.getenv("NOTIFY_INTERVAL", "60"))
+NOTIFY_DIGEST_WINDOW = int(os.getenv("NOTIFY_DIGEST_WINDOW", "300"))
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "5"))
+NOTIFY_RETRIES = int(os.getenv("NOTIFY_RETRIES", "3"))
+NOTIFY_TIMEOUT = float(os.getenv("NOTIFY_TIMEOUT", "10"))
+NOTIFY_MAX_PENDING = int(os.getenv("NOTIFY_MAX_PENDING", "10000"))
+# Dispatch runs a notification may fail in before it is given up (failed_at)
+NOTIFY_MAX_ATTEMPTS = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "10"))
+
+SMTP_SERVER = os.getenv("SMTP_SERVER", "")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_USER = os.getenv("SMTP_USER") or None
+SMTP_PASSWORD = os.getenv("SMTP_PASSWORD") or None
+SMTP_FROM = os.getenv("SMTP_FROM", "ssl-monitor@localhost")
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+# Most urgent first; a domain that crossed several thresholds within one
+# window is reported once, at its most urgent one
+URGENCY = {"1day": 0, "7days": 1, "14days": 2, "30days": 3}
+
+# ("webhook", url) or ("email", address)
+Recipient = Tuple[str, str]
+
+def recipient_key(recipient: Recipient) -> str:
+    """notification_deliveries.recipient of a recipient"""
+    return f"{recipient[0]}:{recipient[1]}"
+
+# ============================================
+# Digest
+# ============================================
+class Digest:
+    """Notifications of one time window, sent to one recipient"""
+
+    def __init__(self, window_start: datetime, rows: List[asyncpg.Record]):
+        """
+        Initialize digest
+
+        Args:
+            window_start: Start of the digest window
+            rows: Pending notification rows of the window
+        """
+        self.window_start = window_start
+        self.ids = [row["id"] for row in rows]
+
+        # One entry per domain, at its most urgent threshold
+        latest: Dict[int, asyncpg.Record] = {}
+        for row in rows:
+            kept = latest.get(row["domain_id"])
+            if kept is None or URGENCY[row["notification_type"]] < URGENCY[kept["notification_type"]]:
+                latest[row["domain_id"]] = row
+        self.entries = sorted(
+            latest.values(),
+            key=lambda row: (URGENCY[row["notification_type"]], row["domain_name"])
+        )
+
+    @property
+    def subject(self) -> str:
+        counts: Dict[str, int] = defaultdict(int)
+        for row in self.entries:
+            counts[row["notification_type"]] += 1
+        summary = ", ".join(f"{count} within {kind}" for kind, count in sorted(
+            counts.items(), key=lambda item: URGENCY[item[0]]
+        ))
+        return f"SSL Monitor: {len(self.entries)} certificate(s) expiring ({summary})"
+
+    def text(self) -> str:
+        """Plain text body"""
+        lines = [self.subject, ""]
+        for row in self.entries:
+            lines.append(
+                f"- {row['domain_name']}: expires {row['expiry_date']} "
+                f"({row['days_until_expiry']} days, issuer {row['issuer']})"
+            )
+        return "\n".join(lines)
+
+    def payload(self) -> Dict:
+        """Webhook JSON body (Slack-compatible `text` plus structured entries)"""
+        return {
+            "text": self.text(),
+            "window_start": self.window_start.isoformat(),
+            "notifications": [
+                {
+                    "domain": row["domain_name"],
+                    "notification_type": row["notification_type"],
+                    "days_until_expiry": row["days_until_expiry"],
+                    "expiry_date": row["expiry_date"].isoformat() if row["expiry_date"] else None,
+                    "issuer": row["issuer"],
+                    "fingerprint_sha256": row["fingerprint_sha256"],
+                }
+                for row in self.entries
+            ],
+        }
+
+# ============================================
+# SMTP Connection Pool
+# ============================================
+class SMTPPool:
+    """Reuses up to `size` authenticated SMTP connections"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.idle: List[aiosmtplib.SMTP] = []
+        self.slots = asyncio.Semaphore(size)
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=SMTP_SERVER,
+            port=SMTP_PORT,
+            start_tls=SMTP_STARTTLS,
+            timeout=NOTIFY_TIMEOUT
+        )
+        await client.connect()
+        if SMTP_USER:
+            await client.login(SMTP_USER, SMTP_PASSWORD or "")
+        return client
+
+    async def send(self, message: EmailMessage):
+        """Send a message on an idle connection, opening one if needed"""
+        async with self.slots:
+            client = self.idle.pop() if self.idle else await self._connect()
+            try:
+                await client.send_message(message)
+            except Exception:
+                client.close()
+                raise
+            self.idle.append(client)
+
+    async def close(self):
+        """Quit all idle connections"""
+        while self.idle:
+            client = self.idle.pop()
+            try:
+                await client.quit()
+            except Exception:
+                client.close()
+
+# ============================================
+# Dispatcher
+# ============================================
+class NotificationDispatcher:
+    """Periodically delivers pending expiry notifications as digests"""
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        emails: Optional[List[str]] = None,
+        webhooks: Optional[List[str]] = None
+    ):
+        """
+        Initialize dispatcher
+
+        Args:
+            pool: Database connection pool
+            emails: Digest email recipients (default NOTIFY_EMAIL_TO)
+            webhooks: Digest webhook URLs (default NOTIFY_WEBHOOK_URLS + SLACK_WEBHOOK_URL)
+        """
+        self.pool = pool
+        self.emails = NOTIFY_EMAIL_TO if emails is None else emails
+        self.webhooks = NOTIFY_WEBHOOK_URLS if webhooks is None else webhooks
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.recipients)
+
+    async def run(self):
+        """Dispatch loop (runs until cancelled)"""
+        logger.info(
+            f"📨 Notification dispatcher started - {len(self.emails)} email, "
+            f"{len(self.webhooks)} webhook recipient(s)"
+        )
+        while True:
+            try:
+                await self.dispatch()
+            except Exception as e:
+                logger.error(f"❌ Notification dispatch failed: {str(e)}")
+            await asyncio.sleep(NOTIFY_INTERVAL)
+
+    @property
+    def recipients(self) -> List[Recipient]:
+        recipients = [("webhook", url) for url in self.webhooks]
+        if self.emails and SMTP_SERVER:
+            recipients += [("email", address) for address in self.emails]
+        return recipients
+
+    async def dispatch(self) -> int:
+        """
+        Deliver every closed digest window once per recipient
+
+        Pending rows are locked (SKIP LOCKED, so concurrent dispatchers
+        split the work) for the duration of delivery. Deliveries are
+        tracked per recipient in notification_deliveries, so a recipient
+        only gets the notifications it has not received yet, and a failing
+        recipient does not make the others receive a digest again. A row is
+        marked sent once every configured recipient has it; a row still
+        missing a recipient after NOTIFY_MAX_ATTEMPTS runs is given up
+        (failed_at).
+
+        Returns:
+            Notifications marked as sent
+        """
+        recipients = self.recipients
+        if not recipients:
+            return 0
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                rows = await conn.fetch(
+                    """
+                    SELECT n.id, n.domain_id, n.fingerprint_sha256, n.days_until_expiry,
+                           n.notification_type, d.domain_name, c.issuer, c.expiry_date,
+                           floor(extract(epoch FROM n.created_at) / $1)::bigint AS digest_window,
+                           ARRAY(
+                               SELECT nd.recipient FROM notification_deliveries nd
+                               WHERE nd.notification_id = n.id
+                           ) AS delivered_to
+                    FROM cert_expiry_notifications n
+                    JOIN domains d ON d.id = n.domain_id
+                    LEFT JOIN certificates c ON c.fingerprint_sha256 = n.fingerprint_sha256
+                    WHERE NOT n.is_sent
+                      AND n.failed_at IS NULL
+                      -- only windows that have closed
+                      AND floor(extract(epoch FROM n.created_at) / $1)
+                          < floor(extract(epoch FROM LOCALTIMESTAMP) / $1)
+                    ORDER BY n.created_at
+                    LIMIT $2
+                    FOR UPDATE OF n SKIP LOCKED
+                    """,
+                    NOTIFY_DIGEST_WINDOW,
+                    NOTIFY_MAX_PENDING
+                )
+                if not rows:
+                    return 0
+
+                jobs = self._digests(rows, recipients)
+                delivered = await self._deliver(jobs)
+
+                received = {row["id"]: set(row["delivered_to"]) for row in rows}
+                new_deliveries = [
+                    (notification_id, recipient_key(recipient))
+                    for digest, recipient in delivered
+                    for notification_id in digest.ids
+                ]
+                for notification_id, key in new_deliveries:
+                    received[notification_id].add(key)
+                if new_deliveries:
+                    await conn.executemany(
+                        """
+                        INSERT INTO notification_deliveries (notification_id, recipient)
+                        VALUES ($1, $2)
+                        ON CONFLICT DO NOTHING
+                        """,
+                        new_deliveries
+                    )
+
+                keys = {recipient_key(recipient) for recipient in recipients}
+                sent_ids = [i for i, done in received.items() if keys <= done]
+                retry_ids = [i for i, done in received.items() if not keys <= done]
+                if sent_ids:
+                    await conn.execute(
+                        """
+                        UPDATE cert_expiry_notifications
+                        SET is_sent = true, sent_at = NOW()
+                        WHERE id = ANY($1::int[])
+                        """,
+                        sent_ids
+                    )
+                given_up = []
+                if retry_ids:
+                    given_up = await conn.fetch(
+                        """
+                        UPDATE cert_expiry_notifications
+                        SET attempts = attempts + 1,
+                            failed_at = CASE WHEN attempts + 1 >= $2 THEN NOW() END
+                        WHERE id = ANY($1::int[])
+                        RETURNING id, failed_at
+                        """,
+                        retry_ids,
+                        NOTIFY_MAX_ATTEMPTS
+                    )
+                    given_up = [row["id"] for row in given_up if row["failed_at"]]
+
+        logger.info(
+            f"📨 Sent {len(delivered)}/{len(jobs)} digest(s); "
+            f"{len(sent_ids)} notification(s) complete, {len(retry_ids)} pending a recipient"
+        )
+        if given_up:
+            logger.warning(
+                f"⚠️ Gave up on {len(given_up)} notification(s) after {NOTIFY_MAX_ATTEMPTS} failed runs"
+            )
+        return len(sent_ids)
+
+    def _digests(self, rows: List[asyncpg.Record], recipients: List[Recipient]) -> List[Tuple[Digest, Recipient]]:
+        """
+        Group rows into NOTIFY_DIGEST_WINDOW-second windows by creation time,
+        one digest per window and recipient of the rows it has not received
+        """
+        windows: Dict[int, List[asyncpg.Record]] = defaultdict(list)
+        for row in rows:
+            windows[row["digest_window"]].append(row)
+
+        jobs = []
+        for window, window_rows in sorted(windows.items()):
+            window_start = datetime.utcfromtimestamp(window * NOTIFY_DIGEST_WINDOW)
+            for recipient in recipients:
+                key = recipient_key(recipient)
+                missing = [row for row in window_rows if key not in row["delivered_to"]]
+                if missing:
+                    jobs.append((Digest(window_start, missing), recipient))
+        return jobs
+
+    async def _deliver(self, jobs: List[Tuple[Digest, Recipient]]) -> List[Tuple[Digest, Recipient]]:
+        """
+        Send each digest to its recipient, NOTIFY_CONCURRENCY at a time
+
+        Returns:
+            Jobs that were delivered
+        """
+        limit = asyncio.Semaphore(NOTIFY_CONCURRENCY)
+        smtp = SMTPPool(NOTIFY_CONCURRENCY) if any(kind == "email" for _, (kind, _) in jobs) else None
+        connector = aiohttp.TCPConnector(limit=NOTIFY_CONCURRENCY)
+        timeout = aiohttp.ClientTimeout(total=NOTIFY_TIMEOUT)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def send(digest: Digest, recipient: Recipient) -> bool:
+                kind, target = recipient
+                async with limit:
+                    try:
+                        if kind == "webhook":
+                            await self._post_webhook(session, target, digest)
+                        else:
+                            await self._send_email(smtp, target, digest)
+                        return True
+                    except Exception as e:
+                        logger.error(f"❌ Failed to deliver digest to {target}: {str(e)}")
+                        return False
+
+            try:
+                results = await asyncio.gather(*[send(digest, recipient) for digest, recipient in jobs])
+            finally:
+                if smtp:
+                    await smtp.close()
+
+        return [job for job, sent in zip(jobs, results) if sent]
+
+    @staticmethod
+    @backoff.on_exception(backoff.expo, (aiohttp.ClientError, asyncio.TimeoutError), max_tries=NOTIFY_RETRIES)
+    async def _post_webhook(session: aiohttp.ClientSession, url: str, digest: Digest):
+        async with session.post(url, json=digest.payload()) as response:
+            response.raise_for_status()
+
+    @staticmethod
+    @backoff.on_exception(backoff.expo, (aiosmtplib.SMTPException, OSError, asyncio.TimeoutError), max_tries=NOTIFY_RETRIES)
+    async def _send_email(smtp: SMTPPool, address: str, digest: Digest):
+        message = EmailMessage()
+        message["From"] = SMTP_FROM
+        message["To"] = address
+        message["Subject"] = digest.subject
+        message.set_content(digest.text())
+        await smtp.send(message)
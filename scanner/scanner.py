@@ -7,15 +7,22 @@ import logging
 import os
 import socket
 import ssl
+import sys
 import json
+import time
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import asyncpg
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
 import backoff
 from enum import Enum
 
+from engine import fetch_der_certificate, parse_certificate
+from maintenance import run_maintenance, MAINTENANCE_INTERVAL
+from writer import ResultWriter
+from alerts import evaluate_alerts
+from events import publish_results
+from notifier import NotificationDispatcher
+
 # ============================================
 # Configuration
 # ============================================
@@ -32,6 +39,8 @@ TIMEOUT = int(os.getenv("SCANNER_TIMEOUT", "15"))
 RETRY = int(os.getenv("SCANNER_RETRY", "3"))
 BATCH_SIZE = int(os.getenv("SCANNER_BATCH_SIZE", "1000"))
 VERIFY_SSL = os.getenv("SCANNER_VERIFY_SSL", "false").lower() == "true"
+PROGRESS_INTERVAL = float(os.getenv("SCANNER_PROGRESS_INTERVAL", "5"))
+QUEUE_POLL_INTERVAL = float(os.getenv("SCANNER_QUEUE_POLL_INTERVAL", "5"))
 
 # ============================================
 # Enums
@@ -43,18 +52,93 @@ class ScanStatus(str, Enum):
     SUCCESS = "success"
     FAILED = "failed"
 
+class RunStatus(str, Enum):
+    """Scan run status enumeration"""
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+# ============================================
+# Scan Run Progress
+# ============================================
+class ScanProgress:
+    """Track progress of a sweep and derive throughput and ETA"""
+
+    def __init__(self, total: int, run_id: Optional[int] = None):
+        """
+        Initialize progress tracker
+
+        Args:
+            total: Number of domains in the sweep
+            run_id: scan_runs row this sweep reports to (None = not persisted)
+        """
+        self.total = total
+        self.run_id = run_id
+        self.success = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self.last_flush = self.started
+
+    @property
+    def completed(self) -> int:
+        """Domains processed so far (success + failed)"""
+        return self.success + self.failed
+
+    @property
+    def rate(self) -> float:
+        """Throughput in domains per second"""
+        elapsed = time.monotonic() - self.started
+        return self.completed / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[int]:
+        """Estimated seconds until the sweep finishes"""
+        rate = self.rate
+        if rate <= 0:
+            return None
+        return int((self.total - self.completed) / rate)
+
+    def record(self, success: bool):
+        """Record one finished domain"""
+        if success:
+            self.success += 1
+        else:
+            self.failed += 1
+
+    def flush_due(self) -> bool:
+        """
+        Check whether progress should be written out
+
+        Claims the flush slot when due, so concurrent scan tasks
+        do not all write the same snapshot.
+        """
+        now = time.monotonic()
+        if now - self.last_flush < PROGRESS_INTERVAL:
+            return False
+        self.last_flush = now
+        return True
+
 # ============================================
 # SSL Scanner Class
 # ============================================
 class SSLScanner:
     """SSL Certificate Scanner"""
     
-    def __init__(self):
-        """Initialize scanner"""
+    def __init__(self, concurrency: int = CONCURRENCY, timeout: float = TIMEOUT):
+        """
+        Initialize scanner
+        
+        Args:
+            concurrency: Max handshakes in flight
+            timeout: Per-handshake deadline in seconds
+        """
         self.db_pool: Optional[asyncpg.Pool] = None
-        self.semaphore = asyncio.Semaphore(CONCURRENCY)
+        self.writer: Optional[ResultWriter] = None
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.timeout = timeout
+        self.last_maintenance: Optional[float] = None
         
-        logger.info(f"🚀 Scanner initialized - Concurrency: {CONCURRENCY}, Timeout: {TIMEOUT}s")
+        logger.info(f"🚀 Scanner initialized - Concurrency: {concurrency}, Timeout: {timeout}s")
     
     # ============================================
     # Database Connection
@@ -71,9 +155,11 @@ class SSLScanner:
                 min_size=5,
                 max_size=20,
                 command_timeout=30,
-                connection_class=asyncpg.connect,
                 init=self._init_connection  # ✅ Add initialization
             )
+            self.writer = ResultWriter(self.db_pool)
+            self.writer.add_hook(evaluate_alerts)
+            self.writer.add_hook(publish_results)
             logger.info("✅ Database connected")
         except Exception as e:
             logger.error(f"❌ Database connection failed: {str(e)}")
@@ -126,71 +212,23 @@ class SSLScanner:
             TimeoutError: Timeout
         """
         try:
-            # ============================================
-            # Create SSL Context
-            # ============================================
-            context = ssl.create_default_context()
-
-            if not VERIFY_SSL:
-                # Disable SSL verification for monitoring purposes
-                # We're just checking certificate existence and expiry
-                context.check_hostname = False
-                context.verify_mode = ssl.CERT_NONE
-            else:
-                # Full SSL verification enabled
-                context.check_hostname = True
-                context.verify_mode = ssl.CERT_REQUIRED
+            der_cert = await fetch_der_certificate(
+                domain,
+                port,
+                timeout=self.timeout,
+                verify=VERIFY_SSL
+            )
             
-            # ============================================
-            # Connect and Get Certificate
-            # ============================================
-            with socket.create_connection((domain, port), timeout=TIMEOUT) as sock:
-                # Set socket timeout explicitly
-                sock.settimeout(TIMEOUT)
-                with context.wrap_socket(sock, server_hostname=domain) as ssock:
-                    # Get DER certificate
-                    der_cert = ssock.getpeercert(binary_form=True)
-                    
-                    if not der_cert:
-                        logger.warning(f"⚠️ No certificate found for {domain}")
-                        return {"status": "failed", "error": "No certificate found"}
-                    
-                    # Parse certificate
-                    cert = x509.load_der_x509_certificate(
-                        der_cert,
-                        default_backend()
-                    )
-                    
-                    # ============================================
-                    # Extract Certificate Information
-                    # ============================================
-                    cert_info = {
-                        "domain": domain,
-                        "common_name": cert.subject.get_attributes_for_oid(
-                            x509.oid.NameOID.COMMON_NAME
-                        )[0].value if cert.subject.get_attributes_for_oid(
-                            x509.oid.NameOID.COMMON_NAME
-                        ) else None,
-                        "subject_alt_names": self._extract_san(cert),
-                        "issuer": str(cert.issuer),
-                        "serial_number": str(cert.serial_number),
-                        "issued_date": cert.not_valid_before.isoformat(),
-                        "expiry_date": cert.not_valid_after.isoformat(),
-                        "is_self_signed": cert.issuer == cert.subject,
-                        "key_size": cert.public_key().key_size,
-                        "signature_algorithm": str(cert.signature_algorithm_oid),
-                        "is_valid": self._is_certificate_valid(cert),
-                        "days_until_expiry": (
-                            cert.not_valid_after - datetime.utcnow()
-                        ).days,
-                        "scanned_at": datetime.utcnow().isoformat(),
-                        "status": "success"
-                    }
-                    
-                    logger.info(f"✅ Certificate scanned: {domain}")
-                    return cert_info
+            if not der_cert:
+                logger.warning(f"⚠️ No certificate found for {domain}")
+                return {"status": "failed", "error": "No certificate found"}
+            
+            cert_info = parse_certificate(der_cert, domain)
+            
+            logger.info(f"✅ Certificate scanned: {domain}")
+            return cert_info
                     
-        except socket.timeout:
+        except TimeoutError:
             logger.warning(f"⏱️ Timeout scanning {domain}")
             raise TimeoutError(f"Timeout connecting to {domain}")
         except ssl.SSLError as e:
@@ -207,27 +245,6 @@ class SSLScanner:
                 "error": str(e)
             }
     
-    # ============================================
-    # Certificate Validation
-    # ============================================
-    def _is_certificate_valid(self, cert) -> bool:
-        """Check if certificate is valid"""
-        try:
-            now = datetime.utcnow()
-            return cert.not_valid_before <= now <= cert.not_valid_after
-        except:
-            return False
-    
-    def _extract_san(self, cert) -> List[str]:
-        """Extract Subject Alternative Names"""
-        try:
-            san_ext = cert.extensions.get_extension_for_oid(
-                x509.oid.ExtensionOID.SUBJECT_ALTERNATIVE_NAME
-            )
-            return [name.value for name in san_ext.value]
-        except:
-            return []
-    
     # ============================================
     # Database Operations
     # ============================================
@@ -237,7 +254,10 @@ class SSLScanner:
         cert_info: Dict
     ) -> bool:
         """
-        Save scan result to database
+        Save a single scan result to database immediately
+        
+        Sweeps buffer results through self.writer instead; this writes
+        a batch of one.
         
         Args:
             domain_id: Domain ID
@@ -246,86 +266,109 @@ class SSLScanner:
         Returns:
             True if saved, False otherwise
         """
-        if not self.db_pool:
+        if not self.writer:
             logger.error("❌ Database not connected")
             return False
         
+        try:
+            await self.writer.write([(domain_id, cert_info)])
+            return True
+        except Exception as e:
+            logger.error(f"❌ Failed to save scan result: {str(e)}")
+            return False
+    
+    # ============================================
+    # Scan Run Registry
+    # ============================================
+    async def start_scan_run(self, total: int) -> Optional[int]:
+        """
+        Register a new sweep in scan_runs
+
+        Args:
+            total: Number of domains in the sweep
+
+        Returns:
+            Scan run ID, or None if it could not be recorded
+        """
+        if not self.db_pool:
+            return None
+
+        try:
+            async with self.db_pool.acquire() as conn:
+                return await conn.fetchval(
+                    """
+                    INSERT INTO scan_runs (source, status, total_domains)
+                    VALUES ('scanner', $1, $2)
+                    RETURNING id
+                    """,
+                    RunStatus.RUNNING.value,
+                    total
+                )
+        except Exception as e:
+            logger.error(f"❌ Failed to register scan run: {str(e)}")
+            return None
+
+    async def update_scan_run(
+        self,
+        progress: ScanProgress,
+        status: RunStatus = RunStatus.RUNNING,
+        error: Optional[str] = None
+    ):
+        """
+        Write sweep progress to scan_runs
+
+        Args:
+            progress: Progress tracker of the sweep
+            status: Run status to record
+            error: Error message if the sweep failed
+        """
+        if not self.db_pool or progress.run_id is None:
+            return
+
         try:
             async with self.db_pool.acquire() as conn:
-                # ============================================
-                # Save Scan Result
-                # ============================================
                 await conn.execute(
                     """
-                    INSERT INTO scan_results
-                    (domain_id, scan_type, status, result_data, started_at, completed_at)
-                    VALUES ($1, $2, $3, $4, NOW(), NOW())
+                    UPDATE scan_runs
+                    SET status = $2::text,
+                        completed_count = $3,
+                        success_count = $4,
+                        failed_count = $5,
+                        domains_per_second = $6,
+                        eta_seconds = $7,
+                        error_message = $8,
+                        updated_at = NOW(),
+                        finished_at = CASE WHEN $2::text = 'running' THEN NULL ELSE NOW() END
+                    WHERE id = $1
                     """,
-                    domain_id,
-                    "ssl",
-                    cert_info.get("status", "failed"),
-                    json.dumps(cert_info)
+                    progress.run_id,
+                    status.value,
+                    progress.completed,
+                    progress.success,
+                    progress.failed,
+                    round(progress.rate, 3),
+                    progress.eta_seconds if status == RunStatus.RUNNING else 0,
+                    error
                 )
-                
-                # ============================================
-                # Update Domain Last Scanned
-                # ============================================
-                if cert_info.get("status") == "success":
-                    await conn.execute(
-                        """
-                        UPDATE domains 
-                        SET last_scanned = NOW()
-                        WHERE id = $1
-                        """,
-                        domain_id
-                    )
-                    
-                    # ============================================
-                    # Save Certificate
-                    # ============================================
-                    await conn.execute(
-                        """
-                        INSERT INTO ssl_certificates 
-                        (domain_id, common_name, subject_alt_names, issuer, 
-                         serial_number, issued_date, expiry_date, is_self_signed, 
-                         key_size, signature_algorithm, scanned_at, is_valid)
-                        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, NOW(), $11)
-                        ON CONFLICT (domain_id) DO UPDATE SET
-                            expiry_date = EXCLUDED.expiry_date,
-                            is_valid = EXCLUDED.is_valid,
-                            scanned_at = NOW()
-                        """,
-                        domain_id,
-                        cert_info.get("common_name"),
-                        str(cert_info.get("subject_alt_names", [])),
-                        cert_info.get("issuer"),
-                        cert_info.get("serial_number"),
-                        cert_info.get("issued_date"),
-                        cert_info.get("expiry_date"),
-                        cert_info.get("is_self_signed"),
-                        cert_info.get("key_size"),
-                        cert_info.get("signature_algorithm"),
-                        cert_info.get("is_valid")
-                    )
-                    
-                    logger.info(f"✅ Scan result saved for domain_id: {domain_id}")
-                
-                return True
-                
         except Exception as e:
-            logger.error(f"❌ Failed to save scan result: {str(e)}")
-            return False
-    
+            logger.error(f"❌ Failed to update scan run {progress.run_id}: {str(e)}")
+
     # ============================================
     # Batch Scanning
     # ============================================
-    async def scan_domain(self, domain_id: int, domain_name: str) -> Dict:
+    async def scan_domain(
+        self,
+        domain_id: int,
+        domain_name: str,
+        progress: Optional[ScanProgress] = None
+    ) -> Dict:
         """
         Scan single domain with concurrency control
         
         Args:
             domain_id: Domain ID
             domain_name: Domain name
+            progress: Sweep progress tracker to report to
             
         Returns:
             Scan result
@@ -334,10 +377,11 @@ class SSLScanner:
             try:
                 cert_info = await self.get_ssl_certificate(domain_name)
                 
-                # Save to database
-                await self.save_scan_result(domain_id, cert_info)
+                # Buffer for the next batched write
+                if self.writer:
+                    await self.writer.add(domain_id, cert_info)
                 
-                return {
+                result = {
                     "domain_id": domain_id,
                     "domain_name": domain_name,
                     "result": cert_info
@@ -345,14 +389,27 @@ class SSLScanner:
                 
             except Exception as e:
                 logger.error(f"❌ Failed to scan {domain_name}: {str(e)}")
-                return {
+                cert_info = {
+                    "status": "failed",
+                    "error": str(e)
+                }
+
+                # Failures are recorded like any other result
+                if self.writer:
+                    await self.writer.add(domain_id, cert_info)
+
+                result = {
                     "domain_id": domain_id,
                     "domain_name": domain_name,
-                    "result": {
-                        "status": "failed",
-                        "error": str(e)
-                    }
+                    "result": cert_info
                 }
+
+        if progress is not None:
+            progress.record(result["result"].get("status") == ScanStatus.SUCCESS.value)
+            if progress.flush_due():
+                await self.update_scan_run(progress)
+
+        return result
     
     async def scan_batch(self, domains: List[Tuple[int, str]]) -> List[Dict]:
         """
@@ -366,17 +423,35 @@ class SSLScanner:
         """
         logger.info(f"🚀 Starting batch scan of {len(domains)} domains")
         
+        run_id = await self.start_scan_run(len(domains))
+        progress = ScanProgress(len(domains), run_id)
+        
         tasks = [
-            self.scan_domain(domain_id, domain_name)
+            self.scan_domain(domain_id, domain_name, progress)
             for domain_id, domain_name in domains
         ]
         
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        except BaseException as e:
+            await self.update_scan_run(progress, RunStatus.FAILED, str(e) or type(e).__name__)
+            raise
+        finally:
+            # Write the partially filled last batch
+            if self.writer:
+                await self.writer.flush()
         
         successful = sum(1 for r in results if isinstance(r, dict) and r["result"]["status"] == "success")
         failed = len(results) - successful
         
-        logger.info(f"✅ Batch scan completed - Success: {successful}, Failed: {failed}")
+        # Tasks that raised never reached progress.record()
+        progress.failed += len(results) - progress.completed
+        await self.update_scan_run(progress, RunStatus.COMPLETED)
+        
+        logger.info(
+            f"✅ Batch scan completed - Success: {successful}, Failed: {failed}, "
+            f"Throughput: {progress.rate:.1f} domains/s"
+        )
         
         return results
     
@@ -387,6 +462,11 @@ class SSLScanner:
         """
         Get active domains that need scanning
         
+        Queued requests (scan_queue) come first, by priority then age; the
+        rest of the batch is filled with the least recently scanned domains.
+        Queue rows are claimed with SKIP LOCKED and deleted up front, so a
+        crash mid-batch leaves those domains to the regular sweep.
+        
         Returns:
             List of (domain_id, domain_name) tuples
         """
@@ -396,45 +476,112 @@ class SSLScanner:
         
         try:
             async with self.db_pool.acquire() as conn:
-                rows = await conn.fetch(
+                queued = await conn.fetch(
                     """
-                    SELECT id, domain_name FROM domains 
-                    WHERE is_active = true
-                    ORDER BY last_scanned ASC NULLS FIRST
-                    LIMIT $1
+                    WITH claimed AS (
+                        DELETE FROM scan_queue
+                        WHERE domain_id IN (
+                            SELECT domain_id FROM scan_queue
+                            ORDER BY priority DESC, requested_at
+                            LIMIT $1
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING domain_id, priority, requested_at
+                    )
+                    SELECT d.id, d.domain_name
+                    FROM claimed c
+                    JOIN domains d ON d.id = c.domain_id
+                    WHERE d.is_active = true
+                    ORDER BY c.priority DESC, c.requested_at
                     """,
                     BATCH_SIZE
                 )
                 
-                return [(row["id"], row["domain_name"]) for row in rows]
+                rows = []
+                if len(queued) < BATCH_SIZE:
+                    rows = await conn.fetch(
+                        """
+                        SELECT id, domain_name FROM domains 
+                        WHERE is_active = true
+                          AND id <> ALL($2::int[])
+                        ORDER BY last_scanned ASC NULLS FIRST
+                        LIMIT $1
+                        """,
+                        BATCH_SIZE - len(queued),
+                        [row["id"] for row in queued]
+                    )
+                
+                if queued:
+                    logger.info(f"📥 Claimed {len(queued)} queued scan requests")
+                return [(row["id"], row["domain_name"]) for row in [*queued, *rows]]
                 
         except Exception as e:
             logger.error(f"❌ Failed to get domains: {str(e)}")
             return []
     
+    async def wait_for_queue(self, seconds: float):
+        """
+        Sleep up to `seconds`, waking early once scans are queued
+        
+        Args:
+            seconds: Longest wait
+        """
+        deadline = time.monotonic() + seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(QUEUE_POLL_INTERVAL, remaining))
+            try:
+                async with self.db_pool.acquire() as conn:
+                    if await conn.fetchval("SELECT EXISTS (SELECT 1 FROM scan_queue)"):
+                        return
+            except Exception as e:
+                logger.error(f"❌ Failed to check scan queue: {str(e)}")
+    
     # ============================================
     # Main Scanner Loop
     # ============================================
+    async def maintain(self):
+        """Run scan history maintenance if it is due"""
+        now = time.monotonic()
+        if self.last_maintenance is not None and now - self.last_maintenance < MAINTENANCE_INTERVAL:
+            return
+        
+        self.last_maintenance = now
+        try:
+            await run_maintenance(self.db_pool)
+        except Exception as e:
+            logger.error(f"❌ Scan history maintenance failed: {str(e)}")
+    
     async def run(self):
         """Main scanner loop"""
+        dispatcher_task = None
         try:
             await self.connect_db()
             
+            # Expiry digests are delivered alongside scanning
+            dispatcher = NotificationDispatcher(self.db_pool)
+            if dispatcher.enabled:
+                dispatcher_task = asyncio.create_task(dispatcher.run())
+            
             while True:
                 try:
+                    await self.maintain()
+                    
                     # Get domains to scan
                     domains = await self.get_domains_to_scan()
                     
                     if not domains:
                         logger.info("⏳ No domains to scan, waiting...")
-                        await asyncio.sleep(60)
+                        await self.wait_for_queue(60)
                         continue
                     
                     # Scan batch
                     await self.scan_batch(domains)
                     
-                    # Wait before next batch
-                    await asyncio.sleep(30)
+                    # Wait before next batch (queued requests cut it short)
+                    await self.wait_for_queue(30)
                     
                 except Exception as e:
                     logger.error(f"❌ Scanner error: {str(e)}")
@@ -443,4 +590,6 @@ class SSLScanner:
         except Exception as e:
             logger.error(f"❌ Fatal error: {str(e)}")
         finally:
-            await self.disconnect_db()
\ No newline at end of file
+            if dispatcher_task:
+                dispatcher_task.cancel()
+            await self.disconnect_db()
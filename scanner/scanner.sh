@@ -123,9 +123,6 @@ perform_scan() {
     fi
     log_info "=========================================="
 
-    # Refresh materialized view
-    psql_query "REFRESH MATERIALIZED VIEW latest_ssl_status;" >/dev/null
-
     # Get domains to scan
     if [[ -n "$SCAN_REQUEST_FILE" ]] && [[ -f "$SCAN_REQUEST_FILE" ]]; then
         # Selective scan - read from file
@@ -198,19 +195,20 @@ perform_scan() {
         
     done < "$TEMP_OUTPUT"
     
-    # Refresh materialized view after scan
-    psql_query "REFRESH MATERIALIZED VIEW latest_ssl_status;" >/dev/null
-    
     # Calculate duration
     SCAN_END=$(date +%s)
     DURATION=$((SCAN_END - SCAN_START))
     
     # Save statistics
+    local RATE="NULL"
+    [[ $DURATION -gt 0 ]] && RATE=$(echo "scale=3; $TOTAL_DOMAINS / $DURATION" | bc)
     psql_query "
-        INSERT INTO scan_stats
-        (total_domains, ssl_valid_count, ssl_invalid_count, expired_soon_count, scan_duration_seconds)
+        INSERT INTO scan_runs
+        (source, status, total_domains, completed_count, success_count, failed_count,
+         domains_per_second, eta_seconds, started_at, updated_at, finished_at)
         VALUES
-        ($TOTAL_DOMAINS, $VALID_COUNT, $INVALID_COUNT, $EXPIRED_SOON, $DURATION);
+        ('shell', 'completed', $TOTAL_DOMAINS, $(($VALID_COUNT + $INVALID_COUNT)), $VALID_COUNT, $INVALID_COUNT,
+         $RATE, 0, TO_TIMESTAMP($SCAN_START) AT TIME ZONE 'UTC', NOW(), NOW());
     " >/dev/null 2>&1
     
     # Cleanup
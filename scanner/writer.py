@@ -0,0 +1,412 @@
+"""
+Scan Result Writer
+Buffers scan results and persists each batch in a single transaction,
+keeping the certificate store, per-domain history and domain_cert_status
+read model in step with scan_results
+"""
+import asyncio
+import json
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import asyncpg
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = int(os.getenv("SCANNER_WRITE_BATCH_SIZE", "200"))
+
+# ============================================
+# Batch
+# ============================================
+class ScanBatch:
+    """One flushed batch of scan results"""
+
+    def __init__(self, results: List[Tuple[int, Dict]]):
+        """
+        Initialize batch
+
+        Args:
+            results: (domain_id, cert_info) pairs in scan order
+        """
+        self.results = results
+        # domain_cert_status rows keyed by domain_id, before and after the write
+        self.previous: Dict[int, Dict] = {}
+        self.current: Dict[int, Dict] = {}
+
+    def latest(self) -> Dict[int, Dict]:
+        """Last result per domain (a domain may be scanned twice in one batch)"""
+        return {domain_id: cert_info for domain_id, cert_info in self.results}
+
+# Called inside the batch transaction after domain_cert_status is written
+BatchHook = Callable[[asyncpg.Connection, ScanBatch], Awaitable[None]]
+
+# ============================================
+# Writer
+# ============================================
+class ResultWriter:
+    """Batched persistence of scan results"""
+
+    def __init__(self, pool: asyncpg.Pool, batch_size: int = WRITE_BATCH_SIZE):
+        """
+        Initialize writer
+
+        Args:
+            pool: Database connection pool
+            batch_size: Results buffered before a flush
+        """
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.pending: List[Tuple[int, Dict]] = []
+        self.lock = asyncio.Lock()
+        self.hooks: List[BatchHook] = []
+
+    def add_hook(self, hook: BatchHook):
+        """Register a hook run inside every batch transaction"""
+        self.hooks.append(hook)
+
+    async def add(self, domain_id: int, cert_info: Dict):
+        """
+        Buffer one result, flushing when the batch is full
+
+        Args:
+            domain_id: Domain ID
+            cert_info: Certificate information
+        """
+        self.pending.append((domain_id, cert_info))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> Optional[ScanBatch]:
+        """
+        Write all buffered results
+
+        Flushes are serialized, so callers waiting here also throttle
+        the scan to the database's write speed. If the batch transaction
+        fails, its results are replayed one per transaction, so a bad row
+        (e.g. one violating a constraint) only loses itself.
+
+        Returns:
+            Written batch, or None if nothing was pending or the write failed
+        """
+        async with self.lock:
+            if not self.pending:
+                return None
+            results, self.pending = self.pending, []
+
+            try:
+                return await self.write(results)
+            except Exception as e:
+                if len(results) == 1:
+                    logger.error(f"❌ Failed to save scan result of domain {results[0][0]}: {str(e)}")
+                    return None
+                logger.warning(
+                    f"⚠️ Failed to save {len(results)} scan results as a batch ({str(e)}), "
+                    f"retrying one by one"
+                )
+                return await self._write_each(results)
+
+    async def _write_each(self, results: List[Tuple[int, Dict]]) -> Optional[ScanBatch]:
+        """
+        Persist results one transaction at a time, skipping failing ones
+
+        Returns:
+            Combined batch of the saved results, or None if none was saved
+        """
+        saved = ScanBatch([])
+        for domain_id, cert_info in results:
+            try:
+                batch = await self.write([(domain_id, cert_info)])
+            except Exception as e:
+                logger.error(f"❌ Failed to save scan result of domain {domain_id}: {str(e)}")
+                continue
+            saved.results += batch.results
+            saved.previous.update(batch.previous)
+            saved.current.update(batch.current)
+
+        if not saved.results:
+            return None
+        logger.info(f"✅ Saved {len(saved.results)}/{len(results)} scan results one by one")
+        return saved
+
+    async def write(self, results: List[Tuple[int, Dict]]) -> ScanBatch:
+        """
+        Persist a batch of results in one transaction
+
+        Args:
+            results: (domain_id, cert_info) pairs
+
+        Returns:
+            Written batch with previous/current certificate status
+        """
+        batch = ScanBatch(results)
+        latest = batch.latest()
+        domain_ids = list(latest)
+        succeeded = {
+            domain_id: info for domain_id, info in latest.items()
+            if info.get("status") == "success"
+        }
+        failed = {
+            domain_id: info for domain_id, info in latest.items()
+            if domain_id not in succeeded
+        }
+
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Lock the domains first, in ID order: bulk (de)activation in the
+                # API updates domains and then, via sync_cert_status_active,
+                # domain_cert_status; taking the locks in the same order here
+                # keeps the two from deadlocking
+                await conn.execute(
+                    """
+                    SELECT 1 FROM domains
+                    WHERE id = ANY($1::int[])
+                    ORDER BY id
+                    FOR NO KEY UPDATE
+                    """,
+                    domain_ids
+                )
+
+                # Lock the status rows so concurrent writers see a consistent before/after
+                rows = await conn.fetch(
+                    """
+                    SELECT * FROM domain_cert_status
+                    WHERE domain_id = ANY($1::int[])
+                    ORDER BY domain_id
+                    FOR UPDATE
+                    """,
+                    domain_ids
+                )
+                batch.previous = {row["domain_id"]: dict(row) for row in rows}
+
+                await self._insert_scan_results(conn, results)
+
+                await conn.execute(
+                    "UPDATE domains SET last_scanned = NOW() WHERE id = ANY($1::int[])",
+                    domain_ids
+                )
+
+                rows = []
+                if succeeded:
+                    await self._upsert_certificates(conn, succeeded)
+                    await self._record_certificate_history(conn, list(succeeded))
+                    rows += await self._upsert_success_status(conn, succeeded)
+                if failed:
+                    rows += await self._upsert_failure_status(conn, failed)
+                batch.current = {row["domain_id"]: dict(row) for row in rows}
+
+                for hook in self.hooks:
+                    await hook(conn, batch)
+
+        logger.info(
+            f"✅ Saved {len(results)} scan results "
+            f"(Success: {len(succeeded)}, Failed: {len(failed)})"
+        )
+        return batch
+
+    # ============================================
+    # Statements
+    # ============================================
+    @staticmethod
+    def _result_summary(info: Dict) -> Optional[str]:
+        """
+        Compact result_data of one scan
+
+        Certificate details are stored once in the certificates table,
+        so a scan only keeps its fingerprint and days until expiry.
+        Failed scans keep just their error_message.
+        """
+        if info.get("status") != "success":
+            return None
+        return json.dumps({
+            "fingerprint_sha256": info.get("fingerprint_sha256"),
+            "days_until_expiry": info.get("days_until_expiry")
+        })
+
+    async def _insert_scan_results(self, conn: asyncpg.Connection, results: List[Tuple[int, Dict]]):
+        """Append result summaries to scan_results"""
+        await conn.execute(
+            """
+            INSERT INTO scan_results
+            (domain_id, scan_type, status, result_data, error_message, started_at, completed_at)
+            SELECT r.domain_id, 'ssl', r.status, r.result_data::jsonb, r.error, NOW(), NOW()
+            FROM unnest($1::int[], $2::text[], $3::text[], $4::text[])
+                AS r(domain_id, status, result_data, error)
+            """,
+            [domain_id for domain_id, _ in results],
+            [info.get("status", "failed") for _, info in results],
+            [self._result_summary(info) for _, info in results],
+            [info.get("error") for _, info in results]
+        )
+
+    async def _upsert_certificates(self, conn: asyncpg.Connection, succeeded: Dict[int, Dict]):
+        """Replace the current certificate of each successfully scanned domain"""
+        infos = list(succeeded.values())
+        await conn.execute(
+            """
+            INSERT INTO ssl_certificates
+            (domain_id, common_name, subject_alt_names, issuer, serial_number,
+             issued_date, expiry_date, is_self_signed, key_size, signature_algorithm,
+             fingerprint_sha256, is_valid, scanned_at)
+            SELECT c.domain_id, c.common_name,
+                   ARRAY(SELECT lower(rtrim(san, '.')) FROM jsonb_array_elements_text(c.subject_alt_names::jsonb) AS san),
+                   c.issuer, c.serial_number,
+                   c.issued_date::date, c.expiry_date::date, c.is_self_signed, c.key_size,
+                   c.signature_algorithm, c.fingerprint_sha256, c.is_valid, NOW()
+            FROM unnest(
+                $1::int[], $2::text[], $3::text[], $4::text[], $5::text[], $6::text[],
+                $7::text[], $8::bool[], $9::int[], $10::text[], $11::text[], $12::bool[]
+            ) AS c(domain_id, common_name, subject_alt_names, issuer, serial_number,
+                   issued_date, expiry_date, is_self_signed, key_size, signature_algorithm,
+                   fingerprint_sha256, is_valid)
+            ON CONFLICT (domain_id) DO UPDATE SET
+                common_name = EXCLUDED.common_name,
+                subject_alt_names = EXCLUDED.subject_alt_names,
+                issuer = EXCLUDED.issuer,
+                serial_number = EXCLUDED.serial_number,
+                issued_date = EXCLUDED.issued_date,
+                expiry_date = EXCLUDED.expiry_date,
+                is_self_signed = EXCLUDED.is_self_signed,
+                key_size = EXCLUDED.key_size,
+                signature_algorithm = EXCLUDED.signature_algorithm,
+                fingerprint_sha256 = EXCLUDED.fingerprint_sha256,
+                is_valid = EXCLUDED.is_valid,
+                scanned_at = EXCLUDED.scanned_at
+            """,
+            list(succeeded),
+            [info.get("common_name") for info in infos],
+            # SAN lists travel as JSON text: unnest() cannot carry ragged arrays
+            [json.dumps(info.get("subject_alt_names", [])) for info in infos],
+            [info.get("issuer") for info in infos],
+            [info.get("serial_number") for info in infos],
+            [info.get("issued_date") for info in infos],
+            [info.get("expiry_date") for info in infos],
+            [info.get("is_self_signed") for info in infos],
+            [info.get("key_size") for info in infos],
+            [info.get("signature_algorithm") for info in infos],
+            [info.get("fingerprint_sha256") for info in infos],
+            [info.get("is_valid") for info in infos]
+        )
+
+    async def _record_certificate_history(self, conn: asyncpg.Connection, domain_ids: List[int]):
+        """
+        Store new certificates once and extend each domain's timeline
+
+        Copies unseen fingerprints from the just-written ssl_certificates
+        rows into certificates. If a domain still serves the certificate
+        of its latest history row, that row's last_seen is bumped;
+        otherwise a new row starts a new period.
+        """
+        await conn.execute(
+            """
+            INSERT INTO certificates
+            (fingerprint_sha256, common_name, subject_alt_names, issuer, serial_number,
+             issued_date, expiry_date, is_self_signed, key_size, signature_algorithm)
+            SELECT DISTINCT ON (fingerprint_sha256)
+                   fingerprint_sha256, common_name, subject_alt_names, issuer, serial_number,
+                   issued_date, expiry_date, is_self_signed, key_size, signature_algorithm
+            FROM ssl_certificates
+            WHERE domain_id = ANY($1::int[]) AND fingerprint_sha256 IS NOT NULL
+            ORDER BY fingerprint_sha256
+            ON CONFLICT (fingerprint_sha256) DO NOTHING
+            """,
+            domain_ids
+        )
+
+        await conn.execute(
+            """
+            WITH scanned AS (
+                SELECT domain_id, fingerprint_sha256
+                FROM ssl_certificates
+                WHERE domain_id = ANY($1::int[]) AND fingerprint_sha256 IS NOT NULL
+            ),
+            latest AS (
+                SELECT DISTINCT ON (h.domain_id) h.id, h.domain_id, h.fingerprint_sha256
+                FROM domain_certificate_history h
+                WHERE h.domain_id = ANY($1::int[])
+                ORDER BY h.domain_id, h.first_seen DESC, h.id DESC
+            ),
+            unchanged AS (
+                UPDATE domain_certificate_history h
+                SET last_seen = NOW()
+                FROM latest l
+                JOIN scanned s ON s.domain_id = l.domain_id
+                              AND s.fingerprint_sha256 = l.fingerprint_sha256
+                WHERE h.id = l.id
+                RETURNING h.domain_id
+            )
+            INSERT INTO domain_certificate_history (domain_id, fingerprint_sha256, first_seen, last_seen)
+            SELECT s.domain_id, s.fingerprint_sha256, NOW(), NOW()
+            FROM scanned s
+            WHERE s.domain_id NOT IN (SELECT domain_id FROM unchanged)
+            """,
+            domain_ids
+        )
+
+    async def _upsert_success_status(self, conn: asyncpg.Connection, succeeded: Dict[int, Dict]) -> list:
+        """Point domain_cert_status at the newly scanned certificates"""
+        infos = list(succeeded.values())
+        return await conn.fetch(
+            """
+            INSERT INTO domain_cert_status AS s
+            (domain_id, is_active, last_status, last_error, common_name, issuer,
+             fingerprint_sha256, issued_date, expiry_date, is_valid, is_self_signed,
+             key_size, expiry_bucket, last_scanned_at, last_success_at)
+            SELECT c.domain_id, d.is_active, 'success', NULL, c.common_name, c.issuer,
+                   c.fingerprint_sha256, c.issued_date::date, c.expiry_date::date, c.is_valid,
+                   c.is_self_signed, c.key_size,
+                   cert_expiry_bucket(c.expiry_date::date, CURRENT_DATE), NOW(), NOW()
+            FROM unnest(
+                $1::int[], $2::text[], $3::text[], $4::text[], $5::text[], $6::text[],
+                $7::bool[], $8::bool[], $9::int[]
+            ) AS c(domain_id, common_name, issuer, fingerprint_sha256, issued_date,
+                   expiry_date, is_valid, is_self_signed, key_size)
+            JOIN domains d ON d.id = c.domain_id
+            ON CONFLICT (domain_id) DO UPDATE SET
+                is_active = EXCLUDED.is_active,
+                last_status = EXCLUDED.last_status,
+                last_error = NULL,
+                common_name = EXCLUDED.common_name,
+                issuer = EXCLUDED.issuer,
+                fingerprint_sha256 = EXCLUDED.fingerprint_sha256,
+                issued_date = EXCLUDED.issued_date,
+                expiry_date = EXCLUDED.expiry_date,
+                is_valid = EXCLUDED.is_valid,
+                is_self_signed = EXCLUDED.is_self_signed,
+                key_size = EXCLUDED.key_size,
+                expiry_bucket = EXCLUDED.expiry_bucket,
+                last_scanned_at = EXCLUDED.last_scanned_at,
+                last_success_at = EXCLUDED.last_success_at
+            RETURNING s.*
+            """,
+            list(succeeded),
+            [info.get("common_name") for info in infos],
+            [info.get("issuer") for info in infos],
+            [info.get("fingerprint_sha256") for info in infos],
+            [info.get("issued_date") for info in infos],
+            [info.get("expiry_date") for info in infos],
+            [info.get("is_valid") for info in infos],
+            [info.get("is_self_signed") for info in infos],
+            [info.get("key_size") for info in infos]
+        )
+
+    async def _upsert_failure_status(self, conn: asyncpg.Connection, failed: Dict[int, Dict]) -> list:
+        """Record failed scans, keeping the last known certificate"""
+        return await conn.fetch(
+            """
+            INSERT INTO domain_cert_status AS s
+            (domain_id, is_active, last_status, last_error, last_scanned_at)
+            SELECT r.domain_id, d.is_active, 'failed', r.error, NOW()
+            FROM unnest($1::int[], $2::text[]) AS r(domain_id, error)
+            JOIN domains d ON d.id = r.domain_id
+            ON CONFLICT (domain_id) DO UPDATE SET
+                is_active = EXCLUDED.is_active,
+                last_status = EXCLUDED.last_status,
+                last_error = EXCLUDED.last_error,
+                expiry_bucket = cert_expiry_bucket(s.expiry_date, CURRENT_DATE),
+                last_scanned_at = EXCLUDED.last_scanned_at
+            RETURNING s.*
+            """,
+            list(failed),
+            [info.get("error") for info in failed.values()]
+        )
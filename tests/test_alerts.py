@@ -0,0 +1,92 @@
+"""
+Expiry alert tests
+Need a database initialized from database/init.sql, given as
+TEST_DATABASE_URL; they are skipped without it.
+"""
+import asyncio
+import os
+import sys
+import uuid
+from datetime import date, timedelta
+from pathlib import Path
+
+import asyncpg
+import pytest
+
+# Only while importing (see tests/test_scanner.py)
+SCANNER_DIR = str(Path(__file__).resolve().parent.parent / "scanner")
+sys.path.insert(0, SCANNER_DIR)
+try:
+    from alerts import evaluate_alerts
+    from maintenance import refresh_expiry_buckets
+    from writer import ResultWriter
+finally:
+    sys.path.remove(SCANNER_DIR)
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+def certificate(expiry_date: date, fingerprint: str) -> dict:
+    """Successful scan result as returned by parse_certificate()"""
+    return {
+        "status": "success",
+        "common_name": "example.com",
+        "subject_alt_names": ["example.com"],
+        "issuer": "Test CA",
+        "serial_number": "01",
+        "issued_date": (expiry_date - timedelta(days=90)).isoformat(),
+        "expiry_date": expiry_date.isoformat(),
+        "days_until_expiry": (expiry_date - date.today()).days,
+        "is_valid": True,
+        "is_self_signed": False,
+        "key_size": 2048,
+        "signature_algorithm": "sha256WithRSAEncryption",
+        "fingerprint_sha256": fingerprint,
+    }
+
+@requires_db
+def test_bucket_refreshed_by_maintenance_then_scanned():
+    async def test():
+        pool = await asyncpg.create_pool(TEST_DATABASE_URL, min_size=1, max_size=2)
+        try:
+            writer = ResultWriter(pool)
+            writer.add_hook(evaluate_alerts)
+            fingerprint = uuid.uuid4().hex * 2
+            expiry = date.today() + timedelta(days=40)
+
+            async with pool.acquire() as conn:
+                domain_id = await conn.fetchval(
+                    "INSERT INTO domains (domain_name) VALUES ($1) RETURNING id",
+                    f"alerts-{uuid.uuid4().hex[:12]}.example.com"
+                )
+            await writer.write([(domain_id, certificate(expiry, fingerprint))])
+
+            # 20 days later the certificate is inside the 30-day threshold;
+            # maintenance reaches it before the next scan
+            async with pool.acquire() as conn:
+                for table in ("domain_cert_status", "ssl_certificates"):
+                    await conn.execute(
+                        f"UPDATE {table} SET expiry_date = expiry_date - 20 WHERE domain_id = $1",
+                        domain_id
+                    )
+                assert await refresh_expiry_buckets(conn) >= 1
+            await writer.write([(domain_id, certificate(expiry - timedelta(days=20), fingerprint))])
+
+            async with pool.acquire() as conn:
+                alerts = await conn.fetch(
+                    "SELECT severity FROM alerts WHERE domain_id = $1 AND alert_type = 'cert_expiry' AND NOT is_resolved",
+                    domain_id
+                )
+                notifications = await conn.fetch(
+                    "SELECT notification_type, days_until_expiry FROM cert_expiry_notifications WHERE domain_id = $1",
+                    domain_id
+                )
+                await conn.execute("DELETE FROM domains WHERE id = $1", domain_id)
+        finally:
+            await pool.close()
+
+        assert [row["severity"] for row in alerts] == ["low"]
+        assert [tuple(row) for row in notifications] == [("30days", 20)]
+
+    asyncio.run(test())
@@ -0,0 +1,94 @@
+"""
+Token refresh tests
+The revocation tests need a database initialized from database/init.sql,
+given as TEST_DATABASE_URL; they are skipped without it.
+"""
+import asyncio
+import os
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+# Read at import; the backend's own database is never connected to
+os.environ.setdefault("DB_PASSWORD", "unused")
+os.environ.setdefault("JWT_SECRET", "test-secret-" + "x" * 32)
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.auth import (
+    create_access_token,
+    create_refresh_token,
+    revoke_token,
+    verify_refresh_token,
+    verify_token
+)
+from backend.routes.auth import RefreshTokenRequest, refresh
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+def test_refresh_token_is_not_an_access_token():
+    token = create_refresh_token(1, "admin")
+    assert verify_refresh_token(token)["username"] == "admin"
+    with pytest.raises(HTTPException) as e:
+        verify_token(token)
+    assert e.value.status_code == 401
+
+def test_access_token_is_not_a_refresh_token():
+    token = create_access_token(1, "admin", "admin")["access_token"]
+    with pytest.raises(HTTPException) as e:
+        verify_refresh_token(token)
+    assert e.value.status_code == 401
+
+# ============================================
+# Refresh (database)
+# ============================================
+requires_db = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+async def _with_user(test):
+    """Run test(db, user_id) with a new user"""
+    engine = create_async_engine(TEST_DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1))
+    try:
+        async with AsyncSession(engine) as db:
+            username = f"refresh-{uuid.uuid4().hex[:12]}"
+            user_id = (await db.execute(
+                text(
+                    "INSERT INTO users (username, email, password_hash) "
+                    "VALUES (:username, :email, 'x') RETURNING id"
+                ),
+                {"username": username, "email": f"{username}@example.com"}
+            )).scalar()
+            await db.commit()
+            await test(db, user_id)
+    finally:
+        await engine.dispose()
+
+async def _refresh_status(db: AsyncSession, token: str) -> int:
+    try:
+        await refresh(RefreshTokenRequest(refresh_token=token), db)
+    except HTTPException as e:
+        return e.status_code
+    return 200
+
+@requires_db
+def test_revoked_access_token_cannot_be_refreshed():
+    async def test(db, user_id):
+        access = create_access_token(user_id, "refresh-user", "user")["access_token"]
+        await revoke_token(access, verify_token(access), db)
+        await db.commit()
+        assert await _refresh_status(db, access) == 401
+
+    asyncio.run(_with_user(test))
+
+@requires_db
+def test_refresh_token_works_until_revoked():
+    async def test(db, user_id):
+        token = create_refresh_token(user_id, "refresh-user")
+        assert await _refresh_status(db, token) == 200
+
+        await revoke_token(token, verify_refresh_token(token), db)
+        await db.commit()
+        assert await _refresh_status(db, token) == 401
+
+    asyncio.run(_with_user(test))
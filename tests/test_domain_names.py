@@ -0,0 +1,66 @@
+"""
+Domain name validation tests
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+from backend.domain_names import DOMAIN_PATTERN, DomainImport, normalize_domain
+
+INIT_SQL = Path(__file__).resolve().parent.parent / "database" / "init.sql"
+
+def db_domain_pattern() -> re.Pattern:
+    """chk_domain_format of the domains table"""
+    match = re.search(r"CONSTRAINT chk_domain_format CHECK \(domain_name ~ '([^']+)'\)", INIT_SQL.read_text())
+    return re.compile(match.group(1))
+
+@pytest.mark.parametrize("name", [
+    "example.com",
+    "sub.example.co.uk",
+    "a-b--c.example.org",
+    "example.xn--p1ai",
+    "example.xn--abc-def",
+    "xn--bcher-kva.example",
+])
+def test_valid_names(name):
+    assert normalize_domain(name) == name
+
+@pytest.mark.parametrize("name", [
+    "example.xn--abc-",
+    "example.xn---abc",
+    "example.xn--",
+    "-example.com",
+    "example-.com",
+    "example.c",
+    "example.c0m",
+    "example..com",
+    "a" * 64 + ".com",
+    "example.xn--" + "a" * 60,
+])
+def test_invalid_names(name):
+    assert normalize_domain(name) is None
+
+def test_normalization():
+    assert normalize_domain("  Example.COM. ") == "example.com"
+    assert normalize_domain("bücher.example") == "xn--bcher-kva.example"
+
+@pytest.mark.parametrize("name", [
+    "example.com",
+    "example.xn--p1ai",
+    "example.xn--abc-def",
+    "example.xn--abc-",
+    "example.xn---abc",
+    "example.xn--",
+    "a--b.example.com",
+])
+def test_pattern_accepts_nothing_the_database_rejects(name):
+    if DOMAIN_PATTERN.match(name):
+        assert db_domain_pattern().match(name)
+
+def test_import_skips_names_the_database_rejects():
+    domain_import = DomainImport()
+    domain_import.add_many(["example.com", "example.xn--abc-", "example.xn---abc", "example.com"])
+    assert domain_import.names == {"example.com"}
+    assert domain_import.invalid == 2
+    assert domain_import.duplicates == 1
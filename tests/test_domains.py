@@ -0,0 +1,38 @@
+"""
+Bulk domain status tests
+"""
+import asyncio
+import os
+
+import pytest
+
+# Read at import; nothing here connects to the database
+os.environ.setdefault("DB_PASSWORD", "unused")
+os.environ.setdefault("JWT_SECRET", "test-secret-" + "x" * 32)
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import Request
+
+from backend.routes.domains import (
+    BulkDomainNames,
+    BulkReactivateRequest,
+    bulk_delete_domains_by_name,
+    bulk_reactivate_domains
+)
+
+ADMIN = {"user_id": 1, "username": "admin", "role": "admin"}
+INVALID_NAMES = ["not a domain", "-bad-.example.com", "example"]
+
+def request() -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": [], "client": ("127.0.0.1", 1)})
+
+@pytest.mark.parametrize("endpoint, body", [
+    (bulk_delete_domains_by_name, BulkDomainNames(domains=INVALID_NAMES)),
+    (bulk_reactivate_domains, BulkReactivateRequest(domains=INVALID_NAMES)),
+])
+def test_all_invalid_names_change_nothing(endpoint, body):
+    response = asyncio.run(endpoint(request(), body, AsyncSession(), ADMIN))
+    assert response.requested == 0
+    assert response.affected == 0
+    assert response.invalid == len(INVALID_NAMES)
+    assert response.unchanged_names == []
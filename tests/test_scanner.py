@@ -0,0 +1,45 @@
+"""
+Scanner tests
+Results are buffered in a ResultWriter without a pool; nothing is flushed.
+"""
+import asyncio
+import importlib.util
+import ssl
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scanner's flat imports need its directory on the path, but only
+# while importing: with it there, the backend's scanner.engine import
+# would resolve "scanner" to scanner/scanner.py. For the same reason
+# scanner.py is loaded under another name.
+SCANNER_DIR = Path(__file__).resolve().parent.parent / "scanner"
+sys.path.insert(0, str(SCANNER_DIR))
+try:
+    from writer import ResultWriter
+
+    spec = importlib.util.spec_from_file_location("ssl_scanner", SCANNER_DIR / "scanner.py")
+    ssl_scanner = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(ssl_scanner)
+    SSLScanner = ssl_scanner.SSLScanner
+finally:
+    sys.path.remove(str(SCANNER_DIR))
+
+@pytest.mark.parametrize("error", [
+    TimeoutError("timed out"),
+    ssl.SSLError("handshake failure"),
+    ConnectionRefusedError("refused"),
+])
+def test_raising_handshake_still_buffers_a_failed_row(error, monkeypatch):
+    scanner = SSLScanner(concurrency=1)
+    scanner.writer = ResultWriter(pool=None, batch_size=100)
+
+    async def get_ssl_certificate(domain_name):
+        raise error
+
+    monkeypatch.setattr(scanner, "get_ssl_certificate", get_ssl_certificate)
+    result = asyncio.run(scanner.scan_domain(7, "example.com"))
+
+    assert result["result"]["status"] == "failed"
+    assert scanner.writer.pending == [(7, {"status": "failed", "error": str(error)})]